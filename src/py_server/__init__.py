@@ -1,13 +1,27 @@
 """MCP-прокси сервер для взаимодействия с 1С."""
 
+import importlib
+
 from .config import Config, get_config
-from .mcp_server import MCPProxy
-from .http_server import run_http_server
-from .stdio_server import run_stdio_server
-from .onec_client import OneCClient
 
 __version__ = "1.0.0"
 
+# Серверы и клиент импортируются при первом обращении: режиму stdio не нужны FastAPI и uvicorn
+_LAZY_EXPORTS = {
+	"MCPProxy": ".mcp_server",
+	"run_http_server": ".http_server",
+	"run_stdio_server": ".stdio_server",
+	"OneCClient": ".onec_client"
+}
+
+
+def __getattr__(name: str):
+	"""Импорт экспортируемых объектов по требованию."""
+	module = _LAZY_EXPORTS.get(name)
+	if module is None:
+		raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+	return getattr(importlib.import_module(module, __name__), name)
+
 __all__ = [
 	"Config",
 	"get_config", 
@@ -0,0 +1,158 @@
+"""Адаптивный лимит одновременных запросов к 1С (AIMD по задержке и ошибкам)."""
+
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+
+logger = logging.getLogger(__name__)
+
+# Коэффициент сглаживания текущей задержки и её отношения к базовой
+RECENT_SMOOTHING = 0.2
+
+# Скорость, с которой базовая задержка подтягивается к текущей на минимальном лимите:
+# там рост задержки вызван не числом запросов прокси, а состоянием самой 1С
+BASELINE_DRIFT = 0.05
+
+# Минимальное число ответов в окне, после которого принимается решение об увеличении лимита
+MIN_WINDOW = 10
+
+# Число последних изменений лимита в статистике
+HISTORY_SIZE = 20
+
+
+class AdaptiveLimit:
+	"""Лимит одновременных запросов, подстраиваемый по наблюдаемой задержке и ошибкам 1С.
+	
+	Базовая задержка ведётся отдельно для каждого вида запроса (метода или инструмента):
+	это наименьшая наблюдавшаяся задержка. На минимальном лимите, где рост задержки вызван
+	не нагрузкой от прокси, базовая задержка подтягивается к текущей. Пока сглаженное
+	отношение задержки к базовой не превышает tolerance и лимит используется, он увеличивается
+	на единицу за окно (additive increase). При росте задержки или ошибках перегрузки (таймауты,
+	сбои соединения, ответы 5xx) лимит умножается на backoff (multiplicative decrease),
+	но не чаще одного раза за время ответа 1С.
+	"""
+	
+	def __init__(
+		self,
+		initial: int,
+		min_limit: int,
+		max_limit: int,
+		tolerance: float = 2.0,
+		backoff: float = 0.7
+	):
+		"""Инициализация.
+		
+		Args:
+			initial: Начальный лимит
+			min_limit: Минимальный лимит
+			max_limit: Максимальный лимит
+			tolerance: Допустимое отношение текущей задержки к базовой
+			backoff: Множитель уменьшения лимита
+		"""
+		self.min_limit = min_limit
+		self.max_limit = max_limit
+		self.tolerance = tolerance
+		self.backoff = backoff
+		self.limit = max(min_limit, min(initial, max_limit))
+		
+		self._baselines: Dict[str, float] = {}
+		self._recent: Optional[float] = None
+		self._gradient = 1.0
+		self._window_samples = 0
+		self._window_peak = 0
+		self._last_decrease = 0.0
+		
+		# Статистика
+		self._samples = 0
+		self._failures = 0
+		self._increases = 0
+		self._decreases = 0
+		self._history: Deque[Dict[str, Any]] = deque(maxlen=HISTORY_SIZE)
+	
+	def on_sample(self, kind: str, latency: float, failed: bool, in_flight: int) -> int:
+		"""Учесть завершённый запрос и пересчитать лимит.
+		
+		Args:
+			kind: Вид запроса (метод JSON-RPC или имя инструмента)
+			latency: Время выполнения запроса в секундах
+			failed: Запрос завершился ошибкой перегрузки 1С
+			in_flight: Число одновременно выполнявшихся запросов
+		
+		Returns:
+			Новый лимит
+		"""
+		self._samples += 1
+		self._window_samples += 1
+		self._window_peak = max(self._window_peak, in_flight)
+		now = time.monotonic()
+		
+		if failed:
+			self._failures += 1
+			self._decrease(now, "error")
+			return self.limit
+		
+		self._recent = latency if self._recent is None else self._recent + RECENT_SMOOTHING * (latency - self._recent)
+		baseline = self._baselines.get(kind)
+		if baseline is None or latency < baseline:
+			baseline = latency
+		elif self.limit == self.min_limit:
+			baseline += BASELINE_DRIFT * (latency - baseline)
+		self._baselines[kind] = baseline
+		ratio = latency / baseline if baseline > 0 else 1.0
+		self._gradient += RECENT_SMOOTHING * (ratio - self._gradient)
+		
+		if self._gradient > self.tolerance:
+			self._decrease(now, "latency")
+		elif self._window_samples >= max(self.limit, MIN_WINDOW):
+			# Увеличиваем лимит, только если он действительно используется
+			if self._window_peak * 2 >= self.limit:
+				self._set(self.limit + 1, "probe")
+			self._window_samples = 0
+			self._window_peak = 0
+		return self.limit
+	
+	def _decrease(self, now: float, reason: str):
+		"""Уменьшить лимит не чаще одного раза за время ответа 1С."""
+		if self._recent is not None and now - self._last_decrease < self._recent:
+			return
+		self._last_decrease = now
+		self._window_samples = 0
+		self._window_peak = 0
+		self._set(int(self.limit * self.backoff), reason)
+	
+	def _set(self, limit: int, reason: str):
+		"""Установить лимит в допустимых границах и запомнить изменение."""
+		limit = max(self.min_limit, min(limit, self.max_limit))
+		if limit == self.limit:
+			return
+		if limit > self.limit:
+			self._increases += 1
+		else:
+			self._decreases += 1
+			logger.info(f"Лимит одновременных запросов к 1С снижен: {self.limit} -> {limit} ({reason})")
+		self._history.append({
+			"time": time.time(),
+			"from": self.limit,
+			"to": limit,
+			"reason": reason,
+			"latency": round(self._recent or 0.0, 4),
+			"gradient": round(self._gradient, 3)
+		})
+		self.limit = limit
+	
+	def stats(self) -> Dict[str, Any]:
+		"""Получить статистику адаптивного лимита."""
+		return {
+			"limit": self.limit,
+			"min_limit": self.min_limit,
+			"max_limit": self.max_limit,
+			"latency": round(self._recent or 0.0, 4),
+			"gradient": round(self._gradient, 3),
+			"samples": self._samples,
+			"failures": self._failures,
+			"increases": self._increases,
+			"decreases": self._decreases,
+			"adjustments": list(self._history)
+		}
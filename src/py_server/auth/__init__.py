@@ -1,6 +1,9 @@
 """Модуль авторизации OAuth2."""
 
-from .oauth2 import OAuth2Service, OAuth2Store
+from .oauth2 import OAuth2Service, OAuth2Store, OAuth2StoreBusy
+from .sqlite_store import SQLiteOAuth2Store
+from .stateless_tokens import StatelessTokens
+from .token_cache import TokenCache
 
-__all__ = ["OAuth2Service", "OAuth2Store"]
+__all__ = ["OAuth2Service", "OAuth2Store", "OAuth2StoreBusy", "SQLiteOAuth2Store", "StatelessTokens", "TokenCache"]
 
@@ -2,46 +2,70 @@
 
 import asyncio
 import hashlib
+import heapq
 import base64
 import secrets
 import logging
+import time
 from dataclasses import dataclass
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Tuple
+from typing import Optional, Dict, List, Tuple
 from urllib.parse import urlencode
 
+from .stateless_tokens import StatelessTokens
+
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class AuthCodeData:
 	"""Данные authorization code."""
 	login: str
 	password: str
 	redirect_uri: str
 	code_challenge: str
-	exp: datetime
+	exp: float  # time.monotonic()
 
 
-@dataclass
+@dataclass(slots=True)
 class AccessTokenData:
 	"""Данные access token."""
 	login: str
 	password: str
-	exp: datetime
+	exp: float  # time.monotonic()
 
 
-@dataclass
+@dataclass(slots=True)
 class RefreshTokenData:
 	"""Данные refresh token."""
 	login: str
 	password: str
-	exp: datetime
+	exp: float  # time.monotonic()
 	rotation_counter: int = 0
 
 
+class OAuth2StoreBusy(Exception):
+	"""Хранилище временно занято другим процессом; запрос можно повторить."""
+
+
+def expires_at(ttl: float) -> float:
+	"""Момент истечения через ttl секунд по монотонным часам."""
+	return time.monotonic() + ttl
+
+
 class OAuth2Store:
-	"""In-memory хранилище для OAuth2 токенов и кодов."""
+	"""In-memory хранилище для OAuth2 токенов и кодов.
+	
+	Методы save_*/get_*, задачи очистки и close() образуют интерфейс хранилища:
+	другие реализации (SQLiteOAuth2Store) переопределяют их. Методы вызываются
+	в цикле событий и не должны блокировать его надолго: если хранилище занято,
+	они выбрасывают OAuth2StoreBusy.
+	
+	Сроки действия отслеживаются в общей min-куче по монотонным часам: очистка
+	извлекает из кучи только истёкшие записи и не просматривает все токены.
+	Записи, удалённые раньше срока (использованные коды, ротированные refresh
+	токены), остаются в куче до своего срока; когда таких записей становится
+	больше, чем живых, куча перестраивается.
+	"""
 	
 	def __init__(self):
 		"""Инициализация хранилища."""
@@ -49,6 +73,10 @@ class OAuth2Store:
 		self.access_tokens: Dict[str, AccessTokenData] = {}
 		self.refresh_tokens: Dict[str, RefreshTokenData] = {}
 		self._cleanup_task: Optional[asyncio.Task] = None
+		
+		# Куча сроков (exp, номер таблицы, ключ); номера соответствуют self._tables
+		self._expiry: List[Tuple[float, int, str]] = []
+		self._tables = (self.auth_codes, self.access_tokens, self.refresh_tokens)
 	
 	async def start_cleanup_task(self, interval: int = 60):
 		"""Запустить периодическую очистку устаревших токенов.
@@ -80,37 +108,46 @@ class OAuth2Store:
 			except Exception as e:
 				logger.error(f"Ошибка при очистке токенов: {e}")
 	
-	def _cleanup_expired(self):
-		"""Удалить устаревшие токены и коды."""
-		now = datetime.now()
-		
-		# Очистка authorization codes
-		expired_codes = [code for code, data in self.auth_codes.items() if data.exp < now]
-		for code in expired_codes:
-			del self.auth_codes[code]
-		
-		# Очистка access tokens
-		expired_access = [token for token, data in self.access_tokens.items() if data.exp < now]
-		for token in expired_access:
-			del self.access_tokens[token]
+	def _track(self, table: int, key: str, exp: float):
+		"""Добавить срок записи в кучу."""
+		heapq.heappush(self._expiry, (exp, table, key))
 		
-		# Очистка refresh tokens
-		expired_refresh = [token for token, data in self.refresh_tokens.items() if data.exp < now]
-		for token in expired_refresh:
-			del self.refresh_tokens[token]
+		# Перестраиваем кучу, если в ней больше записей удалённых токенов, чем живых
+		live = len(self.auth_codes) + len(self.access_tokens) + len(self.refresh_tokens)
+		if len(self._expiry) > 2 * live + 1024:
+			self._expiry = [
+				(data.exp, index, token)
+				for index, records in enumerate(self._tables)
+				for token, data in records.items()
+			]
+			heapq.heapify(self._expiry)
+	
+	def _cleanup_expired(self):
+		"""Удалить устаревшие токены и коды (стоимость пропорциональна числу истёкших)."""
+		now = time.monotonic()
+		expired = [0, 0, 0]
+		while self._expiry and self._expiry[0][0] < now:
+			exp, table, key = heapq.heappop(self._expiry)
+			records = self._tables[table]
+			data = records.get(key)
+			# Запись могла быть удалена или сохранена заново с другим сроком
+			if data is not None and data.exp == exp:
+				del records[key]
+				expired[table] += 1
 		
-		if expired_codes or expired_access or expired_refresh:
-			logger.debug(f"Очищено токенов: codes={len(expired_codes)}, access={len(expired_access)}, refresh={len(expired_refresh)}")
+		if any(expired):
+			logger.debug(f"Очищено токенов: codes={expired[0]}, access={expired[1]}, refresh={expired[2]}")
 	
 	def save_auth_code(self, code: str, data: AuthCodeData):
 		"""Сохранить authorization code."""
 		self.auth_codes[code] = data
-		logger.debug(f"Сохранён authorization code для {data.login}, expires в {data.exp}")
+		self._track(0, code, data.exp)
+		logger.debug(f"Сохранён authorization code для {data.login}, истекает через {data.exp - time.monotonic():.0f} с")
 	
 	def get_auth_code(self, code: str) -> Optional[AuthCodeData]:
 		"""Получить и удалить authorization code (одноразовый)."""
 		data = self.auth_codes.pop(code, None)
-		if data and data.exp < datetime.now():
+		if data and data.exp < time.monotonic():
 			logger.debug(f"Authorization code истёк: {code}")
 			return None
 		return data
@@ -118,12 +155,13 @@ class OAuth2Store:
 	def save_access_token(self, token: str, data: AccessTokenData):
 		"""Сохранить access token."""
 		self.access_tokens[token] = data
-		logger.debug(f"Сохранён access token для {data.login}, expires в {data.exp}")
+		self._track(1, token, data.exp)
+		logger.debug(f"Сохранён access token для {data.login}, истекает через {data.exp - time.monotonic():.0f} с")
 	
 	def get_access_token(self, token: str) -> Optional[AccessTokenData]:
 		"""Получить access token."""
 		data = self.access_tokens.get(token)
-		if data and data.exp < datetime.now():
+		if data and data.exp < time.monotonic():
 			logger.debug(f"Access token истёк: {token[:16]}...")
 			del self.access_tokens[token]
 			return None
@@ -132,21 +170,32 @@ class OAuth2Store:
 	def save_refresh_token(self, token: str, data: RefreshTokenData):
 		"""Сохранить refresh token."""
 		self.refresh_tokens[token] = data
-		logger.debug(f"Сохранён refresh token для {data.login}, expires в {data.exp}")
+		self._track(2, token, data.exp)
+		logger.debug(f"Сохранён refresh token для {data.login}, истекает через {data.exp - time.monotonic():.0f} с")
 	
 	def get_refresh_token(self, token: str) -> Optional[RefreshTokenData]:
 		"""Получить и удалить refresh token (ротация)."""
 		data = self.refresh_tokens.pop(token, None)
-		if data and data.exp < datetime.now():
+		if data and data.exp < time.monotonic():
 			logger.debug(f"Refresh token истёк: {token[:16]}...")
 			return None
 		return data
+	
+	def close(self):
+		"""Освободить ресурсы хранилища."""
 
 
 class OAuth2Service:
 	"""Сервис OAuth2 для авторизации."""
 	
-	def __init__(self, store: OAuth2Store, code_ttl: int = 120, access_ttl: int = 3600, refresh_ttl: int = 1209600):
+	def __init__(
+		self,
+		store: OAuth2Store,
+		code_ttl: int = 120,
+		access_ttl: int = 3600,
+		refresh_ttl: int = 1209600,
+		stateless: Optional[StatelessTokens] = None
+	):
 		"""Инициализация сервиса.
 		
 		Args:
@@ -154,11 +203,13 @@ class OAuth2Service:
 			code_ttl: TTL authorization code в секундах
 			access_ttl: TTL access token в секундах
 			refresh_ttl: TTL refresh token в секундах
+			stateless: Выпуск самодостаточных access token (если не задан, access token хранятся в store)
 		"""
 		self.store = store
 		self.code_ttl = code_ttl
 		self.access_ttl = access_ttl
 		self.refresh_ttl = refresh_ttl
+		self.stateless = stateless
 	
 	def generate_prm_document(self, public_url: str) -> dict:
 		"""Сгенерировать Protected Resource Metadata документ (RFC 9728).
@@ -191,7 +242,7 @@ class OAuth2Service:
 			Authorization code
 		"""
 		code = secrets.token_urlsafe(32)
-		exp = datetime.now() + timedelta(seconds=self.code_ttl)
+		exp = expires_at(self.code_ttl)
 		
 		self.store.save_auth_code(code, AuthCodeData(
 			login=login,
@@ -248,17 +299,10 @@ class OAuth2Service:
 			return None
 		
 		# Генерируем токены
-		access_token = secrets.token_urlsafe(32)
+		access_token = self._issue_access_token(code_data.login, code_data.password)
 		refresh_token = secrets.token_urlsafe(32)
 		
-		access_exp = datetime.now() + timedelta(seconds=self.access_ttl)
-		refresh_exp = datetime.now() + timedelta(seconds=self.refresh_ttl)
-		
-		self.store.save_access_token(access_token, AccessTokenData(
-			login=code_data.login,
-			password=code_data.password,
-			exp=access_exp
-		))
+		refresh_exp = expires_at(self.refresh_ttl)
 		
 		self.store.save_refresh_token(refresh_token, RefreshTokenData(
 			login=code_data.login,
@@ -286,17 +330,10 @@ class OAuth2Service:
 			return None
 		
 		# Генерируем новые токены
-		new_access_token = secrets.token_urlsafe(32)
+		new_access_token = self._issue_access_token(refresh_data.login, refresh_data.password)
 		new_refresh_token = secrets.token_urlsafe(32)
 		
-		access_exp = datetime.now() + timedelta(seconds=self.access_ttl)
-		refresh_exp = datetime.now() + timedelta(seconds=self.refresh_ttl)
-		
-		self.store.save_access_token(new_access_token, AccessTokenData(
-			login=refresh_data.login,
-			password=refresh_data.password,
-			exp=access_exp
-		))
+		refresh_exp = expires_at(self.refresh_ttl)
 		
 		self.store.save_refresh_token(new_refresh_token, RefreshTokenData(
 			login=refresh_data.login,
@@ -308,6 +345,19 @@ class OAuth2Service:
 		logger.debug(f"Обновлены токены для пользователя {refresh_data.login} (rotation #{refresh_data.rotation_counter + 1})")
 		return (new_access_token, "Bearer", self.access_ttl, new_refresh_token)
 	
+	def _issue_access_token(self, login: str, password: str) -> str:
+		"""Выпустить access token: самодостаточный или сохранённый в хранилище."""
+		if self.stateless:
+			return self.stateless.issue(login, password, self.access_ttl)
+		
+		access_token = secrets.token_urlsafe(32)
+		self.store.save_access_token(access_token, AccessTokenData(
+			login=login,
+			password=password,
+			exp=expires_at(self.access_ttl)
+		))
+		return access_token
+	
 	def validate_access_token(self, token: str) -> Optional[Tuple[str, str]]:
 		"""Валидировать access token и получить креды 1С.
 		
@@ -317,9 +367,32 @@ class OAuth2Service:
 		Returns:
 			Tuple (login, password) или None
 		"""
+		if self.stateless and self.stateless.is_stateless(token):
+			opened = self.stateless.open(token)
+			return opened[0] if opened else None
+		
 		token_data = self.store.get_access_token(token)
 		if not token_data:
 			return None
 		
 		return (token_data.login, token_data.password)
+	
+	def access_token_expires_in(self, token: str) -> Optional[float]:
+		"""Оставшееся время действия access token в секундах.
+		
+		Args:
+			token: Access token
+			
+		Returns:
+			Время в секундах или None, если токен недействителен
+		"""
+		if self.stateless and self.stateless.is_stateless(token):
+			opened = self.stateless.open(token)
+			return opened[1] if opened else None
+		
+		token_data = self.store.get_access_token(token)
+		if not token_data:
+			return None
+		
+		return token_data.exp - time.monotonic()
 
@@ -0,0 +1,270 @@
+"""Хранилище OAuth2 токенов в SQLite, общее для нескольких процессов."""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+
+from .oauth2 import OAuth2Store, OAuth2StoreBusy, AuthCodeData, AccessTokenData, RefreshTokenData
+from .stateless_tokens import StatelessTokens
+
+
+logger = logging.getLogger(__name__)
+
+# Виды записей в таблице токенов
+AUTH_CODE = "code"
+ACCESS_TOKEN = "access"
+REFRESH_TOKEN = "refresh"
+
+# Время ожидания блокировки файла другим процессом в секундах. Запросы выполняются
+# в цикле событий, поэтому ожидание короткое: при занятом файле запрос отклоняется
+# с OAuth2StoreBusy и повторяется клиентом
+BUSY_TIMEOUT = 0.05
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS oauth2_tokens (
+	kind TEXT NOT NULL,
+	token_hash BLOB NOT NULL,
+	login TEXT NOT NULL,
+	password TEXT NOT NULL,
+	redirect_uri TEXT,
+	code_challenge TEXT,
+	rotation_counter INTEGER NOT NULL DEFAULT 0,
+	exp_at REAL NOT NULL,
+	PRIMARY KEY (kind, token_hash)
+);
+CREATE INDEX IF NOT EXISTS oauth2_tokens_exp_at ON oauth2_tokens (exp_at);
+"""
+
+
+def _token_hash(token: str) -> bytes:
+	"""Ключ записи: SHA-256 токена (сами токены в файл не записываются)."""
+	return hashlib.sha256(token.encode()).digest()
+
+
+@contextmanager
+def _busy_as_retryable() -> Iterator[None]:
+	"""Преобразовать SQLITE_BUSY (файл заблокирован другим процессом) в OAuth2StoreBusy."""
+	try:
+		yield
+	except sqlite3.OperationalError as e:
+		if "locked" in str(e) or "busy" in str(e):
+			raise OAuth2StoreBusy(f"Хранилище OAuth2 занято: {e}") from e
+		raise
+
+
+def _to_wall(exp: float) -> float:
+	"""Срок по монотонным часам -> время Unix (для хранения между процессами и перезапусками)."""
+	return time.time() + (exp - time.monotonic())
+
+
+def _to_monotonic(exp_at: float) -> float:
+	"""Время Unix -> срок по монотонным часам процесса."""
+	return time.monotonic() + (exp_at - time.time())
+
+
+class SQLiteOAuth2Store(OAuth2Store):
+	"""Хранилище OAuth2 в файле SQLite (режим WAL).
+	
+	Токены переживают перезапуск, а несколько процессов (воркеров) на одном хосте
+	видят токены друг друга. Access token после первого чтения кешируется в памяти
+	процесса (словари базового класса): проверка токена на горячем пути не обращается
+	к диску. Authorization code и refresh token одноразовые, поэтому читаются и
+	удаляются из файла одной транзакцией - повторно их не использует ни один процесс.
+	Блокировка файла другим процессом ожидается не дольше BUSY_TIMEOUT, чтобы не
+	останавливать цикл событий; после этого запрос отклоняется с OAuth2StoreBusy.
+	
+	Логин и пароль 1С шифруются ключами самодостаточных токенов (cipher), если они
+	заданы; иначе хранятся в файле в открытом виде и защищены только правами файла.
+	"""
+	
+	def __init__(self, path: str, cipher: Optional[StatelessTokens] = None):
+		"""Инициализация хранилища.
+		
+		Args:
+			path: Путь к файлу базы SQLite (создаётся при первом запуске)
+			cipher: Ключи шифрования креденшилов (None - креденшилы не шифруются)
+		"""
+		super().__init__()
+		self.path = path
+		self._cipher = cipher
+		if os.name == "posix" and not os.path.exists(path):
+			# Файл создаётся сразу с доступом только владельцу
+			os.close(os.open(path, os.O_CREAT | os.O_WRONLY, 0o600))
+		# При запуске (создание схемы несколькими воркерами сразу) ожидание блокировки обычное
+		self._db = sqlite3.connect(path, isolation_level=None, timeout=5.0)
+		self._db.execute("PRAGMA journal_mode=WAL")
+		self._db.execute("PRAGMA synchronous=NORMAL")
+		self._db.executescript(SCHEMA)
+		self._restrict_permissions()
+		if cipher is not None:
+			self._seal_plaintext()
+		else:
+			logger.warning(
+				f"Логины и пароли 1С хранятся в {path} в открытом виде (защищены только правами файла); "
+				f"для шифрования задайте MCP_OAUTH2_TOKEN_KEYS"
+			)
+		self._db.execute(f"PRAGMA busy_timeout = {int(BUSY_TIMEOUT * 1000)}")
+		logger.info(f"Хранилище OAuth2 токенов: {path} (SQLite, WAL)")
+	
+	def _restrict_permissions(self):
+		"""Оставить доступ к файлам базы только владельцу.
+		
+		Выполняется при каждом открытии: существующий или восстановленный из резервной
+		копии файл мог быть создан с более широкими правами.
+		"""
+		if os.name != "posix":
+			return
+		for name in (self.path, self.path + "-wal", self.path + "-shm"):
+			try:
+				if os.path.exists(name) and os.stat(name).st_mode & 0o077:
+					os.chmod(name, 0o600)
+					logger.warning(f"Права доступа к {name} ограничены владельцем (0600)")
+			except OSError as e:
+				logger.warning(f"Не удалось ограничить права доступа к {name}: {e}")
+	
+	def _seal_plaintext(self):
+		"""Зашифровать креденшилы, записанные без шифрования (до включения ключей)."""
+		self._db.execute("BEGIN IMMEDIATE")
+		try:
+			rows = self._db.execute("SELECT kind, token_hash, login, password FROM oauth2_tokens").fetchall()
+			sealed = 0
+			for kind, key, login, password in rows:
+				if StatelessTokens.is_sealed(login) and StatelessTokens.is_sealed(password):
+					continue
+				self._db.execute(
+					"UPDATE oauth2_tokens SET login = ?, password = ? WHERE kind = ? AND token_hash = ?",
+					(self._seal(kind, key, login), self._seal(kind, key, password), kind, key)
+				)
+				sealed += 1
+			self._db.execute("COMMIT")
+		except BaseException:
+			self._db.execute("ROLLBACK")
+			raise
+		if sealed:
+			logger.info(f"Зашифрованы креденшилы записей, сохранённых в открытом виде: {sealed}")
+	
+	def _seal(self, kind: str, key: bytes, value: str) -> str:
+		"""Зашифровать значение записи (если заданы ключи и значение ещё не зашифровано)."""
+		if self._cipher is None or StatelessTokens.is_sealed(value):
+			return value
+		return self._cipher.seal(value, kind.encode("ascii") + key)
+	
+	def _unseal(self, kind: str, key: bytes, login: str, password: str) -> Optional[Tuple[str, str]]:
+		"""Расшифровать логин и пароль записи.
+		
+		Returns:
+			(login, password) или None, если значения не расшифровываются текущими ключами
+		"""
+		values = []
+		for value in (login, password):
+			if StatelessTokens.is_sealed(value):
+				value = self._cipher.unseal(value, kind.encode("ascii") + key) if self._cipher is not None else None
+				if value is None:
+					logger.warning(f"Креденшилы токена ({kind}) не расшифрованы: ключ удалён из MCP_OAUTH2_TOKEN_KEYS или запись повреждена")
+					return None
+			values.append(value)
+		return values[0], values[1]
+	
+	def _save(self, kind: str, token: str, login: str, password: str, exp: float, redirect_uri: Optional[str] = None, code_challenge: Optional[str] = None, rotation_counter: int = 0):
+		"""Записать токен в файл."""
+		key = _token_hash(token)
+		with _busy_as_retryable():
+			self._db.execute(
+				"INSERT OR REPLACE INTO oauth2_tokens (kind, token_hash, login, password, redirect_uri, code_challenge, rotation_counter, exp_at)"
+				" VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+				(kind, key, self._seal(kind, key, login), self._seal(kind, key, password), redirect_uri, code_challenge, rotation_counter, _to_wall(exp))
+			)
+	
+	def _take(self, kind: str, token: str) -> Optional[tuple]:
+		"""Прочитать и удалить одноразовый токен одной транзакцией."""
+		key = _token_hash(token)
+		with _busy_as_retryable():
+			self._db.execute("BEGIN IMMEDIATE")
+			try:
+				row = self._db.execute(
+					"SELECT login, password, redirect_uri, code_challenge, rotation_counter, exp_at FROM oauth2_tokens WHERE kind = ? AND token_hash = ?",
+					(kind, key)
+				).fetchone()
+				if row:
+					self._db.execute("DELETE FROM oauth2_tokens WHERE kind = ? AND token_hash = ?", (kind, key))
+				self._db.execute("COMMIT")
+			except BaseException:
+				self._db.execute("ROLLBACK")
+				raise
+		if not row:
+			return None
+		if row[5] < time.time():
+			logger.debug(f"Токен ({kind}) истёк: {token[:16]}...")
+			return None
+		credentials = self._unseal(kind, key, row[0], row[1])
+		if credentials is None:
+			return None
+		return credentials + row[2:]
+	
+	def _cleanup_expired(self):
+		"""Удалить устаревшие токены из памяти процесса и из файла (по индексу срока)."""
+		super()._cleanup_expired()
+		with _busy_as_retryable():
+			deleted = self._db.execute("DELETE FROM oauth2_tokens WHERE exp_at < ?", (time.time(),)).rowcount
+		if deleted:
+			logger.debug(f"Удалено устаревших токенов из {self.path}: {deleted}")
+	
+	def save_auth_code(self, code: str, data: AuthCodeData):
+		"""Сохранить authorization code."""
+		self._save(AUTH_CODE, code, data.login, data.password, data.exp, data.redirect_uri, data.code_challenge)
+		logger.debug(f"Сохранён authorization code для {data.login}")
+	
+	def get_auth_code(self, code: str) -> Optional[AuthCodeData]:
+		"""Получить и удалить authorization code (одноразовый)."""
+		row = self._take(AUTH_CODE, code)
+		if not row:
+			return None
+		login, password, redirect_uri, code_challenge, _, exp_at = row
+		return AuthCodeData(login=login, password=password, redirect_uri=redirect_uri, code_challenge=code_challenge, exp=_to_monotonic(exp_at))
+	
+	def save_access_token(self, token: str, data: AccessTokenData):
+		"""Сохранить access token (в файл и в кеш процесса)."""
+		self._save(ACCESS_TOKEN, token, data.login, data.password, data.exp)
+		super().save_access_token(token, data)
+	
+	def get_access_token(self, token: str) -> Optional[AccessTokenData]:
+		"""Получить access token (из кеша процесса, при промахе - из файла)."""
+		data = super().get_access_token(token)
+		if data:
+			return data
+		key = _token_hash(token)
+		with _busy_as_retryable():
+			row = self._db.execute(
+				"SELECT login, password, exp_at FROM oauth2_tokens WHERE kind = ? AND token_hash = ?",
+				(ACCESS_TOKEN, key)
+			).fetchone()
+		if not row or row[2] < time.time():
+			return None
+		credentials = self._unseal(ACCESS_TOKEN, key, row[0], row[1])
+		if credentials is None:
+			return None
+		data = AccessTokenData(login=credentials[0], password=credentials[1], exp=_to_monotonic(row[2]))
+		# Токен выдан другим процессом или до перезапуска - запоминаем в кеше процесса
+		super().save_access_token(token, data)
+		return data
+	
+	def save_refresh_token(self, token: str, data: RefreshTokenData):
+		"""Сохранить refresh token."""
+		self._save(REFRESH_TOKEN, token, data.login, data.password, data.exp, rotation_counter=data.rotation_counter)
+		logger.debug(f"Сохранён refresh token для {data.login}")
+	
+	def get_refresh_token(self, token: str) -> Optional[RefreshTokenData]:
+		"""Получить и удалить refresh token (ротация)."""
+		row = self._take(REFRESH_TOKEN, token)
+		if not row:
+			return None
+		login, password, _, _, rotation_counter, exp_at = row
+		return RefreshTokenData(login=login, password=password, exp=_to_monotonic(exp_at), rotation_counter=rotation_counter)
+	
+	def close(self):
+		"""Закрыть соединение с базой."""
+		self._db.close()
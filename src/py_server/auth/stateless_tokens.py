@@ -0,0 +1,171 @@
+"""Самодостаточные зашифрованные access token (без обращения к хранилищу)."""
+
+import base64
+import hashlib
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .. import json_codec
+
+try:
+	from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+except ImportError:  # pragma: no cover - зависит от окружения
+	AESGCM = None
+
+
+logger = logging.getLogger(__name__)
+
+# Префикс токенов этого формата (версия формата)
+TOKEN_PREFIX = "st1."
+
+# Префикс значений, зашифрованных для хранения в хранилище (версия формата)
+SEALED_PREFIX = "sv1."
+
+# Длина идентификатора ключа и nonce AES-GCM в байтах
+KEY_ID_SIZE = 4
+NONCE_SIZE = 12
+
+
+def _b64decode(value: str) -> bytes:
+	"""Декодировать base64url без выравнивания."""
+	return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+class StatelessTokens:
+	"""Access token, содержащий креденшилы 1С в зашифрованном виде (AES-256-GCM).
+	
+	Любая реплика прокси с тем же набором ключей проверяет такой токен только
+	вычислениями, без общего хранилища. Токен шифруется первым ключом набора,
+	расшифровывается любым из ключей: для ротации новый ключ ставится первым,
+	а старый остаётся в наборе, пока не истекут выданные им токены.
+	Refresh token по-прежнему хранятся в хранилище (для отслеживания ротации).
+	"""
+	
+	def __init__(self, keys: List[str]):
+		"""Инициализация.
+		
+		Args:
+			keys: Ключи в base64url (32 байта каждый), первый используется для шифрования
+		
+		Raises:
+			ValueError: Ключ некорректен
+		"""
+		self._ciphers: Dict[bytes, Any] = {}
+		self._current: Optional[Tuple[bytes, Any]] = None
+		for key in keys:
+			secret = _b64decode(key.strip())
+			if len(secret) != 32:
+				raise ValueError("Ключ токенов OAuth2 должен содержать 32 байта в base64url")
+			key_id = hashlib.sha256(secret).digest()[:KEY_ID_SIZE]
+			cipher = AESGCM(secret)
+			self._ciphers[key_id] = cipher
+			if self._current is None:
+				self._current = (key_id, cipher)
+	
+	@staticmethod
+	def available() -> bool:
+		"""Установлен ли пакет cryptography."""
+		return AESGCM is not None
+	
+	@staticmethod
+	def generate_key() -> str:
+		"""Сгенерировать новый ключ в base64url."""
+		return base64.urlsafe_b64encode(os.urandom(32)).decode("ascii").rstrip("=")
+	
+	@staticmethod
+	def is_stateless(token: str) -> bool:
+		"""Токен в самодостаточном формате."""
+		return token.startswith(TOKEN_PREFIX)
+	
+	def issue(self, login: str, password: str, ttl: float) -> str:
+		"""Выпустить токен.
+		
+		Args:
+			login: Логин пользователя 1С
+			password: Пароль пользователя 1С
+			ttl: Время действия в секундах
+		
+		Returns:
+			Access token
+		"""
+		key_id, cipher = self._current
+		nonce = os.urandom(NONCE_SIZE)
+		payload = json_codec.dumps([login, password, time.time() + ttl])
+		sealed = cipher.encrypt(nonce, payload, TOKEN_PREFIX.encode("ascii") + key_id)
+		return TOKEN_PREFIX + base64.urlsafe_b64encode(key_id + nonce + sealed).decode("ascii").rstrip("=")
+	
+	def open(self, token: str) -> Optional[Tuple[Tuple[str, str], float]]:
+		"""Проверить токен и извлечь креденшилы.
+		
+		Args:
+			token: Access token
+		
+		Returns:
+			Tuple ((login, password), оставшееся время действия в секундах) или None,
+			если токен поддельный, повреждён, зашифрован неизвестным ключом или истёк
+		"""
+		try:
+			raw = _b64decode(token[len(TOKEN_PREFIX):])
+			key_id = raw[:KEY_ID_SIZE]
+			cipher = self._ciphers.get(key_id)
+			if cipher is None:
+				logger.debug("Токен зашифрован неизвестным ключом")
+				return None
+			nonce = raw[KEY_ID_SIZE:KEY_ID_SIZE + NONCE_SIZE]
+			payload = cipher.decrypt(nonce, raw[KEY_ID_SIZE + NONCE_SIZE:], TOKEN_PREFIX.encode("ascii") + key_id)
+			login, password, exp_at = json_codec.loads(payload)
+		except Exception as e:
+			logger.debug(f"Недействительный самодостаточный токен: {type(e).__name__}")
+			return None
+		
+		expires_in = exp_at - time.time()
+		if expires_in <= 0:
+			logger.debug("Самодостаточный токен истёк")
+			return None
+		return (login, password), expires_in
+	
+	@staticmethod
+	def is_sealed(value: str) -> bool:
+		"""Значение зашифровано методом seal."""
+		return value.startswith(SEALED_PREFIX)
+	
+	def seal(self, value: str, context: bytes) -> str:
+		"""Зашифровать значение для хранения (креденшилы в хранилище токенов).
+		
+		Args:
+			value: Значение
+			context: Привязка к записи (значение не расшифруется в другой записи)
+		
+		Returns:
+			Зашифрованное значение
+		"""
+		key_id, cipher = self._current
+		nonce = os.urandom(NONCE_SIZE)
+		sealed = cipher.encrypt(nonce, value.encode("utf-8"), SEALED_PREFIX.encode("ascii") + key_id + context)
+		return SEALED_PREFIX + base64.urlsafe_b64encode(key_id + nonce + sealed).decode("ascii").rstrip("=")
+	
+	def unseal(self, value: str, context: bytes) -> Optional[str]:
+		"""Расшифровать значение, зашифрованное методом seal.
+		
+		Args:
+			value: Зашифрованное значение
+			context: Привязка к записи, переданная в seal
+		
+		Returns:
+			Значение или None, если оно повреждено, зашифровано неизвестным ключом
+			или относится к другой записи
+		"""
+		try:
+			raw = _b64decode(value[len(SEALED_PREFIX):])
+			key_id = raw[:KEY_ID_SIZE]
+			cipher = self._ciphers.get(key_id)
+			if cipher is None:
+				logger.debug("Значение зашифровано неизвестным ключом")
+				return None
+			nonce = raw[KEY_ID_SIZE:KEY_ID_SIZE + NONCE_SIZE]
+			return cipher.decrypt(nonce, raw[KEY_ID_SIZE + NONCE_SIZE:], SEALED_PREFIX.encode("ascii") + key_id + context).decode("utf-8")
+		except Exception as e:
+			logger.debug(f"Не удалось расшифровать значение: {type(e).__name__}")
+			return None
@@ -0,0 +1,81 @@
+"""Кеш проверенных Bearer токенов."""
+
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class TokenCache:
+	"""LRU-кеш креденшилов 1С по хешу проверенного Bearer токена.
+	
+	Повторные запросы с тем же токеном не декодируют его и не обращаются к хранилищу.
+	Ключом служит SHA-256 токена, а не сам токен. Запись живёт не дольше ttl секунд
+	и не дольше срока действия токена. Недействительные токены не кешируются.
+	"""
+	
+	def __init__(self, ttl: float, max_entries: int = 1024):
+		"""Инициализация кеша.
+		
+		Args:
+			ttl: Время жизни записи в секундах
+			max_entries: Максимальное число записей
+		"""
+		self.ttl = ttl
+		self.max_entries = max_entries
+		self._entries: "OrderedDict[bytes, Tuple[Tuple[str, str], float]]" = OrderedDict()
+		
+		# Статистика
+		self._hits = 0
+		self._misses = 0
+	
+	@staticmethod
+	def _key(token: str) -> bytes:
+		"""Ключ записи по токену."""
+		return hashlib.sha256(token.encode()).digest()
+	
+	def get(self, token: str) -> Optional[Tuple[str, str]]:
+		"""Получить креденшилы проверенного токена.
+		
+		Args:
+			token: Bearer токен
+		
+		Returns:
+			Tuple (login, password) или None, если токена нет в кеше или запись устарела
+		"""
+		key = self._key(token)
+		entry = self._entries.get(key)
+		if entry is None or entry[1] <= time.monotonic():
+			if entry is not None:
+				del self._entries[key]
+			self._misses += 1
+			return None
+		self._entries.move_to_end(key)
+		self._hits += 1
+		return entry[0]
+	
+	def put(self, token: str, credentials: Tuple[str, str], expires_in: Optional[float] = None):
+		"""Запомнить креденшилы проверенного токена.
+		
+		Args:
+			token: Bearer токен
+			credentials: Tuple (login, password)
+			expires_in: Оставшееся время действия токена в секундах (None - без срока)
+		"""
+		ttl = self.ttl if expires_in is None else min(self.ttl, expires_in)
+		if ttl <= 0:
+			return
+		key = self._key(token)
+		self._entries[key] = (credentials, time.monotonic() + ttl)
+		self._entries.move_to_end(key)
+		while len(self._entries) > self.max_entries:
+			self._entries.popitem(last=False)
+	
+	def stats(self) -> Dict[str, Any]:
+		"""Получить статистику кеша."""
+		return {
+			"entries": len(self._entries),
+			"ttl": self.ttl,
+			"hits": self._hits,
+			"misses": self._misses
+		}
@@ -0,0 +1,184 @@
+"""Распределение запросов между несколькими публикациями 1С."""
+
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+# Коэффициент сглаживания задержки публикации
+LATENCY_SMOOTHING = 0.2
+
+
+class Backend:
+	"""Публикация 1С и её текущее состояние."""
+	
+	def __init__(self, url: str, weight: float = 1.0):
+		"""Инициализация.
+		
+		Args:
+			url: Базовый URL публикации (например, http://server1/base)
+			weight: Вес публикации при распределении запросов
+		"""
+		self.url = url
+		self.weight = weight
+		self.outstanding = 0
+		self.latency = 0.0
+		self.failures = 0
+		self.ejected_until = 0.0
+		
+		# Статистика
+		self.requests = 0
+		self.errors = 0
+		self.ejections = 0
+	
+	def is_available(self, now: float) -> bool:
+		"""Публикация не исключена из распределения."""
+		return now >= self.ejected_until
+	
+	def score(self) -> float:
+		"""Оценка загрузки с учётом веса (меньше - лучше)."""
+		return (self.outstanding + 1) / self.weight
+
+
+class BackendRouter:
+	"""Выбор публикации 1С для запроса: взвешенный минимум выполняющихся запросов.
+	
+	Публикация исключается из распределения на eject_time секунд после eject_failures
+	ошибок перегрузки подряд или при сглаженной задержке выше eject_latency (пассивная
+	проверка здоровья по результатам запросов). Если исключены все публикации, запрос
+	получает та, что вернётся раньше остальных. При включённой привязке все запросы
+	пользователя идут в одну публикацию, пока она доступна: сеансы и кеши 1С остаются тёплыми.
+	"""
+	
+	def __init__(
+		self,
+		urls: List[str],
+		weights: Optional[Dict[str, float]] = None,
+		sticky: bool = False,
+		eject_failures: int = 3,
+		eject_time: float = 30.0,
+		eject_latency: float = 0.0
+	):
+		"""Инициализация.
+		
+		Args:
+			urls: Базовые URL публикаций
+			weights: Веса публикаций по URL (по умолчанию 1)
+			sticky: Привязывать пользователя к одной публикации
+			eject_failures: Число ошибок подряд, после которого публикация исключается
+			eject_time: Время исключения публикации в секундах
+			eject_latency: Сглаженная задержка в секундах, выше которой публикация исключается (0 - не учитывать)
+		"""
+		weights = weights or {}
+		self.backends = [Backend(url, weights.get(url, 1.0)) for url in urls]
+		self.sticky = sticky
+		self.eject_failures = eject_failures
+		self.eject_time = eject_time
+		self.eject_latency = eject_latency
+		self._pins: Dict[str, Backend] = {}
+	
+	def pick(self, login: str) -> Backend:
+		"""Выбрать публикацию для запроса и учесть его как выполняющийся.
+		
+		Args:
+			login: Пользователь 1С
+		
+		Returns:
+			Публикация (после запроса нужно вызвать release())
+		"""
+		backend = self.choose(login)
+		self.start(backend)
+		return backend
+	
+	def start(self, backend: Backend):
+		"""Учесть запрос к публикации, выбранной choose() (после запроса нужно вызвать release()).
+		
+		Args:
+			backend: Публикация
+		"""
+		backend.outstanding += 1
+		backend.requests += 1
+	
+	def choose(self, login: str) -> Backend:
+		"""Выбрать публикацию для пользователя без учёта запроса.
+		
+		Args:
+			login: Пользователь 1С
+		
+		Returns:
+			Публикация
+		"""
+		now = time.monotonic()
+		backend = self._pins.get(login) if self.sticky else None
+		if backend is None or not backend.is_available(now):
+			available = [backend for backend in self.backends if backend.is_available(now)]
+			if available:
+				backend = min(available, key=lambda backend: (backend.score(), backend.latency))
+			else:
+				backend = min(self.backends, key=lambda backend: backend.ejected_until)
+			if self.sticky:
+				self._pins[login] = backend
+		return backend
+	
+	def release(self, backend: Backend, latency: float, failed: Optional[bool]):
+		"""Учесть завершение запроса к публикации.
+		
+		Args:
+			backend: Публикация, выбранная pick()
+			latency: Время выполнения запроса в секундах
+			failed: Запрос завершился ошибкой перегрузки или недоступности (None - запрос отменён)
+		"""
+		backend.outstanding -= 1
+		if failed is None:
+			# Время отменённого запроса не отражает задержку публикации
+			return
+		if failed:
+			backend.errors += 1
+			backend.failures += 1
+			if backend.failures >= self.eject_failures:
+				self._eject(backend, f"{backend.failures} ошибок подряд")
+			return
+		
+		backend.failures = 0
+		backend.latency = latency if not backend.latency else backend.latency + LATENCY_SMOOTHING * (latency - backend.latency)
+		if self.eject_latency and backend.latency > self.eject_latency:
+			self._eject(backend, f"задержка {backend.latency:.2f} с")
+	
+	def _eject(self, backend: Backend, reason: str):
+		"""Исключить публикацию из распределения."""
+		now = time.monotonic()
+		if not backend.is_available(now):
+			return
+		backend.ejected_until = now + self.eject_time
+		backend.ejections += 1
+		backend.failures = 0
+		# После возвращения задержка оценивается заново
+		backend.latency = 0.0
+		logger.warning(f"Публикация 1С {backend.url} исключена на {self.eject_time} с: {reason}")
+	
+	def stats(self) -> Dict[str, Any]:
+		"""Получить статистику публикаций.
+		
+		Публикации обозначаются номером в списке (основная - 0): /stats доступен без
+		авторизации, и внутренние URL 1С в нём не раскрываются.
+		"""
+		now = time.monotonic()
+		return {
+			"sticky": self.sticky,
+			"pinned_logins": len(self._pins),
+			"backends": [
+				{
+					"index": index,
+					"weight": backend.weight,
+					"available": backend.is_available(now),
+					"outstanding": backend.outstanding,
+					"latency": round(backend.latency, 4),
+					"requests": backend.requests,
+					"errors": backend.errors,
+					"ejections": backend.ejections
+				}
+				for index, backend in enumerate(self.backends)
+			]
+		}
@@ -0,0 +1,167 @@
+"""Кеш каталогов 1С (инструменты, ресурсы, промпты) с проверкой отпечатков."""
+
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from . import json_codec
+
+
+logger = logging.getLogger(__name__)
+
+# Виды каталогов, поддерживаемые кешем
+CATALOG_KINDS = ("tools", "resources", "prompts")
+
+
+class CatalogCache:
+	"""Кеш результатов tools/list, resources/list и prompts/list.
+	
+	Каталоги меняются только при обновлении расширения 1С, поэтому их результаты хранятся
+	в течение ttl. По истечении ttl у 1С запрашиваются только отпечатки каталогов
+	(catalog/hash); перезапрашиваются лишь изменившиеся каталоги, а подписчики получают
+	уведомление об изменении. Если 1С не поддерживает catalog/hash, каталоги перезапрашиваются
+	целиком и сравниваются по локальному хешу.
+	"""
+	
+	def __init__(self, ttl: float, fetch_hashes: Callable[[], Awaitable[Optional[Dict[str, str]]]]):
+		"""Инициализация кеша.
+		
+		Args:
+			ttl: Время доверия к закешированным каталогам в секундах
+			fetch_hashes: Функция получения отпечатков каталогов из 1С
+				(возвращает None, если 1С не поддерживает catalog/hash)
+		"""
+		self.ttl = ttl
+		self._fetch_hashes = fetch_hashes
+		self._hash_supported = True
+		self._checked_at: Optional[float] = None
+		self._hashes: Dict[str, str] = {}
+		self._values: Dict[str, Any] = {}
+		self._fingerprints: Dict[str, Optional[str]] = {}
+		self._listeners: List[Callable[[List[str]], None]] = []
+		self._lock = asyncio.Lock()
+		
+		# Статистика
+		self._hits = 0
+		self._misses = 0
+		self._revalidations = 0
+		self._changes = 0
+	
+	def add_listener(self, listener: Callable[[List[str]], None]):
+		"""Подписаться на изменения каталогов.
+		
+		Args:
+			listener: Функция, получающая список изменившихся видов каталогов
+		"""
+		self._listeners.append(listener)
+	
+	async def get(self, kind: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+		"""Получить каталог из кеша или из 1С.
+		
+		Args:
+			kind: Вид каталога (tools, resources, prompts)
+			fetch: Функция получения каталога из 1С
+		
+		Returns:
+			Результат JSON-RPC метода списка
+		"""
+		if kind in self._values and not self._is_stale():
+			self._hits += 1
+			return self._values[kind]
+		
+		async with self._lock:
+			changed = []
+			if self._is_stale():
+				changed = await self._revalidate()
+			
+			if kind in self._values:
+				self._hits += 1
+				value = self._values[kind]
+			else:
+				self._misses += 1
+				value = await fetch()
+				previous = self._fingerprints.get(kind)
+				if self._hash_supported:
+					fingerprint = self._hashes.get(kind)
+				else:
+					fingerprint = self._local_hash(value)
+					if previous is not None and previous != fingerprint:
+						changed.append(kind)
+				self._values[kind] = value
+				self._fingerprints[kind] = fingerprint
+		
+		if changed:
+			self._notify(changed)
+		return value
+	
+	def _is_stale(self) -> bool:
+		"""Истекло ли время доверия к кешу."""
+		return self._checked_at is None or time.monotonic() - self._checked_at >= self.ttl
+	
+	async def _revalidate(self) -> List[str]:
+		"""Сверить отпечатки каталогов с 1С и сбросить изменившиеся.
+		
+		Returns:
+			Список видов каталогов, изменение которых уже установлено
+		"""
+		hashes = None
+		if self._hash_supported:
+			try:
+				hashes = await self._fetch_hashes()
+			except Exception as e:
+				# 1С недоступна - продолжаем отдавать прежние каталоги до следующей проверки
+				logger.warning(f"Не удалось получить отпечатки каталогов 1С: {e}")
+				if self._values:
+					self._checked_at = time.monotonic()
+					return []
+				raise
+			if hashes is None:
+				logger.debug("1С не поддерживает catalog/hash, каталоги сверяются по содержимому")
+				self._hash_supported = False
+				# Отпечатки 1С несравнимы с локальными хешами
+				self._fingerprints.clear()
+		
+		self._checked_at = time.monotonic()
+		self._revalidations += 1
+		
+		if hashes is None:
+			# Без отпечатков 1С каталоги перезапрашиваются и сравниваются при следующем обращении
+			self._values.clear()
+			return []
+		
+		self._hashes = hashes
+		changed = []
+		for kind in list(self._fingerprints.keys()):
+			fingerprint = hashes.get(kind)
+			if self._fingerprints[kind] != fingerprint:
+				changed.append(kind)
+				self._values.pop(kind, None)
+				self._fingerprints[kind] = fingerprint
+		return changed
+	
+	@staticmethod
+	def _local_hash(value: Any) -> str:
+		"""Вычислить отпечаток каталога по его содержимому."""
+		return hashlib.md5(json_codec.dumps(value, sort_keys=True)).hexdigest()
+	
+	def _notify(self, kinds: List[str]):
+		"""Уведомить подписчиков об изменении каталогов."""
+		self._changes += len(kinds)
+		logger.info(f"Каталоги 1С изменились: {', '.join(kinds)}")
+		for listener in self._listeners:
+			try:
+				listener(kinds)
+			except Exception as e:
+				logger.error(f"Ошибка обработчика изменения каталогов: {e}")
+	
+	def stats(self) -> Dict[str, Any]:
+		"""Получить статистику кеша."""
+		return {
+			"hits": self._hits,
+			"misses": self._misses,
+			"revalidations": self._revalidations,
+			"changes": self._changes,
+			"hash_supported": self._hash_supported
+		}
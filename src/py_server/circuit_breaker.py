@@ -0,0 +1,154 @@
+"""Размыкатель цепи (circuit breaker) для публикаций 1С."""
+
+import logging
+import math
+import time
+from typing import Any, Dict, Optional, Sequence
+
+from .concurrency_limiter import OneCOverloaded
+
+
+logger = logging.getLogger(__name__)
+
+# Состояния размыкателя
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(OneCOverloaded):
+	"""Запрос к 1С отклонён сразу: публикация недоступна (цепь разомкнута)."""
+	
+	def __init__(self, url: str, retry_after: float):
+		super().__init__(f"1С ({url}) недоступна, повторите запрос через {math.ceil(retry_after)} с")
+		self.retry_after = retry_after
+
+
+class CircuitBreaker:
+	"""Размыкатель цепи одной публикации 1С.
+	
+	После failure_threshold ошибок перегрузки или недоступности подряд цепь размыкается:
+	запросы отклоняются сразу, не дожидаясь таймаута. Через recovery_time секунд в 1С
+	пропускается один пробный запрос; его успех замыкает цепь, ошибка снова размыкает.
+	"""
+	
+	def __init__(self, url: str, failure_threshold: int = 5, recovery_time: float = 10.0):
+		"""Инициализация.
+		
+		Args:
+			url: Базовый URL публикации
+			failure_threshold: Число ошибок подряд, после которого цепь размыкается
+			recovery_time: Время до пробного запроса в секундах
+		"""
+		self.url = url
+		self.failure_threshold = failure_threshold
+		self.recovery_time = recovery_time
+		self.state = CLOSED
+		self._failures = 0
+		self._opened_until = 0.0
+		self._probing = False
+		
+		# Статистика
+		self._opens = 0
+		self._rejected = 0
+	
+	def allow(self):
+		"""Проверить, можно ли отправить запрос в 1С.
+		
+		Raises:
+			CircuitOpen: Цепь разомкнута или пробный запрос уже выполняется
+		"""
+		if self.state == CLOSED:
+			return
+		now = time.monotonic()
+		if self.state == OPEN and now >= self._opened_until:
+			self.state = HALF_OPEN
+			logger.info(f"Пробный запрос к 1С ({self.url}) после размыкания цепи")
+		if self.state == HALF_OPEN and not self._probing:
+			self._probing = True
+			return
+		self._rejected += 1
+		raise CircuitOpen(self.url, max(self._opened_until - now, 0.0) or self.recovery_time)
+	
+	def record(self, failed: Optional[bool]):
+		"""Учесть завершение запроса, пропущенного allow().
+		
+		Args:
+			failed: Запрос завершился ошибкой перегрузки или недоступности (None - запрос отменён)
+		"""
+		if failed is None:
+			# Отменённый запрос ничего не говорит о состоянии 1С
+			self._probing = False
+			return
+		if not failed:
+			self._failures = 0
+			if self.state != CLOSED:
+				logger.info(f"Цепь 1С ({self.url}) замкнута: публикация снова отвечает")
+			self.state = CLOSED
+			self._probing = False
+			return
+		
+		self._failures += 1
+		if self.state == HALF_OPEN or (self.state == CLOSED and self._failures >= self.failure_threshold):
+			self._open()
+	
+	def _open(self):
+		"""Разомкнуть цепь на recovery_time секунд."""
+		self.state = OPEN
+		self._opened_until = time.monotonic() + self.recovery_time
+		self._probing = False
+		self._opens += 1
+		logger.warning(f"Цепь 1С ({self.url}) разомкнута на {self.recovery_time} с после {self._failures} ошибок подряд")
+	
+	def stats(self) -> Dict[str, Any]:
+		"""Получить статистику размыкателя."""
+		return {
+			"state": self.state,
+			"failures": self._failures,
+			"opens": self._opens,
+			"rejected": self._rejected
+		}
+
+
+class CircuitBreakers:
+	"""Размыкатели цепи по публикациям 1С, общие для всех клиентов пула."""
+	
+	def __init__(self, failure_threshold: int, recovery_time: float, urls: Sequence[str] = ()):
+		"""Инициализация.
+		
+		Args:
+			failure_threshold: Число ошибок подряд, после которого цепь размыкается
+			recovery_time: Время до пробного запроса в секундах
+			urls: Базовые URL публикаций базы (номер в списке обозначает публикацию в статистике)
+		"""
+		self.failure_threshold = failure_threshold
+		self.recovery_time = recovery_time
+		self._breakers: Dict[str, CircuitBreaker] = {}
+		self._indexes = {url: index for index, url in enumerate(urls)}
+	
+	def get(self, url: str) -> CircuitBreaker:
+		"""Получить размыкатель публикации (создаётся при первом обращении).
+		
+		Args:
+			url: Базовый URL публикации
+		"""
+		breaker = self._breakers.get(url)
+		if breaker is None:
+			breaker = CircuitBreaker(url, self.failure_threshold, self.recovery_time)
+			self._breakers[url] = breaker
+		return breaker
+	
+	def stats(self) -> Dict[str, Any]:
+		"""Получить статистику размыкателей по публикациям.
+		
+		Публикации обозначаются номером (как в статистике распределения), а не URL:
+		/stats доступен без авторизации.
+		"""
+		return {
+			"failure_threshold": self.failure_threshold,
+			"recovery_time": self.recovery_time,
+			"backends": sorted(
+				(dict(breaker.stats(), index=self._indexes.get(url)) for url, breaker in self._breakers.items()),
+				key=lambda backend: (backend["index"] is None, backend["index"] or 0)
+			)
+		}
@@ -0,0 +1,273 @@
+"""Ограничение числа одновременных запросов к 1С с честной очередью по пользователям."""
+
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+from .adaptive_limit import AdaptiveLimit
+
+
+logger = logging.getLogger(__name__)
+
+# Коэффициент сглаживания времени занятия слота
+SERVICE_TIME_SMOOTHING = 0.1
+
+
+# Код ошибки JSON-RPC "1С перегружена"
+SERVER_BUSY = -32000
+
+
+class OneCOverloaded(Exception):
+	"""Запрос к 1С отклонён: очередь переполнена или время ожидания истекло."""
+
+
+class ConcurrencyLimiter:
+	"""Общий и пользовательский лимиты одновременных запросов к 1С (bulkhead).
+	
+	Запрос, для которого нет свободного слота, ждёт в очереди своего пользователя.
+	Освободившийся слот получает пользователь с наименьшим числом выполняющихся запросов
+	относительно его веса, а при равенстве - тот, чей запрос ждёт дольше. Поэтому
+	пользователь, отправивший много параллельных запросов, не вытесняет остальных.
+	Очередь ограничена по длине и по времени ожидания, а при заданном max_wait новый запрос
+	отклоняется сразу, если ожидаемое время ожидания в очереди его превышает.
+	При заданном адаптивном лимите общий лимит подстраивается по задержке и ошибкам 1С.
+	"""
+	
+	def __init__(
+		self,
+		max_concurrent: int = 0,
+		max_per_user: int = 0,
+		max_queue: int = 100,
+		queue_timeout: float = 30.0,
+		max_wait: float = 0.0,
+		weights: Optional[Dict[str, float]] = None,
+		adaptive: Optional[AdaptiveLimit] = None
+	):
+		"""Инициализация.
+		
+		Args:
+			max_concurrent: Максимальное число одновременных запросов к 1С (0 - без ограничения)
+			max_per_user: Максимальное число одновременных запросов одного пользователя (0 - без ограничения)
+			max_queue: Максимальное число ожидающих запросов
+			queue_timeout: Максимальное время ожидания слота в секундах
+			max_wait: Ожидаемое время ожидания, при котором новые запросы отклоняются сразу (0 - не отклонять)
+			weights: Веса пользователей при распределении слотов (по умолчанию 1)
+			adaptive: Адаптивный лимит (заменяет max_concurrent)
+		"""
+		self.max_concurrent = max_concurrent
+		self.max_per_user = max_per_user
+		self.max_queue = max_queue
+		self.queue_timeout = queue_timeout
+		self.max_wait = max_wait
+		self.weights = weights or {}
+		self.adaptive = adaptive
+		if adaptive:
+			self.max_concurrent = adaptive.limit
+		
+		self._active = 0
+		self._active_by_user: Dict[str, int] = {}
+		self._queues: Dict[str, Deque[Tuple[int, float, asyncio.Future]]] = {}
+		self._waiting = 0
+		self._sequence = itertools.count()
+		self._service_time = 0.0
+		
+		# Статистика
+		self._acquired = 0
+		self._queued = 0
+		self._waited = 0
+		self._rejected = 0
+		self._timeouts = 0
+		self._wait_total = 0.0
+		self._wait_max = 0.0
+	
+	@asynccontextmanager
+	async def slot(self, user: str) -> AsyncIterator[None]:
+		"""Занять слот на время выполнения запроса.
+		
+		Args:
+			user: Пользователь 1С
+		
+		Raises:
+			OneCOverloaded: Очередь переполнена или время ожидания истекло
+		"""
+		await self.acquire(user)
+		started = time.monotonic()
+		try:
+			yield
+		finally:
+			self._service_time += SERVICE_TIME_SMOOTHING * (time.monotonic() - started - self._service_time)
+			self.release(user)
+	
+	async def acquire(self, user: str):
+		"""Занять слот, при необходимости дождавшись своей очереди.
+		
+		Args:
+			user: Пользователь 1С
+		
+		Raises:
+			OneCOverloaded: Очередь переполнена или время ожидания истекло
+		"""
+		if not self._waiting and self._has_slot(user):
+			self._grant(user)
+			return
+		
+		if self._waiting >= self.max_queue:
+			self._rejected += 1
+			raise OneCOverloaded(f"Очередь запросов к 1С переполнена ({self._waiting} ожидающих)")
+		if self.max_wait and self.projected_wait() >= self.max_wait:
+			self._rejected += 1
+			raise OneCOverloaded(f"Ожидаемое время ожидания 1С превышает {self.max_wait} с")
+		
+		started = time.monotonic()
+		waiter = asyncio.get_running_loop().create_future()
+		self._queues.setdefault(user, deque()).append((next(self._sequence), started, waiter))
+		self._waiting += 1
+		self._queued += 1
+		# Слот мог быть свободен для этого пользователя, но не для стоящих в очереди до него
+		self._dispatch()
+		try:
+			await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+		except BaseException as e:
+			if waiter.done() and not waiter.cancelled():
+				# Слот выдан одновременно с отменой или таймаутом - возвращаем его
+				self.release(user)
+			else:
+				waiter.cancel()
+				self._remove_waiter(user, waiter)
+			if isinstance(e, asyncio.TimeoutError):
+				self._timeouts += 1
+				raise OneCOverloaded(f"Истекло время ожидания свободного слота 1С ({self.queue_timeout} с)") from None
+			raise
+		
+		waited = time.monotonic() - started
+		self._waited += 1
+		self._wait_total += waited
+		self._wait_max = max(self._wait_max, waited)
+	
+	def release(self, user: str):
+		"""Освободить слот и передать его следующему в очереди.
+		
+		Args:
+			user: Пользователь 1С
+		"""
+		self._active -= 1
+		self._active_by_user[user] -= 1
+		if not self._active_by_user[user]:
+			del self._active_by_user[user]
+		self._dispatch()
+	
+	@property
+	def queue_depth(self) -> int:
+		"""Число запросов, ожидающих свободного слота."""
+		return self._waiting
+	
+	def projected_wait(self) -> float:
+		"""Ожидаемое время ожидания нового запроса в очереди в секундах.
+		
+		Оценивается по длине очереди, общему лимиту и среднему времени занятия слота.
+		"""
+		if not self._waiting:
+			return 0.0
+		slots = self.max_concurrent or max(self._active, 1)
+		return (self._waiting + 1) * self._service_time / slots
+	
+	def observe(self, kind: str, latency: float, failed: bool):
+		"""Учесть завершённый запрос в адаптивном лимите.
+		
+		Args:
+			kind: Вид запроса (метод JSON-RPC или имя инструмента)
+			latency: Время выполнения запроса в секундах
+			failed: Запрос завершился ошибкой перегрузки 1С
+		"""
+		if not self.adaptive:
+			return
+		limit = self.adaptive.on_sample(kind, latency, failed, self._active)
+		if limit != self.max_concurrent:
+			self.max_concurrent = limit
+			self._dispatch()
+	
+	def _has_slot(self, user: str) -> bool:
+		"""Есть ли свободный слот для пользователя."""
+		if self.max_concurrent and self._active >= self.max_concurrent:
+			return False
+		if self.max_per_user and self._active_by_user.get(user, 0) >= self.max_per_user:
+			return False
+		return True
+	
+	def _grant(self, user: str):
+		"""Учесть занятый пользователем слот."""
+		self._active += 1
+		self._active_by_user[user] = self._active_by_user.get(user, 0) + 1
+		self._acquired += 1
+	
+	def _dispatch(self):
+		"""Раздать свободные слоты ожидающим пользователям."""
+		while self._waiting:
+			candidates = [
+				(self._active_by_user.get(user, 0) / self.weights.get(user, 1.0), queue[0][0], user)
+				for user, queue in self._queues.items()
+				if self._has_slot(user)
+			]
+			if not candidates:
+				return
+			_, _, user = min(candidates)
+			_, _, waiter = self._pop_waiter(user)
+			self._grant(user)
+			waiter.set_result(None)
+	
+	def _pop_waiter(self, user: str) -> Tuple[int, float, asyncio.Future]:
+		"""Извлечь первый ожидающий запрос пользователя."""
+		queue = self._queues[user]
+		item = queue.popleft()
+		if not queue:
+			del self._queues[user]
+		self._waiting -= 1
+		return item
+	
+	def _remove_waiter(self, user: str, waiter: asyncio.Future):
+		"""Убрать из очереди запрос, переставший ждать."""
+		queue = self._queues.get(user)
+		if not queue:
+			return
+		for item in queue:
+			if item[2] is waiter:
+				queue.remove(item)
+				self._waiting -= 1
+				break
+		if not queue:
+			del self._queues[user]
+	
+	def stats(self) -> Dict[str, Any]:
+		"""Получить статистику ограничителя.
+		
+		/stats доступен без авторизации, поэтому логины 1С не публикуются - только агрегаты.
+		"""
+		now = time.monotonic()
+		oldest = min((queue[0][1] for queue in self._queues.values()), default=now)
+		stats = {
+			"max_concurrent": self.max_concurrent,
+			"max_per_user": self.max_per_user,
+			"max_queue": self.max_queue,
+			"active": self._active,
+			"active_users": len(self._active_by_user),
+			"max_active_per_user": max(self._active_by_user.values(), default=0),
+			"queue_depth": self._waiting,
+			"queued_users": len(self._queues),
+			"max_queue_per_user": max((len(queue) for queue in self._queues.values()), default=0),
+			"oldest_wait": round(now - oldest, 3),
+			"projected_wait": round(self.projected_wait(), 3),
+			"service_time": round(self._service_time, 4),
+			"acquired": self._acquired,
+			"queued": self._queued,
+			"rejected": self._rejected,
+			"timeouts": self._timeouts,
+			"wait_avg": round(self._wait_total / self._waited, 3) if self._waited else 0.0,
+			"wait_max": round(self._wait_max, 3)
+		}
+		if self.adaptive:
+			stats["adaptive"] = self.adaptive.stats()
+		return stats
@@ -1,7 +1,7 @@
 """Конфигурация MCP-прокси сервера."""
 
 import os
-from typing import Optional, Literal
+from typing import Dict, Optional, Literal
 from pydantic import Field
 from pydantic_settings import BaseSettings
 
@@ -12,6 +12,7 @@ class Config(BaseSettings):
 	# Настройки сервера
 	host: str = Field(default="127.0.0.1", description="Хост для HTTP-сервера")
 	port: int = Field(default=8000, description="Порт для HTTP-сервера")
+	http_workers: int = Field(default=1, ge=1, description="Число процессов HTTP-сервера на общем порту (больше 1 - только Linux/BSD)")
 	
 	# Настройки подключения к 1С
 	onec_url: str = Field(..., description="URL базы 1С")
@@ -19,6 +20,83 @@ class Config(BaseSettings):
 	onec_password: str = Field(..., description="Пароль пользователя 1С")
 	onec_service_root: str = Field(default="mcp", description="Корневой URL HTTP-сервиса в 1С")
 	
+	# Дополнительные информационные базы (HTTP-режим): имя -> URL, эндпоинты /<имя>/mcp/ и /<имя>/sse
+	infobases: Dict[str, str] = Field(default={}, description="Дополнительные базы 1С, обслуживаемые тем же процессом (имя -> URL)")
+	
+	# Несколько публикаций одной базы 1С (распределение нагрузки)
+	onec_backends: list[str] = Field(default=[], description="URL дополнительных публикаций той же базы 1С (запросы распределяются между ними и onec_url)")
+	onec_backend_weights: Dict[str, float] = Field(default={}, description="Веса публикаций по URL, например {\"http://server2/base\": 2}")
+	onec_backend_sticky: bool = Field(default=False, description="Направлять все запросы пользователя в одну публикацию, пока она доступна")
+	onec_backend_eject_failures: int = Field(default=3, description="Число ошибок подряд, после которого публикация исключается из распределения")
+	onec_backend_eject_time: float = Field(default=30.0, description="Время исключения публикации из распределения в секундах")
+	onec_backend_eject_latency: float = Field(default=0.0, description="Сглаженная задержка публикации в секундах, выше которой она исключается (0 - не учитывать)")
+	
+	# Настройки пула клиентов 1С
+	onec_pool_max_clients: int = Field(default=100, description="Максимальное число клиентов 1С (пользователей) в пуле")
+	onec_pool_idle_ttl: int = Field(default=600, description="Время простоя клиента 1С до вытеснения из пула в секундах")
+	onec_pool_max_connections: int = Field(default=100, description="Максимальное число HTTP-соединений с 1С на процесс")
+	onec_pool_max_keepalive: Optional[int] = Field(default=None, description="Максимальное число простаивающих keep-alive соединений с 1С (по умолчанию равно onec_pool_max_connections)")
+	onec_pool_keepalive_expiry: float = Field(default=5.0, description="Время жизни простаивающего keep-alive соединения с 1С в секундах")
+	
+	# Настройки HTTP-соединения с 1С
+	onec_http2: bool = Field(default=False, description="Использовать HTTP/2 для соединений с 1С (требуется пакет h2 и поддержка веб-сервером)")
+	onec_timeout: float = Field(default=30.0, description="Таймаут запросов к 1С в секундах")
+	onec_method_timeouts: Dict[str, float] = Field(default={}, description="Таймауты отдельных методов JSON-RPC в секундах, например {\"tools/call\": 120}")
+	
+	# Настройки повторного использования сеансов 1С (IBSession)
+	onec_session_reuse: bool = Field(default=False, description="Выполнять запросы в долгоживущих сеансах 1С (IBSession)")
+	onec_session_max_age: int = Field(default=20, description="Время простоя сеанса 1С в секундах (SessionMaxAge HTTP-сервиса)")
+	onec_max_sessions: int = Field(default=10, description="Максимальное число одновременно открытых сеансов 1С")
+	
+	# Настройки пакетирования JSON-RPC запросов к 1С
+	onec_batch_window: int = Field(default=0, description="Окно сбора пакета JSON-RPC в миллисекундах (0 - без пакетирования)")
+	onec_batch_max_size: int = Field(default=20, description="Максимальное число запросов в пакете JSON-RPC")
+	
+	# Ограничение числа одновременных запросов к 1С
+	onec_max_concurrent: int = Field(default=0, description="Максимальное число одновременных запросов к 1С на процесс (0 - без ограничения)")
+	onec_max_concurrent_per_user: int = Field(default=0, description="Максимальное число одновременных запросов к 1С одного пользователя (0 - без ограничения)")
+	onec_queue_max_size: int = Field(default=100, description="Максимальное число запросов, ожидающих свободного слота")
+	onec_queue_timeout: float = Field(default=30.0, description="Максимальное время ожидания свободного слота в секундах")
+	onec_user_weights: Dict[str, float] = Field(default={}, description="Веса пользователей 1С при распределении слотов, например {\"admin\": 2}")
+	onec_adaptive_concurrency: bool = Field(default=False, description="Подстраивать общий лимит одновременных запросов по задержке и ошибкам 1С")
+	onec_adaptive_initial_limit: int = Field(default=10, description="Начальный адаптивный лимит одновременных запросов")
+	onec_adaptive_min_limit: int = Field(default=1, description="Минимальный адаптивный лимит одновременных запросов")
+	onec_adaptive_latency_tolerance: float = Field(default=2.0, description="Допустимое отношение текущей задержки 1С к базовой, после которого лимит снижается")
+	
+	# Отклонение новой работы при перегрузке 1С (требуется лимит одновременных запросов)
+	shed_queue_depth: int = Field(default=0, description="Глубина очереди запросов к 1С, при которой новая работа отклоняется с 503 (0 - не учитывать)")
+	shed_max_wait: float = Field(default=0.0, description="Ожидаемое время ожидания в очереди 1С в секундах, при котором новая работа отклоняется (0 - не учитывать)")
+	
+	# Размыкатель цепи, повторы и хеджирование запросов к 1С
+	onec_breaker_failures: int = Field(default=5, description="Число ошибок 1С подряд, после которого запросы к публикации отклоняются сразу (0 - без размыкателя)")
+	onec_breaker_recovery_time: float = Field(default=10.0, description="Время в секундах до пробного запроса к публикации после размыкания цепи")
+	onec_retry_attempts: int = Field(default=2, description="Число повторов запросов без побочных эффектов при перегрузке или недоступности 1С (0 - без повторов)")
+	onec_retry_base_delay: float = Field(default=0.1, description="Базовая пауза перед повтором в секундах (растёт экспоненциально, со случайным разбросом)")
+	onec_retry_max_delay: float = Field(default=2.0, description="Максимальная пауза перед повтором в секундах")
+	onec_hedge_requests: bool = Field(default=False, description="Отправлять повторный запрос без побочных эффектов, если первый выполняется дольше 95-го перцентиля задержки")
+	
+	# Фоновая проверка состояния 1С для /health, /ready и /live
+	health_check_interval: float = Field(default=10.0, description="Интервал фоновой проверки публикаций 1С в секундах")
+	health_check_timeout: float = Field(default=5.0, description="Максимальное время одной проверки публикации 1С в секундах")
+	health_failure_threshold: int = Field(default=2, description="Число неудачных проверок подряд, после которого публикация 1С считается недоступной")
+	health_max_loop_lag: float = Field(default=2.0, description="Задержка цикла событий в секундах, после которой /live отвечает 503")
+	
+	# Ограничение размера ответа 1С
+	onec_max_response_size: int = Field(default=50 * 1024 * 1024, description="Максимальный размер ответа 1С в байтах (0 - без ограничения)")
+	
+	# Настройки кеша каталогов (tools/list, resources/list, prompts/list)
+	catalog_cache_ttl: int = Field(default=60, description="Время доверия к кешу каталогов в секундах до проверки отпечатков в 1С (0 - без кеширования)")
+	
+	# Настройки кеша содержимого ресурсов (resources/read)
+	resource_cache_max_bytes: int = Field(default=64 * 1024 * 1024, description="Максимальный объём кеша содержимого ресурсов в байтах (0 - без кеширования)")
+	resource_cache_ttl: int = Field(default=0, description="Время в секундах, в течение которого ресурс отдаётся из кеша без ревалидации в 1С")
+	
+	# Настройки кеша результатов только читающих инструментов (tools/call)
+	tool_cache_max_entries: int = Field(default=1000, description="Максимальное число закешированных результатов инструментов (0 - без кеширования)")
+	
+	# Режим прямой передачи Streamable HTTP (/mcp/) в эндпоинт mcp HTTP-сервиса 1С без разбора JSON
+	passthrough: bool = Field(default=False, description="Передавать запросы /mcp/ в 1С без разбора (кеши и пакетирование не применяются)")
+	
 	# Настройки MCP
 	server_name: str = Field(default="1C Configuration Data Tools", description="Имя MCP-сервера")
 	server_version: str = Field(default="1.0.0", description="Версия MCP-сервера")
@@ -35,6 +113,10 @@ class Config(BaseSettings):
 	oauth2_code_ttl: int = Field(default=120, description="TTL authorization code в секундах")
 	oauth2_access_ttl: int = Field(default=3600, description="TTL access token в секундах")
 	oauth2_refresh_ttl: int = Field(default=1209600, description="TTL refresh token в секундах (14 дней)")
+	oauth2_store: Literal["memory", "sqlite"] = Field(default="memory", description="Хранилище OAuth2 токенов: memory (в памяти процесса) или sqlite (файл, общий для процессов)")
+	oauth2_store_path: str = Field(default="oauth2_tokens.db", description="Путь к файлу SQLite хранилища OAuth2 токенов")
+	oauth2_token_keys: list[str] = Field(default=[], description="Ключи самодостаточных access token (base64url, 32 байта), первый - для выпуска; пусто - токены в хранилище")
+	oauth2_token_cache_ttl: int = Field(default=60, description="Время кеширования проверенных Bearer токенов в секундах (0 - без кеширования)")
 	
 	class Config:
 		env_file = ".env"
@@ -0,0 +1,73 @@
+"""Срок выполнения MCP-запросов, передаваемый в 1С."""
+
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import anyio
+
+
+# Заголовок с оставшимся временем выполнения запроса в миллисекундах (от клиента к прокси и от прокси к 1С)
+DEADLINE_HEADER = "X-MCP-Timeout"
+
+# Срок выполнения текущего MCP-запроса (time.monotonic()) или None, если срок не задан
+current_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+	'current_deadline',
+	default=None
+)
+
+
+class DeadlineExceeded(Exception):
+	"""Истёк срок выполнения запроса к 1С."""
+
+
+def remaining() -> Optional[float]:
+	"""Оставшееся время выполнения текущего запроса в секундах (None - срок не задан)."""
+	deadline = current_deadline.get()
+	if deadline is None:
+		return None
+	return deadline - time.monotonic()
+
+
+def parse_header(value: Optional[str]) -> Optional[float]:
+	"""Время выполнения в секундах из значения заголовка X-MCP-Timeout (None - не задано или некорректно)."""
+	if not value:
+		return None
+	try:
+		timeout = float(value) / 1000
+	except ValueError:
+		return None
+	return timeout if timeout > 0 else None
+
+
+@contextmanager
+def request_deadline(timeout: Optional[float]) -> Iterator[None]:
+	"""Ограничить время выполнения запроса к 1С.
+	
+	Срок сохраняется в контексте и передаётся 1С в заголовке X-MCP-Timeout; по его истечении
+	запрос отменяется вместе с ожиданием в очереди и HTTP-запросом к 1С. Вложенный срок
+	не может быть позже внешнего.
+	
+	Args:
+		timeout: Время выполнения в секундах (None или 0 - без ограничения)
+	
+	Raises:
+		DeadlineExceeded: Срок истёк
+	"""
+	if not timeout or timeout <= 0:
+		yield
+		return
+	
+	deadline = time.monotonic() + timeout
+	outer = current_deadline.get()
+	if outer is not None:
+		deadline = min(deadline, outer)
+	token = current_deadline.set(deadline)
+	try:
+		with anyio.fail_after(max(deadline - time.monotonic(), 0)):
+			yield
+	except TimeoutError:
+		raise DeadlineExceeded(f"Истёк срок выполнения запроса ({timeout:g} с)") from None
+	finally:
+		current_deadline.reset(token)
@@ -0,0 +1,213 @@
+"""Фоновая проверка состояния публикаций 1С и отзывчивости цикла событий."""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+
+logger = logging.getLogger(__name__)
+
+# Число последних неудачных проверок, сохраняемых для диагностики
+FAILURE_HISTORY_SIZE = 20
+
+# Состояния публикации
+UNKNOWN = "unknown"
+UP = "up"
+DOWN = "down"
+
+
+class HealthProber:
+	"""Периодическая проверка публикации 1С с сохранением последнего результата.
+	
+	Эндпоинты /health и /ready отдают сохранённое состояние и не обращаются к 1С:
+	частые запросы балансировщика или оркестратора не создают нагрузки на 1С и не
+	ждут её таймаута. Публикация считается недоступной после failure_threshold
+	неудачных проверок подряд и снова доступной после первой успешной.
+	"""
+	
+	def __init__(
+		self,
+		url: str,
+		probe: Callable[[], Awaitable[Any]],
+		interval: float = 10.0,
+		timeout: float = 5.0,
+		failure_threshold: int = 2
+	):
+		"""Инициализация.
+		
+		Args:
+			url: Базовый URL публикации
+			probe: Функция проверки публикации (исключение - публикация не отвечает)
+			interval: Интервал между проверками в секундах
+			timeout: Максимальное время одной проверки в секундах
+			failure_threshold: Число неудачных проверок подряд, после которого публикация недоступна
+		"""
+		self.url = url
+		self.probe = probe
+		self.interval = interval
+		self.timeout = timeout
+		self.failure_threshold = failure_threshold
+		self.state = UNKNOWN
+		self.latency: Optional[float] = None
+		# Класс последней ошибки (текст ошибки с внутренними адресами пишется только в лог)
+		self.last_error: Optional[str] = None
+		self._last_check: Optional[float] = None
+		self._last_success: Optional[float] = None
+		self._failures = 0
+		self._history: Deque[Dict[str, Any]] = deque(maxlen=FAILURE_HISTORY_SIZE)
+		self._task: Optional[asyncio.Task] = None
+		
+		# Статистика
+		self._checks = 0
+		self._failed_checks = 0
+	
+	@property
+	def is_up(self) -> bool:
+		"""Публикация отвечала на последних проверках."""
+		return self.state == UP
+	
+	def start(self):
+		"""Запустить фоновую проверку (первая проверка выполняется сразу)."""
+		self._task = asyncio.create_task(self._probe_loop())
+		logger.debug(f"Запущена проверка состояния 1С ({self.url}, интервал: {self.interval}s)")
+	
+	async def stop(self):
+		"""Остановить фоновую проверку."""
+		if self._task:
+			self._task.cancel()
+			try:
+				await self._task
+			except asyncio.CancelledError:
+				pass
+			self._task = None
+			logger.debug(f"Проверка состояния 1С ({self.url}) остановлена")
+	
+	async def _probe_loop(self):
+		"""Периодическая проверка публикации."""
+		while True:
+			await self.check()
+			await asyncio.sleep(self.interval)
+	
+	async def check(self):
+		"""Проверить публикацию и сохранить результат."""
+		started = time.monotonic()
+		error: Optional[str] = None
+		detail: Optional[str] = None
+		try:
+			await asyncio.wait_for(self.probe(), self.timeout)
+		except asyncio.TimeoutError:
+			error = "TimeoutError"
+			detail = f"нет ответа за {self.timeout:g} с"
+		except Exception as e:
+			error = type(e).__name__
+			detail = str(e) or error
+		self._record(time.monotonic() - started, error, detail)
+	
+	def _record(self, latency: float, error: Optional[str], detail: Optional[str] = None):
+		"""Учесть результат проверки."""
+		now = time.time()
+		self._checks += 1
+		self._last_check = now
+		self.latency = latency
+		self.last_error = error
+		
+		if error is None:
+			self._failures = 0
+			self._last_success = now
+			if self.state == DOWN:
+				logger.info(f"1С ({self.url}) снова отвечает")
+			self.state = UP
+			return
+		
+		self._failures += 1
+		self._failed_checks += 1
+		self._history.append({"time": now, "latency": round(latency, 4), "error": error})
+		logger.debug(f"Проверка 1С ({self.url}) не удалась: {detail or error}")
+		if self.state != DOWN and self._failures >= self.failure_threshold:
+			logger.warning(f"1С ({self.url}) не отвечает после {self._failures} проверок подряд: {detail or error}")
+			self.state = DOWN
+	
+	def stats(self) -> Dict[str, Any]:
+		"""Получить сохранённое состояние публикации (без URL: отдаётся в /health без авторизации)."""
+		return {
+			"state": self.state,
+			"latency": round(self.latency, 4) if self.latency is not None else None,
+			"last_check": self._last_check,
+			"last_success": self._last_success,
+			"last_error": self.last_error,
+			"consecutive_failures": self._failures,
+			"checks": self._checks,
+			"failed_checks": self._failed_checks,
+			"failures": list(self._history)
+		}
+
+
+class LoopMonitor:
+	"""Измерение задержки цикла событий для проверки живости процесса.
+	
+	Фоновая задача засыпает на interval секунд и измеряет, насколько позже она
+	проснулась. Большая задержка означает, что цикл событий заблокирован синхронным
+	кодом и процесс не обслуживает запросы, независимо от состояния 1С.
+	"""
+	
+	def __init__(self, interval: float = 1.0, max_lag: float = 2.0):
+		"""Инициализация.
+		
+		Args:
+			interval: Интервал измерения в секундах
+			max_lag: Задержка цикла событий в секундах, после которой процесс считается неживым
+		"""
+		self.interval = interval
+		self.max_lag = max_lag
+		self.lag = 0.0
+		self._max_seen = 0.0
+		self._last_tick = time.monotonic()
+		self._task: Optional[asyncio.Task] = None
+	
+	def start(self):
+		"""Запустить измерение."""
+		self._last_tick = time.monotonic()
+		self._task = asyncio.create_task(self._tick_loop())
+	
+	async def stop(self):
+		"""Остановить измерение."""
+		if self._task:
+			self._task.cancel()
+			try:
+				await self._task
+			except asyncio.CancelledError:
+				pass
+			self._task = None
+	
+	async def _tick_loop(self):
+		"""Периодическое измерение задержки."""
+		while True:
+			await asyncio.sleep(self.interval)
+			now = time.monotonic()
+			self.lag = max(now - self._last_tick - self.interval, 0.0)
+			self._max_seen = max(self._max_seen, self.lag)
+			self._last_tick = now
+			if self.lag > self.max_lag:
+				logger.warning(f"Цикл событий был заблокирован на {self.lag:.2f} с")
+	
+	def current_lag(self) -> float:
+		"""Текущая задержка цикла событий (учитывает и ещё не завершившееся измерение)."""
+		if self._task is None:
+			return self.lag
+		overdue = time.monotonic() - self._last_tick - self.interval
+		return max(self.lag, overdue, 0.0)
+	
+	@property
+	def is_alive(self) -> bool:
+		"""Цикл событий отзывчив."""
+		return self.current_lag() <= self.max_lag
+	
+	def stats(self) -> Dict[str, Any]:
+		"""Получить статистику задержки цикла событий."""
+		return {
+			"lag": round(self.current_lag(), 4),
+			"max_lag": self.max_lag,
+			"max_seen": round(self._max_seen, 4)
+		}
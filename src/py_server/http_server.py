@@ -1,14 +1,16 @@
 """HTTP-сервер с поддержкой SSE и Streamable HTTP для MCP."""
 
 import asyncio
-import json
+import base64
 import logging
-from typing import Dict, Any, Optional
-from contextlib import asynccontextmanager
+from functools import partial
+from typing import Dict, Any, List, Optional, Tuple
+import re
+from contextlib import asynccontextmanager, AsyncExitStack
 from urllib.parse import urlencode, parse_qs
 
 from fastapi import FastAPI, Request, Response, HTTPException, Form
-from fastapi.responses import StreamingResponse, HTMLResponse, RedirectResponse, JSONResponse
+from fastapi.responses import StreamingResponse, HTMLResponse, RedirectResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 import httpx
@@ -18,57 +20,104 @@ from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
 from mcp.server.models import InitializationOptions
 from starlette.applications import Starlette
 from starlette.routing import Mount, Route
-from starlette.types import Scope, Receive, Send
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Scope, Receive, Send
 
 from .mcp_server import MCPProxy, current_onec_credentials
+from .passthrough import MCPPassthrough
+from .load_shedding import LoadShedder, LoadSheddingMiddleware
+from .health_prober import HealthProber, LoopMonitor, UNKNOWN
+from .json_codec import CodecJSONResponse
+from . import json_codec
 from .config import Config
-from .auth import OAuth2Service, OAuth2Store
+from . import workers
+from .workers import SessionAffinityMiddleware
+from .auth import OAuth2Service, OAuth2Store, OAuth2StoreBusy, SQLiteOAuth2Store, StatelessTokens, TokenCache
 
 
 logger = logging.getLogger(__name__)
 
+# Допустимое имя дополнительной информационной базы (используется в путях эндпоинтов)
+INFOBASE_NAME = re.compile(r"[A-Za-z0-9_-]+")
 
-class OAuth2BearerMiddleware(BaseHTTPMiddleware):
-	"""Middleware для проверки Bearer токенов в режиме OAuth2."""
+
+def store_busy_response() -> CodecJSONResponse:
+	"""Ответ 503 при временно занятом хранилище OAuth2 (клиент повторяет запрос)."""
+	return CodecJSONResponse(
+		status_code=503,
+		content={"error": "temporarily_unavailable", "error_description": "OAuth2 token store is busy, retry later"},
+		headers={"Retry-After": "1"}
+	)
+
+
+class OAuth2BearerMiddleware:
+	"""ASGI middleware для проверки Bearer токенов в режиме OAuth2.
 	
-	def __init__(self, app, oauth2_service: Optional[OAuth2Service], auth_mode: str):
-		super().__init__(app)
+	Запрос и потоковый ответ (SSE, Streamable HTTP) передаются приложению напрямую,
+	без промежуточной задачи и потока в памяти, как в BaseHTTPMiddleware.
+	"""
+	
+	def __init__(
+		self,
+		app: ASGIApp,
+		oauth2_service: Optional[OAuth2Service],
+		auth_mode: str,
+		protected_paths: Optional[List[str]] = None,
+		token_cache: Optional[TokenCache] = None
+	):
+		self.app = app
 		self.oauth2_service = oauth2_service
 		self.auth_mode = auth_mode
-		self.protected_paths = ["/mcp/", "/sse"]
+		self.protected_paths = protected_paths or ["/mcp/", "/sse"]
+		self.token_cache = token_cache
+		
+		# Защищённые пути проверяются одним регулярным выражением по префиксу
+		self._protected = re.compile("|".join(re.escape(path) for path in self.protected_paths))
 	
-	async def dispatch(self, request: Request, call_next):
+	async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
 		"""Проверка авторизации для защищённых путей."""
-		# Пропускаем, если auth_mode != oauth2
-		if self.auth_mode != "oauth2":
-			return await call_next(request)
-		
-		# Проверяем, является ли путь защищённым
-		path = request.url.path
-		is_protected = any(path.startswith(protected) for protected in self.protected_paths)
-		
-		if not is_protected:
-			return await call_next(request)
+		# Пропускаем, если auth_mode != oauth2 или путь не защищён
+		if scope["type"] != "http" or self.auth_mode != "oauth2" or not self._protected.match(scope["path"]):
+			await self.app(scope, receive, send)
+			return
 		
 		# Извлекаем Bearer token
-		auth_header = request.headers.get("Authorization", "")
-		if not auth_header.startswith("Bearer "):
-			return JSONResponse(
+		auth_header = Headers(scope=scope).get("authorization", "")
+		try:
+			creds = self._validate(auth_header[7:]) if auth_header.startswith("Bearer ") else None
+		except OAuth2StoreBusy as e:
+			logger.warning(f"Проверка токена отложена: {e}")
+			await store_busy_response()(scope, receive, send)
+			return
+		
+		if not creds:
+			response = CodecJSONResponse(
 				status_code=401,
 				content={"error": "invalid_token"},
 				headers={"WWW-Authenticate": 'Bearer error="invalid_token"'}
 			)
+			await response(scope, receive, send)
+			return
 		
-		token = auth_header[7:]  # Убираем "Bearer "
+		# Устанавливаем креденшилы в context var для этой сессии
+		current_onec_credentials.set(creds)
+		
+		# Передаём управление дальше
+		await self.app(scope, receive, send)
+	
+	def _validate(self, token: str) -> Optional[Tuple[str, str]]:
+		"""Получить креденшилы 1С по токену (поддерживаем два формата)."""
+		if self.token_cache:
+			creds = self.token_cache.get(token)
+			if creds:
+				return creds
 		
-		# Валидируем токен (поддерживаем два формата)
 		creds = None
+		expires_in: Optional[float] = None
 		
 		# 1. Простой формат: simple_base64(username:password)
 		if token.startswith("simple_"):
 			try:
-				import base64
 				creds_string = base64.b64decode(token[7:]).decode()
 				username, password = creds_string.split(":", 1)
 				creds = (username, password)
@@ -80,103 +129,71 @@ class OAuth2BearerMiddleware(BaseHTTPMiddleware):
 		# 2. OAuth2 формат: через хранилище
 		if not creds:
 			creds = self.oauth2_service.validate_access_token(token)
+			if creds:
+				expires_in = self.oauth2_service.access_token_expires_in(token)
 		
-		if not creds:
-			return JSONResponse(
-				status_code=401,
-				content={"error": "invalid_token"},
-				headers={"WWW-Authenticate": 'Bearer error="invalid_token"'}
-			)
-		
-		# Устанавливаем креденшилы в context var для этой сессии
-		login, password = creds
-		current_onec_credentials.set((login, password))
-		
-		# Передаём управление дальше
-		response = await call_next(request)
-		return response
-
+		if creds and self.token_cache:
+			self.token_cache.put(token, creds, expires_in)
+		return creds
 
-class MCPHttpServer:
-	"""HTTP-сервер для MCP с поддержкой SSE и Streamable HTTP."""
+class InfobaseEndpoints:
+	"""MCP-эндпоинты одной информационной базы: прокси, пул клиентов 1С и транспорты."""
 	
-	def __init__(self, config: Config):
-		"""Инициализация HTTP-сервера.
+	def __init__(self, config: Config, prefix: str = ""):
+		"""Инициализация.
 		
 		Args:
-			config: Конфигурация сервера
+			config: Конфигурация базы
+			prefix: Префикс путей эндпоинтов ("" - основная база на /mcp/ и /sse)
 		"""
 		self.config = config
+		self.prefix = prefix
 		self.mcp_proxy = MCPProxy(config)
 		
 		# Создаем session manager для Streamable HTTP после создания MCP прокси
 		self.streamable_session_manager = StreamableHTTPSessionManager(self.mcp_proxy.server)
 		
-		# Инициализация OAuth2 (если включено)
-		self.oauth2_store: Optional[OAuth2Store] = None
-		self.oauth2_service: Optional[OAuth2Service] = None
-		if config.auth_mode == "oauth2":
-			self.oauth2_store = OAuth2Store()
-			self.oauth2_service = OAuth2Service(
-				self.oauth2_store,
-				code_ttl=config.oauth2_code_ttl,
-				access_ttl=config.oauth2_access_ttl,
-				refresh_ttl=config.oauth2_refresh_ttl
+		# Режим прямой передачи: /mcp/ передаётся в эндпоинт mcp HTTP-сервиса 1С без разбора
+		self.passthrough: Optional[MCPPassthrough] = None
+		if config.passthrough:
+			self.passthrough = MCPPassthrough(
+				url=f"{config.onec_url.rstrip('/')}/hs/{config.onec_service_root.strip('/')}/mcp",
+				http_client=self.mcp_proxy.client_pool.http_client,
+				get_credentials=self.mcp_proxy.session_credentials
 			)
-			logger.info("OAuth2 авторизация включена")
-		
-		self.app = FastAPI(
-			title="1C MCP Proxy",
-			description="MCP-прокси для взаимодействия с 1С",
-			version=config.server_version,
-			lifespan=self._lifespan
-		)
-		
-		# Настройка CORS
-		self.app.add_middleware(
-			CORSMiddleware,
-			allow_origins=config.cors_origins,
-			allow_credentials=True,
-			allow_methods=["*"],
-			allow_headers=["*"],
-		)
-		
-		# Добавляем OAuth2 middleware
-		self.app.add_middleware(
-			OAuth2BearerMiddleware,
-			oauth2_service=self.oauth2_service,
-			auth_mode=config.auth_mode
-		)
-		
-		# Монтируем транспорты
-		self._mount_transports()
-		
-		# Регистрация основных маршрутов
-		self._register_routes()
-	
-	@asynccontextmanager
-	async def _lifespan(self, app: FastAPI):
-		"""Управление жизненным циклом приложения."""
-		logger.debug("Запуск HTTP-сервера MCP")
-		
-		# Запускаем задачу очистки OAuth2 токенов (если включено)
-		if self.oauth2_store:
-			await self.oauth2_store.start_cleanup_task(interval=60)
-		
-		# Запускаем session manager для Streamable HTTP
-		async with self.streamable_session_manager.run():
-			yield
-		
-		# Останавливаем задачу очистки OAuth2
-		if self.oauth2_store:
-			await self.oauth2_store.stop_cleanup_task()
+			logger.info("Включён режим прямой передачи Streamable HTTP в 1С")
+		
+		# Отклонение новой работы при перегрузке 1С (по очереди ограничителя запросов)
+		self.load_shedder: Optional[LoadShedder] = None
+		limiter = self.mcp_proxy.client_pool.limiter
+		if limiter and (config.shed_queue_depth > 0 or config.shed_max_wait > 0):
+			self.load_shedder = LoadShedder(
+				limiter,
+				max_queue_depth=config.shed_queue_depth,
+				max_wait=config.shed_max_wait
+			)
+		elif config.shed_queue_depth > 0 or config.shed_max_wait > 0:
+			logger.warning("Отклонение работы при перегрузке 1С не включено: не задан лимит одновременных запросов")
+		
+		# Фоновая проверка состояния каждой публикации базы (для /health и /ready)
+		pool = self.mcp_proxy.client_pool
+		self.probers = [
+			HealthProber(
+				url,
+				partial(pool.check_health, url),
+				interval=config.health_check_interval,
+				timeout=config.health_check_timeout,
+				failure_threshold=config.health_failure_threshold
+			)
+			for url in pool.backend_urls()
+		]
 		
-		logger.debug("Остановка HTTP-сервера MCP")
 	
 	def _create_sse_starlette_app(self) -> Starlette:
 		"""Создание Starlette приложения для обработки SSE."""
 		# Создаем SSE транспорт для обработки сообщений
-		sse_transport = SseServerTransport("/messages/")
+		# (в многопроцессном режиме путь сообщений содержит номер воркера, владеющего потоком)
+		sse_transport = SseServerTransport(workers.messages_path(workers.current_worker()))
 		
 		async def handle_sse(request):
 			"""Обработчик SSE подключений."""
@@ -230,16 +247,215 @@ class MCPHttpServer:
 		
 		return asgi
 	
-	def _mount_transports(self):
-		"""Монтирование транспортов MCP."""
+	def mount(self, app: FastAPI):
+		"""Монтирование транспортов MCP базы.
+		
+		Args:
+			app: Приложение HTTP-сервера
+		"""
 		
-		# Монтируем SSE транспорт на /sse
+		# Монтируем SSE транспорт на <префикс>/sse
 		sse_app = self._create_sse_starlette_app()
-		self.app.mount("/sse", sse_app)
+		app.mount(f"{self.prefix}/sse", sse_app)
+		
+		# Монтируем Streamable HTTP транспорт на <префикс>/mcp/ (с trailing slash для устранения 307 редиректов)
+		if self.passthrough:
+			app.mount(f"{self.prefix}/mcp/", self.passthrough)
+		else:
+			streamable_app = self._create_streamable_http_asgi()
+			app.mount(f"{self.prefix}/mcp/", streamable_app)
+	
+	@property
+	def is_ready(self) -> bool:
+		"""База готова принимать запросы: хотя бы одна публикация отвечает."""
+		return any(prober.is_up for prober in self.probers)
+	
+	def health(self) -> Dict[str, Any]:
+		"""Сохранённое фоновой проверкой состояние базы (без обращения к 1С)."""
+		if self.is_ready:
+			result = {"status": "healthy", "onec_connection": "ok"}
+		elif all(prober.state == UNKNOWN for prober in self.probers):
+			result = {"status": "starting", "onec_connection": "not_initialized"}
+		else:
+			result = {
+				"status": "unhealthy",
+				"onec_connection": "error",
+				"error_details": next(prober.last_error for prober in self.probers if prober.last_error)
+			}
+		# Публикации обозначаются номером в списке (основная - 0), внутренние URL 1С не раскрываются
+		result["publications"] = [dict(prober.stats(), index=index) for index, prober in enumerate(self.probers)]
+		return result
+	
+	def stats(self) -> Dict[str, Any]:
+		"""Статистика базы: пул клиентов 1С, прямая передача и отклонение работы."""
+		result = {
+			"pool": self.mcp_proxy.client_pool.stats()
+		}
+		if self.passthrough:
+			result["passthrough"] = self.passthrough.stats()
+		if self.load_shedder:
+			result["load_shedding"] = self.load_shedder.stats()
+		return result
+
+
+class MCPHttpServer:
+	"""HTTP-сервер для MCP с поддержкой SSE и Streamable HTTP."""
+	
+	def __init__(self, config: Config):
+		"""Инициализация HTTP-сервера.
+		
+		Args:
+			config: Конфигурация сервера
+		"""
+		self.config = config
+		
+		# Основная база обслуживается на /mcp/ и /sse, дополнительные - на /<имя>/mcp/ и /<имя>/sse.
+		# У каждой базы свои пул соединений и кеши, цикл событий общий.
+		self.infobases: Dict[str, InfobaseEndpoints] = {"": InfobaseEndpoints(config)}
+		for name, url in config.infobases.items():
+			if not INFOBASE_NAME.fullmatch(name):
+				raise ValueError(f"Недопустимое имя информационной базы '{name}': допустимы латинские буквы, цифры, '_' и '-'")
+			self.infobases[name] = InfobaseEndpoints(
+				config.model_copy(update={
+					"onec_url": url,
+					"onec_backends": [],
+					"server_name": f"{config.server_name} ({name})"
+				}),
+				prefix=f"/{name}"
+			)
+			logger.info(f"Информационная база '{name}' ({url}) доступна на /{name}/mcp/ и /{name}/sse")
+		self.mcp_proxy = self.infobases[""].mcp_proxy
+		
+		# Живость процесса определяется только отзывчивостью цикла событий
+		self.loop_monitor = LoopMonitor(max_lag=config.health_max_loop_lag)
+		
+		# Инициализация OAuth2 (если включено)
+		self.oauth2_store: Optional[OAuth2Store] = None
+		self.oauth2_service: Optional[OAuth2Service] = None
+		self.token_cache: Optional[TokenCache] = None
+		if config.auth_mode == "oauth2":
+			# Самодостаточные access token проверяются любой репликой без общего хранилища
+			stateless: Optional[StatelessTokens] = None
+			if config.oauth2_token_keys:
+				if StatelessTokens.available():
+					stateless = StatelessTokens(config.oauth2_token_keys)
+					logger.info(f"Самодостаточные access token включены (ключей: {len(config.oauth2_token_keys)})")
+				else:
+					logger.warning("Самодостаточные access token недоступны: пакет cryptography не установлен (pip install cryptography), токены хранятся в хранилище")
+			
+			if config.oauth2_store == "sqlite":
+				# Креденшилы 1С в файле шифруются теми же ключами, что и самодостаточные токены
+				self.oauth2_store = SQLiteOAuth2Store(config.oauth2_store_path, cipher=stateless)
+			else:
+				self.oauth2_store = OAuth2Store()
+			
+			self.oauth2_service = OAuth2Service(
+				self.oauth2_store,
+				code_ttl=config.oauth2_code_ttl,
+				access_ttl=config.oauth2_access_ttl,
+				refresh_ttl=config.oauth2_refresh_ttl,
+				stateless=stateless
+			)
+			if config.oauth2_token_cache_ttl > 0:
+				self.token_cache = TokenCache(ttl=config.oauth2_token_cache_ttl)
+			logger.info("OAuth2 авторизация включена")
+		
+		self.app = FastAPI(
+			title="1C MCP Proxy",
+			description="MCP-прокси для взаимодействия с 1С",
+			version=config.server_version,
+			lifespan=self._lifespan,
+			default_response_class=CodecJSONResponse
+		)
+		
+		# Хранилище OAuth2, занятое другим воркером, не блокирует цикл событий: клиент повторяет запрос
+		async def handle_store_busy(request: Request, exc: OAuth2StoreBusy):
+			logger.warning(f"Запрос OAuth2 отклонён: {exc}")
+			return store_busy_response()
+		self.app.add_exception_handler(OAuth2StoreBusy, handle_store_busy)
+		
+		# Настройка CORS
+		self.app.add_middleware(
+			CORSMiddleware,
+			allow_origins=config.cors_origins,
+			allow_credentials=True,
+			allow_methods=["*"],
+			allow_headers=["*"],
+		)
+		
+		# Добавляем OAuth2 middleware
+		self.app.add_middleware(
+			OAuth2BearerMiddleware,
+			oauth2_service=self.oauth2_service,
+			auth_mode=config.auth_mode,
+			protected_paths=[
+				path for infobase in self.infobases.values()
+				for path in (f"{infobase.prefix}/mcp/", f"{infobase.prefix}/sse")
+			],
+			token_cache=self.token_cache
+		)
+		
+		# Отклонение новой работы выполняется до авторизации и разбора запроса
+		shedders = {infobase.prefix: infobase.load_shedder for infobase in self.infobases.values()}
+		if any(shedders.values()):
+			self.app.add_middleware(
+				LoadSheddingMiddleware,
+				shedders=shedders,
+				passthrough=[infobase.prefix for infobase in self.infobases.values() if infobase.passthrough]
+			)
+		
+		# Монтируем транспорты всех баз
+		for infobase in self.infobases.values():
+			infobase.mount(self.app)
+		
+		# Регистрация основных маршрутов
+		self._register_routes()
+		
+		# В многопроцессном режиме запросы сессий других воркеров пересылаются им (внешний слой)
+		self.affinity: Optional[SessionAffinityMiddleware] = None
+		worker = workers.current_worker()
+		if worker is not None:
+			self.affinity = SessionAffinityMiddleware(self.app, worker, config.http_workers, workers.sockets_dir())
+	
+	@asynccontextmanager
+	async def _lifespan(self, app: FastAPI):
+		"""Управление жизненным циклом приложения."""
+		logger.debug("Запуск HTTP-сервера MCP")
+		
+		# Запускаем задачу очистки OAuth2 токенов (если включено)
+		if self.oauth2_store:
+			await self.oauth2_store.start_cleanup_task(interval=60)
+		
+		# Запускаем фоновую проверку состояния 1С и отзывчивости цикла событий
+		self.loop_monitor.start()
+		for infobase in self.infobases.values():
+			for prober in infobase.probers:
+				prober.start()
+		
+		# Запускаем session manager для Streamable HTTP каждой базы
+		async with AsyncExitStack() as stack:
+			for infobase in self.infobases.values():
+				await stack.enter_async_context(infobase.streamable_session_manager.run())
+			yield
 		
-		# Монтируем Streamable HTTP транспорт на /mcp/ (с trailing slash для устранения 307 редиректов)
-		streamable_app = self._create_streamable_http_asgi()
-		self.app.mount("/mcp/", streamable_app)
+		# Останавливаем фоновые проверки
+		for infobase in self.infobases.values():
+			for prober in infobase.probers:
+				await prober.stop()
+		await self.loop_monitor.stop()
+		
+		# Останавливаем задачу очистки OAuth2
+		if self.oauth2_store:
+			await self.oauth2_store.stop_cleanup_task()
+			self.oauth2_store.close()
+		
+		# Закрываем пулы клиентов 1С
+		for infobase in self.infobases.values():
+			await infobase.mcp_proxy.close()
+		if self.affinity:
+			await self.affinity.close()
+		
+		logger.debug("Остановка HTTP-сервера MCP")
 	
 	def _register_routes(self):
 		"""Регистрация основных маршрутов."""
@@ -250,9 +466,14 @@ class MCPHttpServer:
 			endpoints = {
 					"info": "/info",
 					"health": "/health",
+					"ready": "/ready",
+					"live": "/live",
+					"stats": "/stats",
 					"sse": "/sse",
 					"streamable_http": "/mcp/"
 				}
+			if self.config.infobases:
+				endpoints["infobases"] = self._infobase_endpoints()
 			if self.config.auth_mode == "oauth2":
 				endpoints["oauth2"] = {
 					"well_known_prm": "/.well-known/oauth-protected-resource",
@@ -278,6 +499,9 @@ class MCPHttpServer:
 					"messages": "/sse/messages/",
 					"streamable_http": "/mcp/",
 					"health": "/health",
+					"ready": "/ready",
+					"live": "/live",
+					"stats": "/stats",
 					"info": "/info"
 				},
 				"transports": {
@@ -288,36 +512,68 @@ class MCPHttpServer:
 					"streamable_http": {
 						"endpoint": "/mcp/"
 					}
-				}
+				},
+				"infobases": self._infobase_endpoints()
 			}
 		
 		@self.app.get("/health")
 		async def health():
-			"""Проверка здоровья сервера."""
-			try:
-				# Проверяем подключение к 1С через прокси
-				if hasattr(self.mcp_proxy, 'onec_client') and self.mcp_proxy.onec_client:
-					await self.mcp_proxy.onec_client.check_health()
-					result = {"status": "healthy", "onec_connection": "ok"}
-				else:
-					result = {"status": "starting", "onec_connection": "not_initialized"}
-				
-				# Добавляем информацию об авторизации
-				result["auth"] = {"mode": self.config.auth_mode}
-				return result
-			except Exception as e:
-				logger.error(f"Ошибка проверки здоровья: {e}")
-				return {
-					"status": "unhealthy",
-					"onec_connection": "error",
-					"error_details": str(e),
-					"auth": {"mode": self.config.auth_mode}
-				}
+			"""Проверка здоровья сервера (по результатам фоновой проверки 1С)."""
+			result = self.infobases[""].health()
+			
+			# Добавляем информацию об авторизации
+			result["auth"] = {"mode": self.config.auth_mode}
+			result["event_loop"] = self.loop_monitor.stats()
+			if len(self.infobases) > 1:
+				result["infobases"] = {name: infobase.health() for name, infobase in self.infobases.items() if name}
+			return result
+		
+		@self.app.get("/ready")
+		async def ready():
+			"""Готовность принимать запросы: 1С всех баз отвечала на последних проверках."""
+			infobases = {name or "default": infobase.is_ready for name, infobase in self.infobases.items()}
+			is_ready = all(infobases.values())
+			return CodecJSONResponse(
+				status_code=200 if is_ready else 503,
+				content={"ready": is_ready, "infobases": infobases}
+			)
+		
+		@self.app.get("/live")
+		async def live():
+			"""Живость процесса: цикл событий отзывчив (состояние 1С не учитывается)."""
+			is_alive = self.loop_monitor.is_alive
+			return CodecJSONResponse(
+				status_code=200 if is_alive else 503,
+				content={"alive": is_alive, "event_loop": self.loop_monitor.stats()}
+			)
+		
+		@self.app.get("/stats")
+		async def stats():
+			"""Статистика пула клиентов 1С."""
+			result = self.infobases[""].stats()
+			result["json_codec"] = json_codec.BACKEND
+			if self.token_cache:
+				result["token_cache"] = self.token_cache.stats()
+			if self.affinity:
+				result["workers"] = self.affinity.stats()
+			if len(self.infobases) > 1:
+				result["infobases"] = {name: infobase.stats() for name, infobase in self.infobases.items() if name}
+			return result
 		
 		# OAuth2 endpoints (если включено)
 		if self.config.auth_mode == "oauth2":
 			self._register_oauth2_routes()
 	
+	def _infobase_endpoints(self) -> Dict[str, Dict[str, str]]:
+		"""Эндпоинты дополнительных информационных баз (внутренние URL публикаций 1С не раскрываются)."""
+		return {
+			name: {
+				"sse": f"{infobase.prefix}/sse",
+				"streamable_http": f"{infobase.prefix}/mcp/"
+			}
+			for name, infobase in self.infobases.items() if name
+		}
+	
 	def _register_oauth2_routes(self):
 		"""Регистрация OAuth2 маршрутов."""
 		
@@ -372,7 +628,7 @@ class MCPHttpServer:
 			"""
 			# Читаем тело запроса (но не используем, т.к. всё равно вернём фиксированные данные)
 			try:
-				body = await request.json()
+				body = json_codec.loads(await request.body())
 				logger.debug(f"Client registration request: {body}")
 			except:
 				body = {}
@@ -571,7 +827,7 @@ class MCPHttpServer:
 			# Password Grant - самый простой вариант
 			if grant_type == "password":
 				if not username or not password:
-					return JSONResponse(
+					return CodecJSONResponse(
 						status_code=400,
 						content={"error": "invalid_request", "error_description": "Missing username or password"}
 					)
@@ -586,13 +842,13 @@ class MCPHttpServer:
 						)
 						
 						if response.status_code != 200:
-							return JSONResponse(
+							return CodecJSONResponse(
 								status_code=400,
 								content={"error": "invalid_grant", "error_description": "Invalid username or password"}
 							)
 				except Exception as e:
 					logger.error(f"Ошибка проверки креденшилов 1С для password grant: {e}")
-					return JSONResponse(
+					return CodecJSONResponse(
 						status_code=503,
 						content={"error": "server_error", "error_description": "Unable to validate credentials"}
 					)
@@ -615,14 +871,14 @@ class MCPHttpServer:
 			if grant_type == "authorization_code":
 				# Обмен code на токены
 				if not all([code, redirect_uri, code_verifier]):
-					return JSONResponse(
+					return CodecJSONResponse(
 						status_code=400,
 						content={"error": "invalid_request", "error_description": "Missing required parameters"}
 					)
 				
 				result = self.oauth2_service.exchange_code_for_tokens(code, redirect_uri, code_verifier)
 				if not result:
-					return JSONResponse(
+					return CodecJSONResponse(
 						status_code=400,
 						content={"error": "invalid_grant", "error_description": "Invalid or expired authorization code"}
 					)
@@ -639,14 +895,14 @@ class MCPHttpServer:
 			elif grant_type == "refresh_token":
 				# Обновление токенов
 				if not refresh_token:
-					return JSONResponse(
+					return CodecJSONResponse(
 						status_code=400,
 						content={"error": "invalid_request", "error_description": "Missing refresh_token"}
 					)
 				
 				result = self.oauth2_service.refresh_tokens(refresh_token)
 				if not result:
-					return JSONResponse(
+					return CodecJSONResponse(
 						status_code=400,
 						content={"error": "invalid_grant", "error_description": "Invalid or expired refresh token"}
 					)
@@ -661,7 +917,7 @@ class MCPHttpServer:
 				}
 			
 			else:
-				return JSONResponse(
+				return CodecJSONResponse(
 					status_code=400,
 					content={"error": "unsupported_grant_type", "error_description": f"Grant type '{grant_type}' not supported"}
 				)
@@ -669,7 +925,7 @@ class MCPHttpServer:
 	async def start(self):
 		"""Запуск HTTP-сервера."""
 		config = uvicorn.Config(
-			app=self.app,
+			app=self.affinity or self.app,
 			host=self.config.host,
 			port=self.config.port,
 			log_level=self.config.log_level.lower(),
@@ -678,7 +934,16 @@ class MCPHttpServer:
 		
 		server = uvicorn.Server(config)
 		logger.debug(f"Запуск HTTP-сервера на {self.config.host}:{self.config.port}")
-		await server.serve()
+		if self.affinity:
+			# Воркер: общий порт с другими воркерами и собственный сокет для пересылаемых запросов
+			await server.serve(sockets=workers.listen_sockets(
+				self.config.host,
+				self.config.port,
+				workers.sockets_dir(),
+				self.affinity.worker
+			))
+		else:
+			await server.serve()
 
 
 async def run_http_server(config: Config):
@@ -687,5 +952,13 @@ async def run_http_server(config: Config):
 	Args:
 		config: Конфигурация сервера
 	"""
+	if config.http_workers > 1 and workers.current_worker() is None:
+		if workers.supported():
+			if config.auth_mode == "oauth2" and config.oauth2_store == "memory":
+				logger.warning("OAuth2 токены хранятся в памяти процесса и не видны другим воркерам: задайте MCP_OAUTH2_STORE=sqlite")
+			await workers.run_workers(config)
+			return
+		logger.warning("Многопроцессный режим недоступен на этой платформе (нет SO_REUSEPORT), сервер запускается в одном процессе")
+	
 	server = MCPHttpServer(config)
 	await server.start() 
\ No newline at end of file
@@ -0,0 +1,60 @@
+"""Кодек JSON для горячих путей прокси.
+
+Использует orjson, если он установлен, иначе стандартный модуль json. Кодирование
+сразу выдаёт UTF-8 байты, декодирование принимает байты без промежуточной строки.
+"""
+
+import json
+from typing import Any, Union
+
+from starlette.responses import JSONResponse
+
+try:
+	import orjson
+except ImportError:  # pragma: no cover - зависит от окружения
+	orjson = None
+
+
+# Имя используемой библиотеки (для статистики и логов)
+BACKEND = "orjson" if orjson else "json"
+
+# Ошибка разбора JSON (orjson.JSONDecodeError - подкласс json.JSONDecodeError)
+JSONDecodeError = json.JSONDecodeError
+
+
+def dumps(obj: Any, sort_keys: bool = False) -> bytes:
+	"""Сериализовать объект в JSON (UTF-8 байты).
+	
+	Args:
+		obj: Объект для сериализации
+		sort_keys: Упорядочить ключи словарей (для канонического представления)
+	
+	Returns:
+		JSON в кодировке UTF-8
+	"""
+	if orjson:
+		return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+	return json.dumps(obj, ensure_ascii=False, sort_keys=sort_keys, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+	"""Разобрать JSON из байтов или строки.
+	
+	Args:
+		data: JSON-документ
+	
+	Returns:
+		Разобранный объект
+	"""
+	if orjson:
+		return orjson.loads(data)
+	if isinstance(data, memoryview):
+		data = data.tobytes()
+	return json.loads(data)
+
+
+class CodecJSONResponse(JSONResponse):
+	"""JSON-ответ FastAPI/Starlette, сериализуемый через кодек."""
+	
+	def render(self, content: Any) -> bytes:
+		return dumps(content)
@@ -0,0 +1,211 @@
+"""Отклонение новой работы при перегрузке 1С (load shedding)."""
+
+import logging
+import math
+from typing import Any, Collection, Dict, List, Optional
+
+from starlette.types import ASGIApp, Message, Scope, Receive, Send
+
+from .concurrency_limiter import ConcurrencyLimiter, SERVER_BUSY
+from . import json_codec
+
+
+logger = logging.getLogger(__name__)
+
+# Методы MCP, которые обращаются к 1С и отклоняются при перегрузке
+SHED_METHODS = frozenset({
+	"tools/list",
+	"tools/call",
+	"resources/list",
+	"resources/read",
+	"prompts/list",
+	"prompts/get"
+})
+
+# Границы значения Retry-After в секундах
+MIN_RETRY_AFTER = 1
+MAX_RETRY_AFTER = 60
+
+
+class LoadShedder:
+	"""Решение о приёме новой работы по очереди запросов к 1С.
+	
+	Новая работа не принимается, если глубина очереди ограничителя или ожидаемое время
+	ожидания в ней достигли порога. Retry-After оценивается по ожидаемому времени ожидания.
+	"""
+	
+	def __init__(self, limiter: ConcurrencyLimiter, max_queue_depth: int = 0, max_wait: float = 0.0):
+		"""Инициализация.
+		
+		Args:
+			limiter: Ограничитель одновременных запросов к 1С
+			max_queue_depth: Глубина очереди, при которой новая работа отклоняется (0 - не учитывать)
+			max_wait: Ожидаемое время ожидания в секундах, при котором новая работа отклоняется (0 - не учитывать)
+		"""
+		self.limiter = limiter
+		self.max_queue_depth = max_queue_depth
+		self.max_wait = max_wait
+		
+		# Статистика
+		self._rejected_sessions = 0
+		self._rejected_requests = 0
+	
+	def retry_after(self) -> Optional[int]:
+		"""Проверить, принимается ли новая работа.
+		
+		Returns:
+			None, если работа принимается, иначе рекомендуемая пауза перед повтором в секундах
+		"""
+		wait = self.limiter.projected_wait()
+		if (self.max_queue_depth and self.limiter.queue_depth >= self.max_queue_depth) or (self.max_wait and wait >= self.max_wait):
+			return max(MIN_RETRY_AFTER, min(math.ceil(wait), MAX_RETRY_AFTER))
+		return None
+	
+	def reject_session(self):
+		"""Учесть отклонённую новую сессию."""
+		self._rejected_sessions += 1
+	
+	def reject_requests(self, count: int):
+		"""Учесть отклонённые запросы существующей сессии."""
+		self._rejected_requests += count
+	
+	def stats(self) -> Dict[str, Any]:
+		"""Получить статистику отклонений."""
+		return {
+			"max_queue_depth": self.max_queue_depth,
+			"max_wait": self.max_wait,
+			"shedding": self.retry_after() is not None,
+			"rejected_sessions": self._rejected_sessions,
+			"rejected_requests": self._rejected_requests
+		}
+
+
+class LoadSheddingMiddleware:
+	"""ASGI middleware, отклоняющее новую MCP-работу при перегрузке 1С.
+	
+	Каждая информационная база проверяется своим LoadShedder по префиксу путей.
+	Новые SSE-подключения и запросы Streamable HTTP без Mcp-Session-Id получают 503
+	с заголовком Retry-After. Запросы существующих сессий Streamable HTTP к методам,
+	обращающимся к 1С, получают JSON-RPC ошибку. Уведомления, ответы клиента и прочие
+	эндпоинты (health, info, stats, OAuth2) пропускаются без проверки.
+	Запросы /mcp/ баз в режиме прямой передачи тоже не проверяются: они не проходят
+	через ограничитель и не влияют на очередь, по которой оценивается перегрузка.
+	Запрос относится к базе с самым длинным подходящим префиксом, путь сравнивается
+	по целым сегментам (база с именем mcp не попадает под /mcp основной базы).
+	"""
+	
+	def __init__(self, app: ASGIApp, shedders: Dict[str, Optional[LoadShedder]], passthrough: Collection[str] = ()):
+		"""Инициализация.
+		
+		Args:
+			app: Следующее ASGI-приложение
+			shedders: Решения о приёме новой работы по префиксам путей всех баз
+				("" - основная база, None - база без отклонения работы)
+			passthrough: Префиксы баз, /mcp/ которых работает в режиме прямой передачи
+		"""
+		self.app = app
+		self.shedders = sorted(shedders.items(), key=lambda item: len(item[0]), reverse=True)
+		self.passthrough = frozenset(passthrough)
+	
+	async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+		"""Обработать запрос."""
+		if scope["type"] != "http":
+			await self.app(scope, receive, send)
+			return
+		
+		path = scope["path"]
+		method = scope["method"]
+		for prefix, shedder in self.shedders:
+			new_sse = method == "GET" and path.rstrip("/") == f"{prefix}/sse"
+			mcp_post = method == "POST" and (path == f"{prefix}/mcp" or path.startswith(f"{prefix}/mcp/"))
+			if new_sse or mcp_post:
+				if shedder is None or (mcp_post and prefix in self.passthrough):
+					break
+				await self._admit(shedder, new_sse, scope, receive, send)
+				return
+		await self.app(scope, receive, send)
+	
+	async def _admit(self, shedder: LoadShedder, new_sse: bool, scope: Scope, receive: Receive, send: Send) -> None:
+		"""Принять MCP-запрос базы или отклонить его при перегрузке её 1С."""
+		retry_after = shedder.retry_after()
+		if retry_after is None:
+			await self.app(scope, receive, send)
+			return
+		
+		if new_sse or not any(name == b"mcp-session-id" for name, _ in scope["headers"]):
+			# Новая сессия
+			shedder.reject_session()
+			logger.warning(f"1С перегружена, новая сессия отклонена (Retry-After: {retry_after})")
+			await self._respond(send, 503, b"", retry_after)
+			return
+		
+		body = await self._read_body(receive)
+		errors = self._busy_errors(body, retry_after)
+		if errors is None:
+			await self.app(scope, self._replay(body, receive), send)
+			return
+		
+		shedder.reject_requests(len(errors))
+		logger.warning(f"1С перегружена, отклонено запросов сессии: {len(errors)} (Retry-After: {retry_after})")
+		payload = errors[0] if len(errors) == 1 and not body.lstrip().startswith(b"[") else errors
+		await self._respond(send, 200, json_codec.dumps(payload), retry_after, b"application/json")
+	
+	@staticmethod
+	def _busy_errors(body: bytes, retry_after: int) -> Optional[List[Dict[str, Any]]]:
+		"""Сформировать JSON-RPC ошибки, если все сообщения - запросы к методам, обращающимся к 1С."""
+		try:
+			messages = json_codec.loads(body)
+		except json_codec.JSONDecodeError:
+			return None
+		if not isinstance(messages, list):
+			messages = [messages]
+		if not messages or not all(
+			isinstance(message, dict) and "id" in message and message.get("method") in SHED_METHODS
+			for message in messages
+		):
+			return None
+		return [
+			{
+				"jsonrpc": "2.0",
+				"id": message["id"],
+				"error": {
+					"code": SERVER_BUSY,
+					"message": "1С перегружена, повторите запрос позже",
+					"data": {"retryAfter": retry_after}
+				}
+			}
+			for message in messages
+		]
+	
+	@staticmethod
+	async def _read_body(receive: Receive) -> bytes:
+		"""Прочитать тело запроса целиком."""
+		body = bytearray()
+		while True:
+			message = await receive()
+			body += message.get("body", b"")
+			if not message.get("more_body", False):
+				return bytes(body)
+	
+	@staticmethod
+	def _replay(body: bytes, receive: Receive) -> Receive:
+		"""Источник сообщений, повторно отдающий уже прочитанное тело запроса."""
+		replayed = False
+		
+		async def replay() -> Message:
+			nonlocal replayed
+			if not replayed:
+				replayed = True
+				return {"type": "http.request", "body": body, "more_body": False}
+			return await receive()
+		
+		return replay
+	
+	@staticmethod
+	async def _respond(send: Send, status: int, body: bytes, retry_after: int, content_type: Optional[bytes] = None):
+		"""Отправить ответ целиком с заголовком Retry-After."""
+		headers = [(b"retry-after", str(retry_after).encode("latin-1"))]
+		if content_type:
+			headers.append((b"content-type", content_type))
+		await send({"type": "http.response.start", "status": status, "headers": headers})
+		await send({"type": "http.response.body", "body": body})
@@ -11,8 +11,6 @@ from pathlib import Path
 from dotenv import load_dotenv
 
 from .config import get_config
-from .http_server import run_http_server
-from .stdio_server import run_stdio_server
 
 
 def setup_logging(level: str = "INFO"):
@@ -139,7 +137,6 @@ async def main():
 	# Принудительная настройка кодировки UTF-8 для Windows
 	if sys.platform == "win32":
 		import locale
-		import os
 		
 		# Устанавливаем кодировку для Python I/O
 		os.environ['PYTHONIOENCODING'] = 'utf-8'
@@ -220,9 +217,12 @@ async def main():
 	logger.debug(f"Пользователь: {config.onec_username}")
 	
 	try:
+		# Импортируем только нужный режим: stdio запускается заново при каждом старте клиента
 		if args.mode == "stdio":
+			from .stdio_server import run_stdio_server
 			await run_stdio_server(config)
 		elif args.mode == "http":
+			from .http_server import run_http_server
 			logger.debug(f"HTTP-сервер будет запущен на {config.host}:{config.port}")
 			await run_http_server(config)
 		else:
@@ -1,17 +1,24 @@
 """Основной MCP-сервер, который проксирует запросы в 1С."""
 
 import asyncio
+import functools
 import logging
 import contextvars
+import weakref
 from contextlib import asynccontextmanager
 from typing import Any, Dict, List, Optional, AsyncIterator, Tuple
 
 from mcp.server import Server
 from mcp.server.models import InitializationOptions
 from mcp.server.lowlevel import NotificationOptions
+from mcp.server.session import ServerSession
+from mcp.shared.exceptions import McpError
 from mcp import types
 
-from .onec_client import OneCClient
+from .onec_client import OneCClient, is_overload_error
+from .onec_pool import OneCClientPool
+from .concurrency_limiter import OneCOverloaded, SERVER_BUSY
+from .deadline import DEADLINE_HEADER, parse_header, request_deadline
 from .config import Config
 
 
@@ -34,7 +41,14 @@ class MCPProxy:
 			config: Конфигурация сервера
 		"""
 		self.config = config
-		self.onec_client: Optional[OneCClient] = None
+		
+		# Общий пул клиентов 1С для всех сессий процесса
+		self.client_pool = OneCClientPool(config)
+		
+		# Сессии, получавшие каталоги клиента 1С (для уведомлений listChanged)
+		self._catalog_sessions: "weakref.WeakKeyDictionary[OneCClient, weakref.WeakSet]" = weakref.WeakKeyDictionary()
+		self._notify_tasks: set = set()
+		self._prefetch_tasks: set = set()
 		
 		# Создаем MCP сервер
 		self.server = Server(
@@ -51,47 +65,147 @@ class MCPProxy:
 		logger.debug(f"Инициализация MCP сервера '{self.config.server_name}' v{self.config.server_version}")
 		
 		# Определяем креденшилы для текущей сессии
-		# При auth_mode=oauth2 берём из context var (per-session), иначе из конфигурации
-		session_creds = None
-		if self.config.auth_mode == "oauth2":
-			session_creds = current_onec_credentials.get()
-			if session_creds:
-				username, password = session_creds
-				logger.debug(f"Использую per-session креденшилы для пользователя: {username}")
-			else:
-				# Fallback на дефолтные (для совместимости)
-				username = self.config.onec_username
-				password = self.config.onec_password
-				logger.debug("Per-session креденшилы не найдены, использую дефолтные из конфигурации")
-		else:
-			# Режим none - используем дефолтные креды
-			username = self.config.onec_username
-			password = self.config.onec_password
-			logger.debug(f"Режим auth_mode=none, использую дефолтные креденшилы: {username}")
-		
-		# Инициализация при запуске
-		self.onec_client = OneCClient(
-			base_url=self.config.onec_url,
-			username=username,
-			password=password,
-			service_root=self.config.onec_service_root
-		)
+		credentials = self.session_credentials()
 		
 		logger.debug(f"Подключение к 1С: {self.config.onec_url}")
 		logger.debug(f"HTTP-сервис: {self.config.onec_service_root}")
 		
+		# Клиент получается из пула в фоне (новый клиент проверяется через health при создании):
+		# рукопожатие initialize не ждёт 1С, первый запрос к 1С дожидается подключения
+		state = {
+			"credentials": credentials,
+			"onec_client": asyncio.create_task(self._acquire(*credentials))
+		}
 		try:
-			# Проверяем подключение к 1С
-			await self.onec_client.check_health()
-			logger.debug("Успешное подключение к 1С (проверка health)")
-			
 			logger.debug("MCP сервер готов к работе")
-			yield {"onec_client": self.onec_client}
+			yield state
 		finally:
-			# Очистка при завершении
-			if self.onec_client:
-				await self.onec_client.close()
-				logger.debug("Соединение с 1С закрыто")
+			acquiring: asyncio.Task = state["onec_client"]
+			if not acquiring.done():
+				acquiring.cancel()
+			elif not acquiring.cancelled() and acquiring.exception() is None:
+				# Возвращаем клиент в пул, соединения остаются открытыми для других сессий
+				await self.client_pool.release(acquiring.result())
+				logger.debug("Клиент 1С возвращён в пул")
+	
+	async def _acquire(self, username: str, password: str) -> OneCClient:
+		"""Получить клиент сессии из пула и загрузить каталоги в фоне."""
+		onec_client = await self.client_pool.acquire(username, password)
+		
+		# Каталоги загружаются в кеш заранее: tools/list после initialize не ждёт 1С,
+		# а вызовы инструментов сразу получают их признаки и время выполнения
+		if onec_client.catalog:
+			task = asyncio.create_task(self._prefetch_catalogs(onec_client))
+			self._prefetch_tasks.add(task)
+			task.add_done_callback(self._prefetch_tasks.discard)
+		return onec_client
+	
+	@staticmethod
+	async def _prefetch_catalogs(onec_client: OneCClient):
+		"""Загрузить списки инструментов, ресурсов и промптов в кеш каталогов."""
+		results = await asyncio.gather(
+			onec_client.list_tools(),
+			onec_client.list_resources(),
+			onec_client.list_prompts(),
+			return_exceptions=True
+		)
+		for result in results:
+			if isinstance(result, Exception):
+				logger.debug(f"Предварительная загрузка каталогов 1С не удалась: {result}")
+	
+	async def _session_client(self, ctx: Any) -> OneCClient:
+		"""Клиент 1С сессии (дожидается подключения, начатого при создании сессии)."""
+		state = ctx.lifespan_context
+		acquiring: asyncio.Task = state["onec_client"]
+		if acquiring.done() and not acquiring.cancelled() and acquiring.exception() is not None:
+			# Подключение не удалось - следующий запрос сессии пробует снова
+			acquiring = asyncio.create_task(self._acquire(*state["credentials"]))
+			state["onec_client"] = acquiring
+		# Отмена одного запроса не прерывает подключение для остальных запросов сессии
+		return await asyncio.shield(acquiring)
+	
+	def session_credentials(self) -> Tuple[str, str]:
+		"""Определить креденшилы 1С для текущей сессии.
+		
+		При auth_mode=oauth2 берутся из context var (per-session), иначе из конфигурации.
+		
+		Returns:
+			Кортеж (username, password)
+		"""
+		if self.config.auth_mode == "oauth2":
+			session_creds = current_onec_credentials.get()
+			if session_creds:
+				logger.debug(f"Использую per-session креденшилы для пользователя: {session_creds[0]}")
+				return session_creds
+			# Fallback на дефолтные (для совместимости)
+			logger.debug("Per-session креденшилы не найдены, использую дефолтные из конфигурации")
+		else:
+			# Режим none - используем дефолтные креды
+			logger.debug(f"Режим auth_mode=none, использую дефолтные креденшилы: {self.config.onec_username}")
+		return self.config.onec_username, self.config.onec_password
+	
+	async def close(self):
+		"""Закрыть общий пул клиентов 1С."""
+		await self.client_pool.close()
+	
+	def _track_session(self, onec_client: OneCClient, session: ServerSession):
+		"""Запомнить сессию, получившую каталоги клиента, для уведомлений об их изменении."""
+		if not onec_client.catalog:
+			return
+		sessions = self._catalog_sessions.get(onec_client)
+		if sessions is None:
+			sessions = weakref.WeakSet()
+			self._catalog_sessions[onec_client] = sessions
+			onec_client.catalog.add_listener(functools.partial(self._notify_list_changed, sessions))
+		sessions.add(session)
+	
+	def _notify_list_changed(self, sessions: weakref.WeakSet, kinds: List[str]):
+		"""Разослать уведомления listChanged сессиям клиента 1С."""
+		for session in list(sessions):
+			for kind in kinds:
+				task = asyncio.create_task(self._send_list_changed(session, kind))
+				self._notify_tasks.add(task)
+				task.add_done_callback(self._notify_tasks.discard)
+	
+	async def _send_list_changed(self, session: ServerSession, kind: str):
+		"""Отправить сессии уведомление об изменении каталога."""
+		try:
+			if kind == "tools":
+				await session.send_tool_list_changed()
+			elif kind == "resources":
+				await session.send_resource_list_changed()
+			elif kind == "prompts":
+				await session.send_prompt_list_changed()
+		except Exception as e:
+			# Сессия могла быть уже закрыта
+			logger.debug(f"Не удалось отправить уведомление об изменении каталога {kind}: {e}")
+	
+	@staticmethod
+	def _busy_error(error: Exception) -> McpError:
+		"""JSON-RPC ошибка для запроса, отклонённого из-за перегрузки или недоступности 1С (вместо пустого результата)."""
+		if isinstance(error, OneCOverloaded):
+			logger.warning(f"Запрос отклонён: {error}")
+			return McpError(types.ErrorData(code=SERVER_BUSY, message=str(error)))
+		return McpError(types.ErrorData(code=SERVER_BUSY, message=f"1С недоступна: {error}"))
+	
+	@staticmethod
+	def _client_timeout(ctx: Any) -> Optional[float]:
+		"""Время выполнения запроса, заданное клиентом: _meta.timeout (сек) или заголовок X-MCP-Timeout (мс)."""
+		extra = ctx.meta.model_extra if ctx.meta else None
+		if extra and extra.get("timeout"):
+			try:
+				return float(extra["timeout"])
+			except (TypeError, ValueError):
+				logger.debug(f"Некорректное значение _meta.timeout: {extra['timeout']!r}")
+		request = getattr(ctx, "request", None)
+		if request is not None and hasattr(request, "headers"):
+			return parse_header(request.headers.get(DEADLINE_HEADER))
+		return None
+	
+	def _deadline(self, ctx: Any, timeout: Optional[float] = None):
+		"""Срок выполнения запроса: наименьшее из времени клиента и времени, объявленного в 1С."""
+		timeouts = [value for value in (self._client_timeout(ctx), timeout) if value and value > 0]
+		return request_deadline(min(timeouts) if timeouts else None)
 	
 	def _register_handlers(self):
 		"""Регистрация обработчиков MCP."""
@@ -100,30 +214,38 @@ class MCPProxy:
 		async def handle_list_tools() -> List[types.Tool]:
 			"""Получить список доступных инструментов."""
 			ctx = self.server.request_context
-			onec_client: OneCClient = ctx.lifespan_context["onec_client"]
-			
 			try:
+				onec_client = await self._session_client(ctx)
+				self._track_session(onec_client, ctx.session)
+				
 				tools = await onec_client.list_tools()
 				logger.debug(f"Получено инструментов: {len(tools)}")
 				return tools
+			except OneCOverloaded as e:
+				raise self._busy_error(e)
 			except Exception as e:
 				logger.error(f"Ошибка при получении списка инструментов: {e}")
+				if is_overload_error(e):
+					# Пустой список клиент принял бы за отсутствие инструментов
+					raise self._busy_error(e)
 				return []
 		
 		@self.server.call_tool()
 		async def handle_call_tool(name: str, arguments: Dict[str, Any]) -> List[types.TextContent]:
 			"""Вызвать инструмент."""
 			ctx = self.server.request_context
-			onec_client: OneCClient = ctx.lifespan_context["onec_client"]
-			
 			try:
+				onec_client = await self._session_client(ctx)
 				logger.debug(f"Вызов инструмента: {name} с аргументами: {arguments}")
-				result = await onec_client.call_tool(name, arguments)
+				with self._deadline(ctx, onec_client.tool_timeout(name)):
+					result = await onec_client.call_tool(name, arguments)
 				
 				if result.isError:
 					logger.error(f"Ошибка выполнения инструмента {name}")
 				
 				return result.content
+			except OneCOverloaded as e:
+				raise self._busy_error(e)
 			except Exception as e:
 				logger.error(f"Ошибка при вызове инструмента {name}: {e}")
 				return [types.TextContent(
@@ -135,26 +257,33 @@ class MCPProxy:
 		async def handle_list_resources() -> List[types.Resource]:
 			"""Получить список доступных ресурсов."""
 			ctx = self.server.request_context
-			onec_client: OneCClient = ctx.lifespan_context["onec_client"]
-			
 			try:
+				onec_client = await self._session_client(ctx)
+				self._track_session(onec_client, ctx.session)
+				
 				resources = await onec_client.list_resources()
 				logger.debug(f"Получено ресурсов: {len(resources)}")
 				return resources
+			except OneCOverloaded as e:
+				raise self._busy_error(e)
 			except Exception as e:
 				logger.error(f"Ошибка при получении списка ресурсов: {e}")
+				if is_overload_error(e):
+					raise self._busy_error(e)
 				return []
 		
 		@self.server.read_resource()
 		async def handle_read_resource(uri: str) -> types.ReadResourceResult:
 			"""Прочитать ресурс."""
 			ctx = self.server.request_context
-			onec_client: OneCClient = ctx.lifespan_context["onec_client"]
-			
 			try:
+				onec_client = await self._session_client(ctx)
 				logger.debug(f"Чтение ресурса: {uri}")
-				result = await onec_client.read_resource(uri)
+				with self._deadline(ctx):
+					result = await onec_client.read_resource(uri)
 				return result
+			except OneCOverloaded as e:
+				raise self._busy_error(e)
 			except Exception as e:
 				logger.error(f"Ошибка при чтении ресурса {uri}: {e}")
 				# Возвращаем ReadResourceResult с ошибкой
@@ -172,26 +301,33 @@ class MCPProxy:
 		async def handle_list_prompts() -> List[types.Prompt]:
 			"""Получить список доступных промптов."""
 			ctx = self.server.request_context
-			onec_client: OneCClient = ctx.lifespan_context["onec_client"]
-			
 			try:
+				onec_client = await self._session_client(ctx)
+				self._track_session(onec_client, ctx.session)
+				
 				prompts = await onec_client.list_prompts()
 				logger.debug(f"Получено промптов: {len(prompts)}")
 				return prompts
+			except OneCOverloaded as e:
+				raise self._busy_error(e)
 			except Exception as e:
 				logger.error(f"Ошибка при получении списка промптов: {e}")
+				if is_overload_error(e):
+					raise self._busy_error(e)
 				return []
 		
 		@self.server.get_prompt()
 		async def handle_get_prompt(name: str, arguments: Optional[Dict[str, str]] = None) -> types.GetPromptResult:
 			"""Получить промпт."""
 			ctx = self.server.request_context
-			onec_client: OneCClient = ctx.lifespan_context["onec_client"]
-			
 			try:
+				onec_client = await self._session_client(ctx)
 				logger.debug(f"Получение промпта: {name} с аргументами: {arguments}")
-				result = await onec_client.get_prompt(name, arguments)
+				with self._deadline(ctx):
+					result = await onec_client.get_prompt(name, arguments)
 				return result
+			except OneCOverloaded as e:
+				raise self._busy_error(e)
 			except Exception as e:
 				logger.error(f"Ошибка при получении промпта {name}: {e}")
 				return types.GetPromptResult(
@@ -0,0 +1,130 @@
+"""Пакетирование JSON-RPC запросов к 1С."""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .deadline import current_deadline
+
+
+logger = logging.getLogger(__name__)
+
+
+class RPCBatcher:
+	"""Собирает параллельные JSON-RPC запросы в пакеты.
+	
+	Запросы, поступившие в течение окна window, отправляются одним HTTP-запросом
+	(массивом JSON-RPC объектов), а ответы раздаются ожидающим по id.
+	"""
+	
+	def __init__(
+		self,
+		send: Callable[[List[Dict[str, Any]]], Awaitable[List[Dict[str, Any]]]],
+		window: float,
+		max_size: int
+	):
+		"""Инициализация пакетировщика.
+		
+		Args:
+			send: Функция отправки пакета, возвращающая массив ответов
+			window: Окно сбора пакета в секундах
+			max_size: Максимальное число запросов в пакете
+		"""
+		self._send = send
+		self.window = window
+		self.max_size = max_size
+		self._pending: List[Tuple[Dict[str, Any], asyncio.Future, Optional[float]]] = []
+		self._timer: Optional[asyncio.TimerHandle] = None
+		self._tasks: set = set()
+		
+		# Статистика
+		self._batches = 0
+		self._requests = 0
+	
+	async def call(self, request: Dict[str, Any]) -> Dict[str, Any]:
+		"""Поставить запрос в пакет и дождаться ответа.
+		
+		Args:
+			request: JSON-RPC запрос с уникальным id
+		
+		Returns:
+			JSON-RPC ответ на этот запрос
+		"""
+		loop = asyncio.get_running_loop()
+		future = loop.create_future()
+		self._pending.append((request, future, current_deadline.get()))
+		
+		if len(self._pending) >= self.max_size:
+			self._flush()
+		elif self._timer is None:
+			self._timer = loop.call_later(self.window, self._flush)
+		
+		return await future
+	
+	def _flush(self):
+		"""Отправить накопленный пакет."""
+		if self._timer is not None:
+			self._timer.cancel()
+			self._timer = None
+		
+		# Запросы, ожидающие которых уже отменены, не отправляем
+		pending = [item for item in self._pending if not item[1].done()]
+		self._pending = []
+		if not pending:
+			return
+		
+		# Срок пакета - самый поздний из сроков его запросов
+		deadlines = [deadline for _, _, deadline in pending]
+		deadline = None if None in deadlines else max(deadlines)
+		batch = [(request, future) for request, future, _ in pending]
+		
+		task = asyncio.ensure_future(self._send_batch(batch, deadline))
+		self._tasks.add(task)
+		task.add_done_callback(self._tasks.discard)
+		
+		# Если все ожидающие отменены, запрос к 1С прерывается
+		futures = [future for _, future in batch]
+		def cancel_if_abandoned(_):
+			if not task.done() and all(future.cancelled() for future in futures):
+				task.cancel()
+		for future in futures:
+			future.add_done_callback(cancel_if_abandoned)
+	
+	async def _send_batch(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]], deadline: Optional[float] = None):
+		"""Отправить пакет и раздать ответы."""
+		self._batches += 1
+		self._requests += len(batch)
+		logger.debug(f"Отправка пакета JSON-RPC из {len(batch)} запросов")
+		
+		# Задача выполняется в копии контекста, срок пакета на вызвавших не влияет
+		current_deadline.set(deadline)
+		try:
+			responses = await self._send([request for request, _ in batch])
+		except asyncio.CancelledError:
+			for _, future in batch:
+				future.cancel()
+			raise
+		except Exception as e:
+			for _, future in batch:
+				if not future.done():
+					future.set_exception(e)
+			return
+		
+		by_id = {response.get("id"): response for response in responses if isinstance(response, dict)}
+		for request, future in batch:
+			if future.done():
+				continue
+			response = by_id.get(request["id"])
+			if response is None:
+				future.set_exception(Exception(f"В пакетном ответе 1С нет ответа на запрос id={request['id']}"))
+			else:
+				future.set_result(response)
+	
+	def stats(self) -> Dict[str, Any]:
+		"""Получить статистику пакетирования."""
+		return {
+			"window_ms": int(self.window * 1000),
+			"max_size": self.max_size,
+			"batches": self._batches,
+			"requests": self._requests
+		}
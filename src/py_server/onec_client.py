@@ -1,21 +1,116 @@
 """Клиент для взаимодействия с 1С."""
 
-import json
+import binascii
+import itertools
 import logging
-from typing import Any, Dict, List, Optional
+import reprlib
+import time
+from typing import Any, Dict, List, Optional, Tuple
 import httpx
 from mcp import types
 from mcp.server.lowlevel.helper_types import ReadResourceContents
-import base64
+
+from .onec_session import IBSession, IBSessionRegistry, extract_session_cookie, is_session_expired
+from .onec_batch import RPCBatcher
+from .catalog_cache import CatalogCache
+from .resource_cache import ResourceCache
+from .tool_cache import ToolResultCache, canonical_arguments
+from .single_flight import SingleFlight
+from .concurrency_limiter import ConcurrencyLimiter
+from .backend_router import BackendRouter
+from .circuit_breaker import CircuitBreakers, CircuitOpen
+from .retry_policy import RetryPolicy
+from . import deadline
+from . import json_codec
 
 
 logger = logging.getLogger(__name__)
 
+# Код ошибки JSON-RPC "метод не найден"
+METHOD_NOT_FOUND = -32601
+
+# Методы без побочных эффектов: одинаковые одновременные вызовы объединяются
+IDEMPOTENT_METHODS = frozenset({
+	"tools/list",
+	"resources/list",
+	"resources/read",
+	"prompts/list",
+	"prompts/get",
+	"catalog/hash"
+})
+
+
+class OneCResponseTooLarge(Exception):
+	"""Ответ 1С превышает допустимый размер."""
+
+
+def decode_base64(data: str) -> bytes:
+	"""Декодировать base64 без промежуточных копий.
+	
+	base64.b64decode сначала кодирует всю строку в ASCII-копию. binascii.a2b_base64
+	читает ASCII-строку напрямую и пишет результат в один буфер, поэтому в памяти
+	одновременно находятся только входная строка и декодированные данные. Пробельные
+	символы (переводы строк, которые вставляет 1С) пропускаются, как и в b64decode.
+	
+	Args:
+		data: Строка base64
+		
+	Returns:
+		Декодированные данные
+	"""
+	return binascii.a2b_base64(data)
+
+
+def is_overload_error(error: BaseException) -> bool:
+	"""Признак перегрузки или недоступности 1С (в отличие от ошибки самого запроса).
+	
+	Args:
+		error: Исключение, возникшее при запросе к 1С
+		
+	Returns:
+		True для таймаутов, сбоев соединения и ответов 429/5xx
+	"""
+	if isinstance(error, httpx.HTTPStatusError):
+		return is_overload_status(error.response.status_code)
+	return isinstance(error, httpx.TransportError)
+
+
+def is_overload_status(status_code: int) -> bool:
+	"""Код HTTP-ответа, которым веб-сервер или 1С сообщает о перегрузке или недоступности."""
+	return status_code == 429 or status_code >= 500
+
+
+class OneCRPCError(Exception):
+	"""Ошибка JSON-RPC, возвращённая 1С."""
+	
+	def __init__(self, code: Any, message: str):
+		super().__init__(f"JSON-RPC ошибка {code}: {message}")
+		self.code = code
+
 
 class OneCClient:
 	"""Клиент для взаимодействия с HTTP-сервисом 1С."""
 	
-	def __init__(self, base_url: str, username: str, password: str, service_root: str = "mcp"):
+	def __init__(
+		self,
+		base_url: str,
+		username: str,
+		password: str,
+		service_root: str = "mcp",
+		http_client: Optional[httpx.AsyncClient] = None,
+		sessions: Optional[IBSessionRegistry] = None,
+		batch_window: float = 0.0,
+		batch_max_size: int = 20,
+		max_response_size: int = 0,
+		method_timeouts: Optional[Dict[str, float]] = None,
+		catalog_ttl: float = 0.0,
+		resources: Optional[ResourceCache] = None,
+		tool_results: Optional[ToolResultCache] = None,
+		limiter: Optional[ConcurrencyLimiter] = None,
+		router: Optional[BackendRouter] = None,
+		breakers: Optional[CircuitBreakers] = None,
+		retry: Optional[RetryPolicy] = None
+	):
 		"""Инициализация клиента.
 		
 		Args:
@@ -23,12 +118,32 @@ class OneCClient:
 			username: Имя пользователя
 			password: Пароль
 			service_root: Корневой URL HTTP-сервиса (по умолчанию "mcp")
+			http_client: Общий HTTP-клиент пула (если не задан, создаётся собственный)
+			sessions: Реестр сеансов 1С (если задан, RPC-запросы выполняются в долгоживущих сеансах)
+			batch_window: Окно сбора пакета JSON-RPC в секундах (0 - без пакетирования)
+			batch_max_size: Максимальное число запросов в пакете
+			max_response_size: Максимальный размер ответа 1С в байтах (0 - без ограничения)
+			method_timeouts: Таймауты отдельных методов JSON-RPC в секундах (остальные - по таймауту HTTP-клиента)
+			catalog_ttl: Время кеширования каталогов в секундах (0 - без кеширования)
+			resources: Кеш содержимого ресурсов (если задан, повторные чтения ревалидируются по etag)
+			tool_results: Кеш результатов только читающих инструментов
+			limiter: Ограничитель одновременных запросов к 1С, общий для всех клиентов пула
+			router: Распределение запросов между публикациями 1С (если не задан, используется base_url)
+			breakers: Размыкатели цепи по публикациям 1С
+			retry: Повторы и хеджирование запросов без побочных эффектов
 		"""
 		self.base_url = base_url.rstrip('/')
 		self.service_root = service_root.strip('/')
+		self.username = username
 		self.auth = httpx.BasicAuth(username, password)
-		self.client = httpx.AsyncClient(
-			auth=self.auth,
+		
+		# Повторное использование сеансов 1С (IBSession)
+		self.sessions = sessions
+		self._session_owner = (base_url, username)
+		
+		# Общий клиент пула не закрывается вместе с этим клиентом
+		self._owns_client = http_client is None
+		self.client = http_client or httpx.AsyncClient(
 			timeout=30.0,
 			headers={"Content-Type": "application/json"}
 		)
@@ -36,6 +151,50 @@ class OneCClient:
 		# Формируем базовый URL для HTTP-сервиса
 		self.service_base_url = f"{self.base_url}/hs/{self.service_root}"
 		logger.debug(f"Базовый URL HTTP-сервиса: {self.service_base_url}")
+		
+		# Ответ 1С читается потоком с ограничением размера
+		self.max_response_size = max_response_size
+		
+		# Таймауты отдельных методов и число ответов по версиям HTTP
+		self.method_timeouts = method_timeouts or {}
+		self.http_versions: Dict[str, int] = {}
+		
+		# Уникальные id JSON-RPC запросов (нужны для разбора пакетных ответов)
+		self._request_ids = itertools.count(1)
+		
+		# Пакетирование параллельных запросов
+		self.batcher: Optional[RPCBatcher] = None
+		if batch_window > 0:
+			self.batcher = RPCBatcher(self._send_batch, window=batch_window, max_size=batch_max_size)
+		
+		# Кеш списков инструментов, ресурсов и промптов
+		self.catalog: Optional[CatalogCache] = None
+		if catalog_ttl > 0:
+			self.catalog = CatalogCache(catalog_ttl, self.catalog_hashes)
+		
+		# Кеш содержимого ресурсов
+		self.resources = resources
+		
+		# Кеш результатов инструментов и время кеширования по именам инструментов (из tools/list)
+		self.tool_results = tool_results
+		self._tool_cache_ttl: Dict[str, float] = {}
+		
+		# Время выполнения вызовов по именам инструментов (из tools/list)
+		self._tool_timeouts: Dict[str, float] = {}
+		
+		# Объединение одинаковых одновременных запросов (вызовы инструментов - только для только читающих)
+		self.flights = SingleFlight()
+		self._read_only_tools: set = set()
+		
+		# Лимиты одновременных запросов к 1С (общий и на пользователя)
+		self.limiter = limiter
+		
+		# Несколько публикаций одной базы: base_url остаётся ключом кешей
+		self.router = router
+		
+		# Быстрый отказ при недоступности 1С, повторы и хеджирование идемпотентных запросов
+		self.breakers = breakers
+		self.retry = retry
 	
 	async def check_health(self) -> bool:
 		"""Проверить состояние HTTP-сервиса 1С.
@@ -43,23 +202,43 @@ class OneCClient:
 		Returns:
 			True, если сервис доступен и здоров, иначе вызывает исключение.
 		"""
+		base_url = self.router.choose(self.username).url if self.router else self.base_url
+		if not self.breakers:
+			return await self._check_health(base_url)
+		
+		# Новые сессии при разомкнутой цепи тоже не ждут таймаута
+		breaker = self.breakers.get(base_url)
+		breaker.allow()
+		failed: Optional[bool] = None
+		try:
+			result = await self._check_health(base_url)
+			failed = False
+			return result
+		except Exception as e:
+			failed = is_overload_error(e)
+			raise
+		finally:
+			breaker.record(failed)
+	
+	async def _check_health(self, base_url: str) -> bool:
+		"""Запросить состояние HTTP-сервиса в публикации 1С."""
 		try:
-			url = f"{self.service_base_url}/health"
+			url = f"{self._service_url(base_url)}/health"
 			logger.debug(f"Запрос состояния здоровья: {url}")
 
-			response = await self.client.get(url)
+			response = await self.client.get(url, auth=self.auth)
 			response.raise_for_status()
 
 			# Проверяем JSON ответ от 1C healthGET
 			try:
-				response_json = response.json()
+				response_json = json_codec.loads(response.content)
 				if response_json.get("status") == "ok":
 					logger.debug("Сервис 1С доступен и здоров (статус OK).")
 					return True
 				else:
 					logger.warning(f"1C health check вернул неожиданный статус: {response_json}")
 					raise httpx.HTTPStatusError(f"1C service reported not healthy: {response_json}", request=response.request, response=response)
-			except json.JSONDecodeError as e:
+			except json_codec.JSONDecodeError as e:
 				logger.error(f"Ошибка парсинга JSON ответа health-check 1С: {response.text}")
 				raise httpx.HTTPStatusError(f"Invalid JSON response from 1C health check: {e}", request=response.request, response=response)
 
@@ -70,6 +249,9 @@ class OneCClient:
 	async def call_rpc(self, method: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
 		"""Выполнить JSON-RPC запрос к 1С.
 		
+		Одинаковые одновременные вызовы методов без побочных эффектов выполняются
+		в 1С один раз, результат получают все вызвавшие.
+		
 		Args:
 			method: Имя метода
 			params: Параметры метода
@@ -77,59 +259,376 @@ class OneCClient:
 		Returns:
 			Результат выполнения метода
 		"""
+		if method in IDEMPOTENT_METHODS or (method == "tools/call" and params["name"] in self._read_only_tools):
+			key = (method, canonical_arguments(params))
+			return await self.flights.do(key, lambda: self._call_idempotent(method, params))
+		return await self._call_rpc(method, params)
+	
+	async def _call_idempotent(self, method: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+		"""Выполнить запрос без побочных эффектов, повторяя его при перегрузке или недоступности 1С."""
+		if not self.retry:
+			return await self._call_rpc(method, params)
+		return await self.retry.run(self._rpc_kind(method, params), lambda: self._call_rpc(method, params))
+	
+	@staticmethod
+	def _rpc_kind(method: str, params: Optional[Dict[str, Any]]) -> str:
+		"""Вид запроса для статистики задержек: метод или имя вызываемого инструмента."""
+		return f"tools/call:{params['name']}" if method == "tools/call" else method
+	
+	async def _call_rpc(self, method: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+		"""Выполнить JSON-RPC запрос к 1С без объединения, дождавшись свободного слота."""
+		if not self.limiter:
+			return await self._execute_rpc(method, params)
+		async with self.limiter.slot(self.username):
+			# Задержка и ошибки перегрузки подстраивают адаптивный лимит
+			kind = self._rpc_kind(method, params)
+			started = time.monotonic()
+			try:
+				result = await self._execute_rpc(method, params)
+			except CircuitOpen:
+				# Запрос не дошёл до 1С
+				raise
+			except Exception as e:
+				self.limiter.observe(kind, time.monotonic() - started, failed=is_overload_error(e))
+				raise
+			self.limiter.observe(kind, time.monotonic() - started, failed=False)
+			return result
+	
+	async def _execute_rpc(self, method: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+		"""Отправить JSON-RPC запрос в 1С."""
 		try:
-			url = f"{self.service_base_url}/rpc"
-			
 			# Формируем JSON-RPC запрос
 			rpc_request = {
 				"jsonrpc": "2.0",
-				"id": 1,
+				"id": next(self._request_ids),
 				"method": method,
 				"params": params or {}
 			}
 			
 			logger.debug(f"JSON-RPC запрос: {rpc_request}")
 			
-			response = await self.client.post(url, json=rpc_request)
-			response.raise_for_status()
+			if self.batcher:
+				# Запрос уходит в 1С в составе пакета вместе с параллельными вызовами
+				rpc_response = await self.batcher.call(rpc_request)
+			else:
+				response, body = await self._post("/rpc", rpc_request)
+				response.raise_for_status()
+				rpc_response = json_codec.loads(body)
+				del body
 			
-			rpc_response = response.json()
-			logger.debug(f"JSON-RPC ответ: {rpc_response}")
+			if logger.isEnabledFor(logging.DEBUG):
+				# Большие ответы в лог целиком не попадают
+				logger.debug(f"JSON-RPC ответ: {reprlib.repr(rpc_response)}")
 			
 			# Проверяем на ошибки JSON-RPC
 			if "error" in rpc_response:
 				error = rpc_response["error"]
-				raise Exception(f"JSON-RPC ошибка {error.get('code', 'unknown')}: {error.get('message', 'Unknown error')}")
+				raise OneCRPCError(error.get('code', 'unknown'), error.get('message', 'Unknown error'))
 			
 			return rpc_response.get("result", {})
 			
 		except httpx.HTTPError as e:
 			logger.error(f"Ошибка HTTP при вызове RPC: {e}")
 			raise
-		except json.JSONDecodeError as e:
+		except json_codec.JSONDecodeError as e:
 			logger.error(f"Ошибка парсинга JSON ответа RPC: {e}")
 			raise
 	
+	async def _send_batch(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+		"""Отправить пакет JSON-RPC запросов в 1С.
+		
+		Args:
+			requests: JSON-RPC запросы пакета
+			
+		Returns:
+			Массив JSON-RPC ответов
+		"""
+		# Одиночный запрос отправляем объектом, без обёртки в массив
+		payload = requests[0] if len(requests) == 1 else requests
+		response, body = await self._post("/rpc", payload)
+		response.raise_for_status()
+		
+		rpc_responses = json_codec.loads(body)
+		if isinstance(rpc_responses, dict):
+			rpc_responses = [rpc_responses]
+		return rpc_responses
+	
+	async def _send(self, url: str, payload: Any, headers: Optional[Dict[str, str]] = None) -> Tuple[httpx.Response, bytearray]:
+		"""Отправить POST-запрос в 1С и прочитать тело ответа потоком.
+		
+		Тело накапливается порциями в одном буфере; при превышении max_response_size
+		чтение прерывается, не дожидаясь получения всего ответа.
+		
+		Args:
+			url: URL запроса
+			payload: Тело запроса
+			headers: Дополнительные заголовки
+			
+		Returns:
+			Кортеж (HTTP-ответ 1С, тело ответа)
+		"""
+		# Оставшееся время выполнения MCP-запроса передаётся 1С, чтобы она не начинала работу,
+		# результат которой уже не нужен
+		remaining = deadline.remaining()
+		if remaining is not None:
+			if remaining <= 0:
+				raise deadline.DeadlineExceeded("Истёк срок выполнения запроса до отправки в 1С")
+			headers = {**(headers or {}), deadline.DEADLINE_HEADER: str(max(int(remaining * 1000), 1))}
+		
+		# Тело кодируется в байты один раз, без промежуточной строки
+		request = self.client.build_request(
+			"POST",
+			url,
+			content=json_codec.dumps(payload),
+			headers=headers,
+			timeout=self._request_timeout(payload, remaining)
+		)
+		response = await self.client.send(request, auth=self.auth, stream=True)
+		self.http_versions[response.http_version] = self.http_versions.get(response.http_version, 0) + 1
+		try:
+			limit = self.max_response_size
+			content_length = response.headers.get("content-length")
+			if limit and content_length and int(content_length) > limit:
+				raise OneCResponseTooLarge(f"Ответ 1С ({content_length} байт) превышает допустимый размер {limit} байт")
+			
+			body = bytearray()
+			async for chunk in response.aiter_bytes():
+				body += chunk
+				if limit and len(body) > limit:
+					raise OneCResponseTooLarge(f"Ответ 1С превышает допустимый размер {limit} байт")
+		finally:
+			await response.aclose()
+		
+		logger.debug(f"Ответ 1С: HTTP {response.status_code}, {len(body)} байт")
+		return response, body
+	
+	def _request_timeout(self, payload: Any, remaining: Optional[float] = None) -> Any:
+		"""Таймаут запроса по методам JSON-RPC (для пакета - наибольший из таймаутов методов).
+		
+		Args:
+			payload: Тело запроса (JSON-RPC запрос или пакет)
+			remaining: Оставшееся время выполнения MCP-запроса в секундах (ограничивает таймаут)
+			
+		Returns:
+			Таймаут httpx или USE_CLIENT_DEFAULT, если для методов таймауты не заданы
+		"""
+		if not self.method_timeouts and remaining is None:
+			return httpx.USE_CLIENT_DEFAULT
+		
+		default = self.client.timeout.read
+		timeout = default
+		if self.method_timeouts:
+			requests = payload if isinstance(payload, list) else [payload]
+			timeouts = [self.method_timeouts.get(request.get("method"), default) for request in requests]
+			# Хотя бы один метод без ограничения времени - ограничения нет
+			timeout = None if None in timeouts else max(timeouts)
+		if remaining is not None:
+			timeout = remaining if timeout is None else min(timeout, remaining)
+		if timeout == default:
+			return httpx.USE_CLIENT_DEFAULT
+		return httpx.Timeout(timeout, connect=self.client.timeout.connect)
+	
+	def _service_url(self, base_url: str) -> str:
+		"""URL HTTP-сервиса в публикации 1С."""
+		return f"{base_url}/hs/{self.service_root}"
+	
+	def session_owners(self) -> List[Tuple[str, str]]:
+		"""Ключи сеансов 1С клиента в реестре (по одному на публикацию)."""
+		if not self.router:
+			return [self._session_owner]
+		return [(backend.url, self.username) for backend in self.router.backends]
+	
+	async def _post(self, path: str, payload: Any) -> Tuple[httpx.Response, bytearray]:
+		"""Отправить POST-запрос в HTTP-сервис 1С, выбрав публикацию.
+		
+		Args:
+			path: Путь относительно корня HTTP-сервиса (например, /rpc)
+			payload: Тело запроса
+			
+		Returns:
+			Кортеж (HTTP-ответ 1С, тело ответа)
+		"""
+		backend = self.router.choose(self.username) if self.router else None
+		breaker = None
+		if self.breakers:
+			# При разомкнутой цепи запрос отклоняется сразу, не дожидаясь таймаута
+			breaker = self.breakers.get(backend.url if backend else self.base_url)
+			breaker.allow()
+		if not backend and not breaker:
+			return await self._post_to(self.service_base_url, self._session_owner, path, payload)
+		
+		if backend:
+			self.router.start(backend)
+		started = time.monotonic()
+		failed: Optional[bool] = None
+		try:
+			if backend:
+				response, body = await self._post_to(
+					self._service_url(backend.url),
+					(backend.url, self.username),
+					path,
+					payload
+				)
+			else:
+				response, body = await self._post_to(self.service_base_url, self._session_owner, path, payload)
+			failed = is_overload_status(response.status_code)
+			return response, body
+		except Exception as e:
+			failed = is_overload_error(e)
+			raise
+		finally:
+			# failed остаётся None, если запрос отменён
+			if backend:
+				self.router.release(backend, time.monotonic() - started, failed)
+			if breaker:
+				breaker.record(failed)
+	
+	def _resendable(self, payload: Any) -> bool:
+		"""Запрос (или все запросы пакета) без побочных эффектов - его можно отправить повторно."""
+		messages = payload if isinstance(payload, list) else [payload]
+		return all(
+			isinstance(message, dict) and (
+				message.get("method") in IDEMPOTENT_METHODS
+				or (message.get("method") == "tools/call" and (message.get("params") or {}).get("name") in self._read_only_tools)
+			)
+			for message in messages
+		)
+	
+	async def _post_to(self, service_url: str, owner: Tuple[str, str], path: str, payload: Any) -> Tuple[httpx.Response, bytearray]:
+		"""Отправить POST-запрос в публикацию 1С, при необходимости в рамках сеанса IBSession.
+		
+		Args:
+			service_url: URL HTTP-сервиса в публикации
+			owner: Ключ сеансов пользователя в этой публикации
+			path: Путь относительно корня HTTP-сервиса
+			payload: Тело запроса
+			
+		Returns:
+			Кортеж (HTTP-ответ 1С, тело ответа)
+		"""
+		url = f"{service_url}{path}"
+		if not self.sessions:
+			return await self._send(url, payload)
+		
+		session = self.sessions.checkout(owner)
+		if session:
+			try:
+				response, body = await self._send(url, payload, headers=session.headers)
+			except BaseException:
+				self.sessions.discard(session)
+				raise
+			
+			if not is_session_expired(response, body):
+				self.sessions.checkin(owner, session)
+				return response, body
+			
+			# Сеанс истёк или был завершён на стороне 1С
+			self.sessions.discard(session)
+			if not self._resendable(payload):
+				# Запрос с побочными эффектами автоматически не повторяется; следующий запрос откроет новый сеанс
+				logger.warning(f"Сеанс 1С пользователя {self.username} недействителен (HTTP {response.status_code}), запрос не повторяется")
+				return response, body
+			logger.debug(f"Сеанс 1С пользователя {self.username} недействителен (HTTP {response.status_code}), переоткрываю")
+		
+		reserved, evicted = self.sessions.reserve()
+		if evicted:
+			await self.finish_sessions([evicted])
+		if not reserved:
+			# Лимит сеансов исчерпан - выполняем запрос без сохранения сеанса
+			return await self._send(url, payload)
+		
+		try:
+			response, body = await self._send(url, payload, headers={"IBSession": "start"})
+		except BaseException:
+			self.sessions.discard()
+			raise
+		
+		cookie = extract_session_cookie(response)
+		if cookie and response.is_success:
+			self.sessions.checkin(owner, IBSession(cookie=cookie, auth=self.auth, url=service_url))
+			logger.debug(f"Открыт сеанс 1С для пользователя {self.username}")
+		else:
+			self.sessions.discard()
+		
+		return response, body
+	
+	async def finish_sessions(self, sessions: List[IBSession]):
+		"""Завершить сеансы 1С (IBSession: finish), освобождая лицензии.
+		
+		Args:
+			sessions: Сеансы для завершения
+		"""
+		for session in sessions:
+			url = f"{session.url or self.service_base_url}/health"
+			try:
+				await self.client.get(url, auth=session.auth, headers={**session.headers, "IBSession": "finish"})
+			except httpx.HTTPError as e:
+				logger.debug(f"Не удалось завершить сеанс 1С: {e}")
+	
+	async def catalog_hashes(self) -> Optional[Dict[str, str]]:
+		"""Получить отпечатки каталогов инструментов, ресурсов и промптов.
+		
+		Returns:
+			Словарь отпечатков по видам каталогов или None, если 1С не поддерживает catalog/hash
+		"""
+		try:
+			return await self.call_rpc("catalog/hash")
+		except OneCRPCError as e:
+			if e.code == METHOD_NOT_FOUND:
+				return None
+			raise
+	
+	async def _list(self, method: str, kind: str) -> Dict[str, Any]:
+		"""Выполнить метод получения списка, при необходимости через кеш каталогов."""
+		if self.catalog:
+			return await self.catalog.get(kind, lambda: self.call_rpc(method))
+		return await self.call_rpc(method)
+	
 	async def list_tools(self) -> List[types.Tool]:
 		"""Получить список доступных инструментов.
 		
 		Returns:
 			Список инструментов MCP
 		"""
-		result = await self.call_rpc("tools/list")
+		result = await self._list("tools/list", "tools")
 		tools_data = result.get("tools", [])
 		
 		tools = []
+		cache_ttl = {}
+		timeouts = {}
+		read_only = set()
 		for tool_data in tools_data:
+			# Параметры инструмента из 1С читаются из исходного _meta: в ранних версиях mcp у Tool нет поля meta
+			meta = tool_data.get("_meta") or {}
 			tool = types.Tool(
 				name=tool_data["name"],
 				description=tool_data.get("description", ""),
-				inputSchema=tool_data.get("inputSchema", {})
+				inputSchema=tool_data.get("inputSchema", {}),
+				annotations=tool_data.get("annotations"),
+				_meta=tool_data.get("_meta")
 			)
 			tools.append(tool)
+			
+			timeout = meta.get("timeout", 0)
+			if timeout > 0:
+				timeouts[tool.name] = timeout
+			
+			# Объединять и кешировать можно только вызовы инструментов, объявленных только читающими
+			if tool.annotations and tool.annotations.readOnlyHint:
+				read_only.add(tool.name)
+				ttl = meta.get("cacheTtl", 0)
+				if ttl > 0:
+					cache_ttl[tool.name] = ttl
 		
+		self._tool_cache_ttl = cache_ttl
+		self._tool_timeouts = timeouts
+		self._read_only_tools = read_only
 		return tools
 	
+	def tool_timeout(self, name: str) -> Optional[float]:
+		"""Время выполнения вызова инструмента в секундах, объявленное в 1С (None - не ограничено)."""
+		return self._tool_timeouts.get(name)
+	
 	async def call_tool(self, name: str, arguments: Dict[str, Any]) -> types.CallToolResult:
 		"""Вызвать инструмент.
 		
@@ -140,6 +639,14 @@ class OneCClient:
 		Returns:
 			Результат выполнения инструмента
 		"""
+		ttl = self._tool_cache_ttl.get(name, 0) if self.tool_results else 0
+		if ttl > 0:
+			cache_key = (self.base_url, self.username, name, canonical_arguments(arguments))
+			cached = self.tool_results.get(cache_key)
+			if cached is not None:
+				logger.debug(f"Результат инструмента {name} взят из кеша")
+				return cached
+		
 		result = await self.call_rpc("tools/call", {
 			"name": name,
 			"arguments": arguments
@@ -172,10 +679,15 @@ class OneCClient:
 						text=str(item.get("text", item))
 					))
 		
-		return types.CallToolResult(
+		tool_result = types.CallToolResult(
 			content=content,
 			isError=result.get("isError", False)
 		)
+		
+		if ttl > 0 and not tool_result.isError:
+			self.tool_results.put(cache_key, tool_result, ttl)
+		
+		return tool_result
 	
 	async def list_resources(self) -> List[types.Resource]:
 		"""Получить список доступных ресурсов.
@@ -183,7 +695,7 @@ class OneCClient:
 		Returns:
 			Список ресурсов MCP
 		"""
-		result = await self.call_rpc("resources/list")
+		result = await self._list("resources/list", "resources")
 		resources_data = result.get("resources", [])
 		
 		resources = []
@@ -209,7 +721,21 @@ class OneCClient:
 		"""
 		# MCP декоратор может передать сюда AnyUrl; приводим к строке перед JSON-RPC
 		uri_str = str(uri)
-		result = await self.call_rpc("resources/read", {"uri": uri_str})
+		params = {"uri": uri_str}
+		
+		cache_key = (self.base_url, self.username, uri_str)
+		cached = self.resources.get(cache_key) if self.resources else None
+		if cached:
+			if self.resources.is_fresh(cached):
+				return cached.contents
+			# 1С вернёт notModified, если содержимое не изменилось
+			params["ifNoneMatch"] = cached.etag
+		
+		result = await self.call_rpc("resources/read", params)
+		
+		if cached and result.get("notModified") and result.get("etag") == cached.etag:
+			self.resources.confirm(cached)
+			return cached.contents
 		
 		# Преобразуем результат в Iterable[ReadResourceContents] для декоратора read_resource
 		contents: List[ReadResourceContents] = []
@@ -225,7 +751,7 @@ class OneCClient:
 				elif content_type == "blob":
 					blob_b64 = item.get("blob", "") or ""
 					try:
-						data_bytes = base64.b64decode(blob_b64)
+						data_bytes = decode_base64(blob_b64)
 					except Exception:
 						# В случае некорректной base64 — вернем как текст для диагностики
 						contents.append(ReadResourceContents(
@@ -240,16 +766,19 @@ class OneCClient:
 				else:
 					# Fallback: сериализуем как текст
 					contents.append(ReadResourceContents(
-						content=f"Unknown resource content type '{content_type}': {json.dumps(item, ensure_ascii=False)}",
+						content=f"Unknown resource content type '{content_type}': {json_codec.dumps(item).decode('utf-8')}",
 						mime_type="text/plain"
 					))
 		else:
 			# Если сервер вернул не ожидаемую структуру — вернем весь результат текстом
 			contents.append(ReadResourceContents(
-				content=json.dumps(result, ensure_ascii=False),
+				content=json_codec.dumps(result).decode("utf-8"),
 				mime_type="application/json"
 			))
 		
+		if self.resources and result.get("etag"):
+			self.resources.put(cache_key, result["etag"], contents)
+		
 		return contents
 	
 	async def list_prompts(self) -> List[types.Prompt]:
@@ -258,7 +787,7 @@ class OneCClient:
 		Returns:
 			Список промптов MCP
 		"""
-		result = await self.call_rpc("prompts/list")
+		result = await self._list("prompts/list", "prompts")
 		prompts_data = result.get("prompts", [])
 		
 		prompts = []
@@ -318,4 +847,5 @@ class OneCClient:
 	
 	async def close(self):
 		"""Закрыть клиент."""
-		await self.client.aclose() 
\ No newline at end of file
+		if self._owns_client:
+			await self.client.aclose() 
\ No newline at end of file
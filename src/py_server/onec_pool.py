@@ -0,0 +1,392 @@
+"""Пул клиентов 1С, общий для всех MCP-сессий процесса."""
+
+import asyncio
+import importlib.util
+import logging
+import time
+from collections import OrderedDict
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from .onec_client import OneCClient, is_overload_error
+from .onec_session import IBSessionRegistry
+from .resource_cache import ResourceCache
+from .tool_cache import ToolResultCache
+from .concurrency_limiter import ConcurrencyLimiter
+from .adaptive_limit import AdaptiveLimit
+from .backend_router import BackendRouter
+from .circuit_breaker import CircuitBreakers
+from .retry_policy import RetryPolicy
+from .config import Config
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PoolEntry:
+	"""Запись пула: клиент и учёт его использования."""
+	client: OneCClient
+	password: str
+	refcount: int = 0
+	last_used: float = field(default_factory=time.monotonic)
+
+
+class OneCClientPool:
+	"""Реестр клиентов 1С с ключом (onec_url, login).
+	
+	Все клиенты используют один общий httpx.AsyncClient, поэтому TCP/TLS-соединения
+	переиспользуются между сессиями, а общее число сокетов ограничено лимитами пула.
+	Неиспользуемые клиенты вытесняются по LRU и по времени простоя.
+	При включённом onec_session_reuse клиенты выполняют запросы в долгоживущих сеансах 1С,
+	число которых ограничено общим реестром сеансов.
+	"""
+	
+	def __init__(self, config: Config):
+		"""Инициализация пула.
+		
+		Args:
+			config: Конфигурация сервера
+		"""
+		self.config = config
+		self.max_clients = config.onec_pool_max_clients
+		self.idle_ttl = config.onec_pool_idle_ttl
+		
+		# HTTP/2 доступен только при установленном пакете h2 (httpx[http2])
+		self.http2 = config.onec_http2
+		if self.http2 and importlib.util.find_spec("h2") is None:
+			logger.warning("HTTP/2 для 1С недоступен: пакет h2 не установлен (pip install httpx[http2]), используется HTTP/1.1")
+			self.http2 = False
+		
+		self.max_keepalive = config.onec_pool_max_keepalive
+		if self.max_keepalive is None:
+			self.max_keepalive = config.onec_pool_max_connections
+		
+		self.http_client = httpx.AsyncClient(
+			http2=self.http2,
+			timeout=config.onec_timeout,
+			limits=httpx.Limits(
+				max_connections=config.onec_pool_max_connections,
+				max_keepalive_connections=self.max_keepalive,
+				keepalive_expiry=config.onec_pool_keepalive_expiry
+			),
+			headers={"Content-Type": "application/json"},
+			# Общий клиент не должен хранить cookie: сеансы 1С разных пользователей не смешиваются
+			cookies=CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+		)
+		
+		# Реестр сеансов 1С (только в режиме повторного использования сеансов)
+		self.sessions: Optional[IBSessionRegistry] = None
+		if config.onec_session_reuse:
+			self.sessions = IBSessionRegistry(
+				max_sessions=config.onec_max_sessions,
+				max_age=config.onec_session_max_age
+			)
+		self._finish_tasks: set = set()
+		
+		# Кеш содержимого ресурсов, общий для всех клиентов
+		self.resources: Optional[ResourceCache] = None
+		if config.resource_cache_max_bytes > 0:
+			self.resources = ResourceCache(
+				max_bytes=config.resource_cache_max_bytes,
+				ttl=config.resource_cache_ttl
+			)
+		
+		# Кеш результатов только читающих инструментов, общий для всех клиентов
+		self.tool_results: Optional[ToolResultCache] = None
+		if config.tool_cache_max_entries > 0:
+			self.tool_results = ToolResultCache(max_entries=config.tool_cache_max_entries)
+		
+		# Лимиты одновременных запросов к 1С, общие для всех клиентов
+		self.limiter: Optional[ConcurrencyLimiter] = None
+		adaptive: Optional[AdaptiveLimit] = None
+		if config.onec_adaptive_concurrency:
+			# Верхняя граница адаптивного лимита - фиксированный лимит или число соединений
+			adaptive = AdaptiveLimit(
+				initial=config.onec_adaptive_initial_limit,
+				min_limit=config.onec_adaptive_min_limit,
+				max_limit=config.onec_max_concurrent or config.onec_pool_max_connections,
+				tolerance=config.onec_adaptive_latency_tolerance
+			)
+		if adaptive or config.onec_max_concurrent > 0 or config.onec_max_concurrent_per_user > 0:
+			self.limiter = ConcurrencyLimiter(
+				max_concurrent=config.onec_max_concurrent,
+				max_per_user=config.onec_max_concurrent_per_user,
+				max_queue=config.onec_queue_max_size,
+				queue_timeout=config.onec_queue_timeout,
+				max_wait=config.shed_max_wait,
+				weights=config.onec_user_weights,
+				adaptive=adaptive
+			)
+		
+		# Распределение запросов между публикациями 1С (основная и дополнительные)
+		self.router: Optional[BackendRouter] = None
+		if config.onec_backends:
+			urls = list(dict.fromkeys(url.rstrip('/') for url in [config.onec_url, *config.onec_backends]))
+			self.router = BackendRouter(
+				urls,
+				weights={url.rstrip('/'): weight for url, weight in config.onec_backend_weights.items()},
+				sticky=config.onec_backend_sticky,
+				eject_failures=config.onec_backend_eject_failures,
+				eject_time=config.onec_backend_eject_time,
+				eject_latency=config.onec_backend_eject_latency
+			)
+		
+		# Размыкатели цепи по публикациям и повторы запросов без побочных эффектов
+		self.breakers: Optional[CircuitBreakers] = None
+		if config.onec_breaker_failures > 0:
+			self.breakers = CircuitBreakers(
+				failure_threshold=config.onec_breaker_failures,
+				recovery_time=config.onec_breaker_recovery_time,
+				urls=self.backend_urls()
+			)
+		self.retry: Optional[RetryPolicy] = None
+		if config.onec_retry_attempts > 0 or config.onec_hedge_requests:
+			self.retry = RetryPolicy(
+				retryable=is_overload_error,
+				attempts=config.onec_retry_attempts,
+				base_delay=config.onec_retry_base_delay,
+				max_delay=config.onec_retry_max_delay,
+				hedge=config.onec_hedge_requests,
+				limiter=self.limiter
+			)
+		
+		self._entries: "OrderedDict[Tuple[str, str], _PoolEntry]" = OrderedDict()
+		self._lock = asyncio.Lock()
+		
+		# Клиенты фоновой проверки состояния публикаций (креденшилы из конфигурации)
+		self._health_clients: Dict[str, OneCClient] = {}
+		
+		# Статистика пула
+		self._hits = 0
+		self._misses = 0
+		self._evictions = 0
+	
+	async def acquire(self, username: str, password: str) -> OneCClient:
+		"""Получить клиент для пользователя 1С.
+		
+		Новый клиент проверяется через check_health() один раз при создании;
+		повторные сессии того же пользователя получают готовый клиент без обращения к 1С.
+		
+		Args:
+			username: Имя пользователя 1С
+			password: Пароль пользователя 1С
+		
+		Returns:
+			Клиент 1С (должен быть возвращён через release())
+		"""
+		key = (self.config.onec_url, username)
+		
+		async with self._lock:
+			self._evict_idle()
+			
+			entry = self._entries.get(key)
+			if entry and entry.password != password:
+				# Другой пароль: клиент заменяется только после проверки новых креденшилов,
+				# иначе сессия с устаревшим паролем вытеснила бы рабочий клиент пользователя
+				logger.debug(f"Креденшилы пользователя {username} отличаются от клиента в пуле, проверяю новые")
+				entry = None
+			
+			if entry:
+				self._hits += 1
+				self._entries.move_to_end(key)
+				entry.refcount += 1
+				entry.last_used = time.monotonic()
+				return entry.client
+			
+			self._misses += 1
+		
+		client = OneCClient(
+			base_url=self.config.onec_url,
+			username=username,
+			password=password,
+			service_root=self.config.onec_service_root,
+			http_client=self.http_client,
+			sessions=self.sessions,
+			batch_window=self.config.onec_batch_window / 1000,
+			batch_max_size=self.config.onec_batch_max_size,
+			max_response_size=self.config.onec_max_response_size,
+			method_timeouts=self.config.onec_method_timeouts,
+			catalog_ttl=self.config.catalog_cache_ttl,
+			resources=self.resources,
+			tool_results=self.tool_results,
+			limiter=self.limiter,
+			router=self.router,
+			breakers=self.breakers,
+			retry=self.retry
+		)
+		# Проверяем подключение только для нового клиента (вне блокировки пула)
+		await client.check_health()
+		
+		async with self._lock:
+			entry = self._entries.get(key)
+			if not entry or entry.password != password:
+				# Параллельная сессия могла успеть создать клиент - тогда используем его.
+				# Клиент со старым паролем удаляется вместе с его сеансами 1С
+				if entry:
+					logger.debug(f"Креденшилы пользователя {username} изменились, клиент заменён")
+					self._remove(key)
+				entry = _PoolEntry(client=client, password=password)
+				self._entries[key] = entry
+				logger.debug(f"Создан клиент 1С для пользователя {username} (клиентов в пуле: {len(self._entries)})")
+			self._entries.move_to_end(key)
+			entry.refcount += 1
+			entry.last_used = time.monotonic()
+			self._evict_overflow()
+			return entry.client
+	
+	async def release(self, client: OneCClient):
+		"""Вернуть клиент в пул после завершения сессии.
+		
+		Args:
+			client: Клиент, полученный через acquire()
+		"""
+		async with self._lock:
+			for entry in self._entries.values():
+				if entry.client is client:
+					entry.refcount = max(entry.refcount - 1, 0)
+					entry.last_used = time.monotonic()
+					break
+			self._evict_overflow()
+	
+	def _evict_idle(self):
+		"""Вытеснить клиенты, простаивающие дольше idle_ttl."""
+		now = time.monotonic()
+		expired = [
+			key for key, entry in self._entries.items()
+			if entry.refcount == 0 and now - entry.last_used > self.idle_ttl
+		]
+		for key in expired:
+			self._remove(key)
+	
+	def _evict_overflow(self):
+		"""Вытеснить наименее недавно использованные свободные клиенты сверх лимита."""
+		if len(self._entries) <= self.max_clients:
+			return
+		for key in list(self._entries.keys()):
+			if len(self._entries) <= self.max_clients:
+				break
+			if self._entries[key].refcount == 0:
+				self._remove(key)
+	
+	def _remove(self, key: Tuple[str, str]):
+		"""Удалить клиент из пула."""
+		entry = self._entries.pop(key, None)
+		self._evictions += 1
+		if entry and self.sessions:
+			# Завершаем свободные сеансы пользователя в фоне, чтобы освободить лицензии
+			drained = [session for owner in entry.client.session_owners() for session in self.sessions.drain(owner)]
+			if drained:
+				task = asyncio.create_task(entry.client.finish_sessions(drained))
+				self._finish_tasks.add(task)
+				task.add_done_callback(self._finish_tasks.discard)
+		logger.debug(f"Клиент 1С для пользователя {key[1]} вытеснен из пула")
+	
+	def stats(self) -> Dict[str, Any]:
+		"""Получить статистику пула.
+		
+		Returns:
+			Словарь со счётчиками пула
+		"""
+		stats = {
+			"clients": len(self._entries),
+			"clients_in_use": sum(1 for entry in self._entries.values() if entry.refcount > 0),
+			"max_clients": self.max_clients,
+			"max_connections": self.config.onec_pool_max_connections,
+			"idle_ttl": self.idle_ttl,
+			"hits": self._hits,
+			"misses": self._misses,
+			"evictions": self._evictions
+		}
+		http_versions: Dict[str, int] = {}
+		for entry in self._entries.values():
+			for version, count in entry.client.http_versions.items():
+				http_versions[version] = http_versions.get(version, 0) + count
+		stats["http"] = {
+			"http2": self.http2,
+			"max_keepalive": self.max_keepalive,
+			"keepalive_expiry": self.config.onec_pool_keepalive_expiry,
+			"timeout": self.config.onec_timeout,
+			"method_timeouts": self.config.onec_method_timeouts,
+			"responses": http_versions
+		}
+		if self.sessions:
+			stats["sessions"] = self.sessions.stats()
+		if self.config.onec_batch_window > 0:
+			batchers = [entry.client.batcher.stats() for entry in self._entries.values() if entry.client.batcher]
+			stats["batching"] = {
+				"window_ms": self.config.onec_batch_window,
+				"max_size": self.config.onec_batch_max_size,
+				"batches": sum(batcher["batches"] for batcher in batchers),
+				"requests": sum(batcher["requests"] for batcher in batchers)
+			}
+		if self.config.catalog_cache_ttl > 0:
+			caches = [entry.client.catalog.stats() for entry in self._entries.values() if entry.client.catalog]
+			stats["catalog"] = {
+				"ttl": self.config.catalog_cache_ttl,
+				"hits": sum(cache["hits"] for cache in caches),
+				"misses": sum(cache["misses"] for cache in caches),
+				"revalidations": sum(cache["revalidations"] for cache in caches),
+				"changes": sum(cache["changes"] for cache in caches)
+			}
+		flights = [entry.client.flights.stats() for entry in self._entries.values()]
+		stats["single_flight"] = {
+			"in_flight": sum(flight["in_flight"] for flight in flights),
+			"calls": sum(flight["calls"] for flight in flights),
+			"shared": sum(flight["shared"] for flight in flights)
+		}
+		if self.resources:
+			stats["resources"] = self.resources.stats()
+		if self.tool_results:
+			stats["tool_results"] = self.tool_results.stats()
+		if self.limiter:
+			stats["limiter"] = self.limiter.stats()
+		if self.router:
+			stats["backends"] = self.router.stats()
+		if self.breakers:
+			stats["breakers"] = self.breakers.stats()
+		if self.retry:
+			stats["retries"] = self.retry.stats()
+		return stats
+	
+	def backend_urls(self) -> List[str]:
+		"""Базовые URL публикаций 1С базы."""
+		if self.router:
+			return [backend.url for backend in self.router.backends]
+		return [self.config.onec_url.rstrip('/')]
+	
+	async def check_health(self, base_url: str) -> bool:
+		"""Проверить публикацию 1С креденшилами из конфигурации.
+		
+		Проверка не проходит через ограничитель и размыкатель цепи и отражает
+		фактическое состояние публикации (используется фоновой проверкой состояния).
+		
+		Args:
+			base_url: Базовый URL публикации
+		"""
+		client = self._health_clients.get(base_url)
+		if client is None:
+			client = OneCClient(
+				base_url=base_url,
+				username=self.config.onec_username,
+				password=self.config.onec_password,
+				service_root=self.config.onec_service_root,
+				http_client=self.http_client
+			)
+			self._health_clients[base_url] = client
+		return await client.check_health()
+	
+	async def close(self):
+		"""Закрыть пул и общий HTTP-клиент."""
+		if self.sessions:
+			for entry in self._entries.values():
+				for owner in entry.client.session_owners():
+					await entry.client.finish_sessions(self.sessions.drain(owner))
+		if self._finish_tasks:
+			await asyncio.gather(*self._finish_tasks, return_exceptions=True)
+		self._entries.clear()
+		await self.http_client.aclose()
+		logger.debug("Пул клиентов 1С закрыт")
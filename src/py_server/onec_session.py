@@ -0,0 +1,185 @@
+"""Повторное использование сеансов информационной базы 1С (IBSession)."""
+
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Hashable, List, Optional, Tuple
+
+import httpx
+
+
+logger = logging.getLogger(__name__)
+
+# Имя cookie, которым 1С передаёт идентификатор сеанса
+IBSESSION_COOKIE = "ibsession"
+
+# Тексты ответа 400, которыми 1С сообщает, что сеанса IBSession нет (истёк или завершён).
+# Прочие ответы 400 - обычные ошибки прикладного кода и сеанс не закрывают
+SESSION_NOT_FOUND_MARKERS = ("сеанс не найден", "сеанс не существует", "session not found", "session does not exist")
+
+# Сколько байт тела ответа просматривать в поисках признака
+SESSION_MARKER_SCAN_SIZE = 4096
+
+
+@dataclass
+class IBSession:
+	"""Долгоживущий сеанс 1С, привязанный к пользователю и публикации (url HTTP-сервиса)."""
+	cookie: str
+	auth: httpx.BasicAuth
+	url: str = ""
+	last_used: float = field(default_factory=time.monotonic)
+	
+	@property
+	def headers(self) -> dict:
+		"""Заголовки для запроса в рамках сеанса."""
+		return {"Cookie": f"{IBSESSION_COOKIE}={self.cookie}"}
+
+
+def extract_session_cookie(response: httpx.Response) -> Optional[str]:
+	"""Извлечь идентификатор сеанса 1С из Set-Cookie ответа.
+	
+	Args:
+		response: HTTP-ответ 1С
+	
+	Returns:
+		Значение cookie ibsession или None
+	"""
+	for header in response.headers.get_list("set-cookie"):
+		name, _, rest = header.partition("=")
+		if name.strip().lower() == IBSESSION_COOKIE:
+			return rest.split(";", 1)[0].strip()
+	return None
+
+
+def is_session_expired(response: httpx.Response, body: bytes) -> bool:
+	"""Ответ 1С явно сообщает, что сеанс IBSession недействителен.
+	
+	Args:
+		response: HTTP-ответ 1С
+		body: Тело ответа
+	
+	Returns:
+		True для 401 и для 400 с признаком отсутствующего сеанса
+	"""
+	if response.status_code == 401:
+		return True
+	if response.status_code != 400:
+		return False
+	text = bytes(body[:SESSION_MARKER_SCAN_SIZE]).decode("utf-8", "replace").lower()
+	return any(marker in text for marker in SESSION_NOT_FOUND_MARKERS)
+
+
+class IBSessionRegistry:
+	"""Реестр сеансов 1С, общий для всех клиентов пула.
+	
+	Ограничивает число одновременно открытых сеансов (лицензий) значением max_sessions.
+	Свободные сеансы хранятся в порядке использования; при нехватке слотов вытесняется
+	давно не использовавшийся свободный сеанс другого пользователя. Один сеанс в каждый
+	момент обслуживает только один запрос.
+	"""
+	
+	def __init__(self, max_sessions: int, max_age: int):
+		"""Инициализация реестра.
+		
+		Args:
+			max_sessions: Максимальное число одновременно открытых сеансов 1С
+			max_age: Время простоя сеанса в секундах, после которого 1С его закрывает
+		"""
+		self.max_sessions = max_sessions
+		self.max_age = max_age
+		self._live = 0
+		self._idle: "OrderedDict[str, Tuple[Hashable, IBSession]]" = OrderedDict()
+		
+		# Статистика
+		self._started = 0
+		self._reused = 0
+		self._expired = 0
+		self._evicted = 0
+		self._fallbacks = 0
+	
+	def checkout(self, owner: Hashable) -> Optional[IBSession]:
+		"""Взять свободный сеанс пользователя.
+		
+		Args:
+			owner: Ключ пользователя в пуле
+		
+		Returns:
+			Живой сеанс или None, если свободных сеансов нет
+		"""
+		now = time.monotonic()
+		for cookie in reversed(list(self._idle.keys())):
+			key, session = self._idle[cookie]
+			if key != owner:
+				continue
+			del self._idle[cookie]
+			if now - session.last_used >= self.max_age:
+				# 1С уже закрыла сеанс по таймауту - освобождаем слот
+				self._live -= 1
+				self._expired += 1
+				continue
+			self._reused += 1
+			return session
+		return None
+	
+	def reserve(self) -> Tuple[bool, Optional[IBSession]]:
+		"""Зарезервировать слот под новый сеанс.
+		
+		Returns:
+			Кортеж (слот получен, вытесненный сеанс для закрытия или None)
+		"""
+		if self._live < self.max_sessions:
+			self._live += 1
+			self._started += 1
+			return True, None
+		if self._idle:
+			# Освобождаем слот, занятый самым давним свободным сеансом
+			_, (_, evicted) = self._idle.popitem(last=False)
+			self._evicted += 1
+			self._started += 1
+			return True, evicted
+		self._fallbacks += 1
+		return False, None
+	
+	def checkin(self, owner: Hashable, session: IBSession):
+		"""Вернуть сеанс в число свободных."""
+		session.last_used = time.monotonic()
+		self._idle[session.cookie] = (owner, session)
+	
+	def discard(self, session: Optional[IBSession] = None):
+		"""Освободить слот сеанса (сеанс недействителен или не был открыт)."""
+		self._live = max(self._live - 1, 0)
+		if session is not None:
+			self._expired += 1
+	
+	def drain(self, owner: Optional[Hashable] = None) -> List[IBSession]:
+		"""Изъять свободные сеансы для закрытия.
+		
+		Args:
+			owner: Ключ пользователя (None - все пользователи)
+		
+		Returns:
+			Список изъятых сеансов
+		"""
+		drained = []
+		for cookie in list(self._idle.keys()):
+			key, session = self._idle[cookie]
+			if owner is None or key == owner:
+				del self._idle[cookie]
+				self._live = max(self._live - 1, 0)
+				drained.append(session)
+		return drained
+	
+	def stats(self) -> dict:
+		"""Получить статистику сеансов."""
+		return {
+			"live": self._live,
+			"idle": len(self._idle),
+			"max_sessions": self.max_sessions,
+			"max_age": self.max_age,
+			"started": self._started,
+			"reused": self._reused,
+			"expired": self._expired,
+			"evicted": self._evicted,
+			"stateless_fallbacks": self._fallbacks
+		}
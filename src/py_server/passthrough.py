@@ -0,0 +1,172 @@
+"""Прямая передача Streamable HTTP запросов в эндпоинт mcp HTTP-сервиса 1С."""
+
+import asyncio
+import logging
+from typing import AsyncIterator, Callable, Dict, Any, Tuple
+
+import anyio
+import httpx
+from starlette.types import Message, Scope, Receive, Send
+
+from . import json_codec
+
+
+logger = logging.getLogger(__name__)
+
+# Заголовки запроса клиента, передаваемые в 1С (x-mcp-timeout - оставшееся время выполнения в мс)
+FORWARDED_REQUEST_HEADERS = ("content-type", "content-length", "accept", "accept-encoding", "mcp-protocol-version", "x-mcp-timeout")
+
+# Код ответа для клиента, отключившегося до ответа 1С (как в nginx)
+CLIENT_CLOSED_REQUEST = 499
+
+# Заголовки ответа 1С, передаваемые клиенту
+FORWARDED_RESPONSE_HEADERS = ("content-type", "content-length", "content-encoding", "cache-control")
+
+
+class MCPPassthrough:
+	"""ASGI-приложение, передающее тела запросов и ответов между клиентом и 1С без разбора.
+	
+	Прокси отвечает только за авторизацию и подстановку креденшилов 1С: тело JSON-RPC запроса
+	потоком отправляется в /hs/<root>/mcp, а ответ 1С потоком возвращается клиенту.
+	HTTP-сервис 1С не хранит состояние MCP-сессии, поэтому поддерживается только POST.
+	Если клиент отключается, не дождавшись ответа, запрос к 1С прерывается.
+	"""
+	
+	def __init__(
+		self,
+		url: str,
+		http_client: httpx.AsyncClient,
+		get_credentials: Callable[[], Tuple[str, str]]
+	):
+		"""Инициализация.
+		
+		Args:
+			url: URL эндпоинта mcp HTTP-сервиса 1С
+			http_client: Общий HTTP-клиент пула
+			get_credentials: Функция получения креденшилов 1С текущего запроса
+		"""
+		self.url = url
+		self.http_client = http_client
+		self.get_credentials = get_credentials
+		
+		# Статистика
+		self._requests = 0
+		self._errors = 0
+		self._bytes_in = 0
+		self._bytes_out = 0
+		self._disconnects = 0
+	
+	async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+		"""Обработать запрос клиента."""
+		if scope["type"] != "http":
+			return
+		if scope["method"] != "POST":
+			await self._send_bytes(send, 405, b"", [(b"allow", b"POST")])
+			return
+		
+		self._requests += 1
+		username, password = self.get_credentials()
+		headers = [
+			(name, value) for name, value in scope["headers"]
+			if name.decode("latin-1").lower() in FORWARDED_REQUEST_HEADERS
+		]
+		
+		body_read = asyncio.Event()
+		request = self.http_client.build_request(
+			"POST",
+			self.url,
+			content=self._request_body(receive, body_read),
+			headers=headers
+		)
+		response_started = False
+		
+		async def tracked_send(message: Message):
+			nonlocal response_started
+			response_started = response_started or message["type"] == "http.response.start"
+			await send(message)
+		
+		with anyio.CancelScope() as cancel_scope:
+			watcher = asyncio.ensure_future(self._watch_disconnect(receive, body_read, cancel_scope))
+			try:
+				await self._forward(request, username, password, tracked_send)
+			finally:
+				watcher.cancel()
+		if cancel_scope.cancelled_caught and not response_started:
+			# Клиент уже отключился; ответ нужен только middleware, ожидающим его начала
+			await self._send_bytes(send, CLIENT_CLOSED_REQUEST, b"", [])
+	
+	async def _forward(self, request: httpx.Request, username: str, password: str, send: Send):
+		"""Отправить запрос в 1С и передать клиенту ответ потоком."""
+		try:
+			response = await self.http_client.send(request, auth=httpx.BasicAuth(username, password), stream=True)
+		except httpx.HTTPError as e:
+			self._errors += 1
+			logger.error(f"Ошибка передачи запроса в 1С: {e}")
+			body = json_codec.dumps({
+				"jsonrpc": "2.0",
+				"id": None,
+				"error": {"code": -32603, "message": f"1С недоступна: {e}"}
+			})
+			await self._send_bytes(send, 502, body, [(b"content-type", b"application/json; charset=utf-8")])
+			return
+		
+		try:
+			await send({
+				"type": "http.response.start",
+				"status": response.status_code,
+				"headers": [
+					(name.encode("latin-1"), value.encode("latin-1"))
+					for name, value in response.headers.items()
+					if name.lower() in FORWARDED_RESPONSE_HEADERS
+				]
+			})
+			async for chunk in response.aiter_raw():
+				self._bytes_out += len(chunk)
+				await send({"type": "http.response.body", "body": chunk, "more_body": True})
+			await send({"type": "http.response.body", "body": b"", "more_body": False})
+		finally:
+			await response.aclose()
+	
+	async def _request_body(self, receive: Receive, body_read: asyncio.Event) -> AsyncIterator[bytes]:
+		"""Тело запроса клиента потоком."""
+		try:
+			while True:
+				message = await receive()
+				if message["type"] == "http.disconnect":
+					return
+				chunk = message.get("body", b"")
+				self._bytes_in += len(chunk)
+				if chunk:
+					yield chunk
+				if not message.get("more_body", False):
+					return
+		finally:
+			body_read.set()
+	
+	async def _watch_disconnect(self, receive: Receive, body_read: asyncio.Event, cancel_scope: anyio.CancelScope):
+		"""Прервать запрос к 1С, если клиент отключился."""
+		# Пока httpx читает тело запроса, сообщения клиента получает он
+		await body_read.wait()
+		while True:
+			message = await receive()
+			if message["type"] == "http.disconnect":
+				self._disconnects += 1
+				logger.debug("Клиент отключился, запрос к 1С прерван")
+				cancel_scope.cancel()
+				return
+	
+	@staticmethod
+	async def _send_bytes(send: Send, status: int, body: bytes, headers: list):
+		"""Отправить клиенту ответ целиком."""
+		await send({"type": "http.response.start", "status": status, "headers": headers})
+		await send({"type": "http.response.body", "body": body})
+	
+	def stats(self) -> Dict[str, Any]:
+		"""Получить статистику прямой передачи."""
+		return {
+			"requests": self._requests,
+			"errors": self._errors,
+			"bytes_in": self._bytes_in,
+			"bytes_out": self._bytes_out,
+			"disconnects": self._disconnects
+		}
@@ -0,0 +1,118 @@
+"""Кеш содержимого ресурсов 1С с ревалидацией по etag."""
+
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, List, Optional
+
+from mcp.server.lowlevel.helper_types import ReadResourceContents
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedResource:
+	"""Закешированное содержимое ресурса."""
+	etag: str
+	contents: List[ReadResourceContents]
+	size: int
+	stored_at: float = field(default_factory=time.monotonic)
+
+
+class ResourceCache:
+	"""Кеш прочитанных ресурсов, общий для всех клиентов пула.
+	
+	Содержимое хранится вместе с etag, полученным от 1С. Повторное чтение отправляет etag
+	в параметре ifNoneMatch, и неизменившийся ресурс 1С подтверждает коротким ответом
+	notModified без передачи содержимого. В течение ttl ресурс отдаётся без обращения к 1С.
+	Объём кеша ограничен max_bytes, при переполнении вытесняются давно не читавшиеся ресурсы.
+	"""
+	
+	def __init__(self, max_bytes: int, ttl: float = 0):
+		"""Инициализация кеша.
+		
+		Args:
+			max_bytes: Максимальный суммарный размер содержимого в байтах
+			ttl: Время в секундах, в течение которого ресурс отдаётся без ревалидации
+		"""
+		self.max_bytes = max_bytes
+		self.ttl = ttl
+		self._entries: "OrderedDict[Hashable, CachedResource]" = OrderedDict()
+		self._bytes = 0
+		
+		# Статистика
+		self._hits = 0
+		self._revalidated = 0
+		self._misses = 0
+		self._evictions = 0
+	
+	def get(self, key: Hashable) -> Optional[CachedResource]:
+		"""Получить закешированный ресурс.
+		
+		Args:
+			key: Ключ ресурса (пользователь и URI)
+		
+		Returns:
+			Запись кеша или None
+		"""
+		entry = self._entries.get(key)
+		if entry is None:
+			self._misses += 1
+			return None
+		self._entries.move_to_end(key)
+		return entry
+	
+	def is_fresh(self, entry: CachedResource) -> bool:
+		"""Можно ли отдать ресурс без ревалидации в 1С."""
+		if self.ttl > 0 and time.monotonic() - entry.stored_at < self.ttl:
+			self._hits += 1
+			return True
+		return False
+	
+	def confirm(self, entry: CachedResource):
+		"""Отметить, что 1С подтвердила актуальность содержимого (notModified)."""
+		entry.stored_at = time.monotonic()
+		self._revalidated += 1
+	
+	def put(self, key: Hashable, etag: str, contents: List[ReadResourceContents]):
+		"""Сохранить содержимое ресурса.
+		
+		Args:
+			key: Ключ ресурса
+			etag: Версия содержимого, полученная от 1С
+			contents: Содержимое ресурса
+		"""
+		size = sum(
+			len(item.content.encode("utf-8")) if isinstance(item.content, str) else len(item.content)
+			for item in contents
+		)
+		self._discard(key)
+		if size > self.max_bytes:
+			return
+		self._entries[key] = CachedResource(etag=etag, contents=contents, size=size)
+		self._bytes += size
+		while self._bytes > self.max_bytes:
+			oldest = next(iter(self._entries))
+			self._discard(oldest)
+			self._evictions += 1
+	
+	def _discard(self, key: Hashable):
+		"""Удалить ресурс из кеша."""
+		entry = self._entries.pop(key, None)
+		if entry:
+			self._bytes -= entry.size
+	
+	def stats(self) -> Dict[str, Any]:
+		"""Получить статистику кеша."""
+		return {
+			"resources": len(self._entries),
+			"bytes": self._bytes,
+			"max_bytes": self.max_bytes,
+			"ttl": self.ttl,
+			"hits": self._hits,
+			"revalidated": self._revalidated,
+			"misses": self._misses,
+			"evictions": self._evictions
+		}
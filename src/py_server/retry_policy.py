@@ -0,0 +1,179 @@
+"""Повторы и хеджирование запросов к 1С без побочных эффектов."""
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+from .concurrency_limiter import ConcurrencyLimiter
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Перцентиль задержки, после которого отправляется хеджирующий запрос
+HEDGE_PERCENTILE = 0.95
+
+# Число последних задержек по виду запроса, по которым оценивается перцентиль
+LATENCY_WINDOW = 200
+
+# Минимальное число задержек, после которого запросы вида хеджируются
+HEDGE_MIN_SAMPLES = 20
+
+
+class RetryPolicy:
+	"""Повторы с экспоненциальной задержкой и хеджирование запросов без побочных эффектов.
+	
+	Запрос, завершившийся ошибкой перегрузки или недоступности 1С, повторяется не более
+	attempts раз; пауза перед повтором выбирается случайно от нуля до base_delay * 2^n,
+	но не больше max_delay (full jitter), чтобы повторы разных клиентов не совпадали.
+	При включённом хеджировании, если запрос выполняется дольше 95-го перцентиля задержки
+	своего вида, параллельно отправляется второй такой же запрос; используется ответ,
+	пришедший первым, второй запрос отменяется. Пока в очереди ограничителя есть ожидающие,
+	хеджирование не выполняется, чтобы не увеличивать нагрузку на перегруженную 1С.
+	"""
+	
+	def __init__(
+		self,
+		retryable: Callable[[BaseException], bool],
+		attempts: int = 2,
+		base_delay: float = 0.1,
+		max_delay: float = 2.0,
+		hedge: bool = False,
+		limiter: Optional[ConcurrencyLimiter] = None
+	):
+		"""Инициализация.
+		
+		Args:
+			retryable: Признак ошибки, после которой запрос можно повторить
+			attempts: Максимальное число повторов (0 - без повторов)
+			base_delay: Базовая пауза перед повтором в секундах
+			max_delay: Максимальная пауза перед повтором в секундах
+			hedge: Отправлять хеджирующий запрос после 95-го перцентиля задержки
+			limiter: Ограничитель одновременных запросов к 1С (по его очереди хеджирование приостанавливается)
+		"""
+		self.retryable = retryable
+		self.attempts = attempts
+		self.base_delay = base_delay
+		self.max_delay = max_delay
+		self.hedge = hedge
+		self.limiter = limiter
+		self._latencies: Dict[str, Deque[float]] = {}
+		
+		# Статистика
+		self._retries = 0
+		self._recovered = 0
+		self._exhausted = 0
+		self._hedges = 0
+		self._hedge_wins = 0
+	
+	async def run(self, kind: str, call: Callable[[], Awaitable[T]]) -> T:
+		"""Выполнить запрос с повторами и хеджированием.
+		
+		Args:
+			kind: Вид запроса (метод JSON-RPC или имя инструмента)
+			call: Функция выполнения одной попытки запроса
+		
+		Returns:
+			Результат запроса
+		"""
+		attempt = 0
+		while True:
+			try:
+				result = await self._attempt(kind, call)
+			except Exception as e:
+				if not self.retryable(e):
+					raise
+				if attempt >= self.attempts:
+					if attempt:
+						self._exhausted += 1
+					raise
+				attempt += 1
+				self._retries += 1
+				delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+				logger.debug(f"Повтор {attempt}/{self.attempts} запроса {kind} к 1С через {delay:.2f} с: {e}")
+				await asyncio.sleep(delay)
+				continue
+			if attempt:
+				self._recovered += 1
+			return result
+	
+	async def _attempt(self, kind: str, call: Callable[[], Awaitable[T]]) -> T:
+		"""Выполнить одну попытку запроса, при необходимости с хеджирующим запросом."""
+		hedge_delay = self.hedge_delay(kind)
+		started = time.monotonic()
+		if hedge_delay is None:
+			result = await call()
+			self._observe(kind, time.monotonic() - started)
+			return result
+		
+		first = asyncio.ensure_future(call())
+		pending = {first}
+		try:
+			done, pending = await asyncio.wait(pending, timeout=hedge_delay)
+			if not done and not (self.limiter and self.limiter.queue_depth):
+				self._hedges += 1
+				logger.debug(f"Хеджирующий запрос {kind} к 1С после {hedge_delay:.3f} с")
+				hedge_started = time.monotonic()
+				pending.add(asyncio.ensure_future(call()))
+			error: Optional[BaseException] = None
+			while True:
+				for task in done:
+					if task.exception() is None:
+						if task is not first:
+							self._hedge_wins += 1
+						self._observe(kind, time.monotonic() - (started if task is first else hedge_started))
+						return task.result()
+					error = task.exception()
+				if not pending:
+					raise error
+				done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+		finally:
+			for task in pending:
+				task.cancel()
+	
+	def hedge_delay(self, kind: str) -> Optional[float]:
+		"""Задержка, после которой запрос вида хеджируется (None - не хеджировать).
+		
+		Args:
+			kind: Вид запроса
+		"""
+		if not self.hedge:
+			return None
+		latencies = self._latencies.get(kind)
+		if not latencies or len(latencies) < HEDGE_MIN_SAMPLES:
+			return None
+		ordered = sorted(latencies)
+		return ordered[int(HEDGE_PERCENTILE * (len(ordered) - 1))]
+	
+	def _observe(self, kind: str, latency: float):
+		"""Запомнить задержку успешного запроса."""
+		latencies = self._latencies.get(kind)
+		if latencies is None:
+			latencies = deque(maxlen=LATENCY_WINDOW)
+			self._latencies[kind] = latencies
+		latencies.append(latency)
+	
+	def stats(self) -> Dict[str, Any]:
+		"""Получить статистику повторов и хеджирования."""
+		stats = {
+			"attempts": self.attempts,
+			"retries": self._retries,
+			"recovered": self._recovered,
+			"exhausted": self._exhausted
+		}
+		if self.hedge:
+			delays = {}
+			for kind in self._latencies:
+				delay = self.hedge_delay(kind)
+				if delay is not None:
+					delays[kind] = round(delay, 4)
+			stats["hedging"] = {
+				"hedges": self._hedges,
+				"wins": self._hedge_wins,
+				"delays": delays
+			}
+		return stats
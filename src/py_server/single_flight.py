@@ -0,0 +1,93 @@
+"""Объединение одинаковых одновременных запросов к 1С (single-flight)."""
+
+import asyncio
+import contextvars
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from .deadline import DeadlineExceeded, current_deadline, remaining
+
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+	"""Выполняющийся запрос и число ожидающих его результата."""
+	
+	def __init__(self, task: asyncio.Task):
+		self.task = task
+		self.waiters = 0
+
+
+class SingleFlight:
+	"""Выполняет не более одного запроса на ключ; остальные вызовы ждут его результата.
+	
+	Запрос выполняется в отдельной задаче, поэтому отмена одного из ожидающих не прерывает
+	его для остальных. Если все ожидающие ушли, запрос к 1С отменяется.
+	
+	Срок выполнения первого вызова не переносится в общую задачу: иначе короткий срок
+	одного клиента прерывал бы запрос для всех. Каждый ожидающий ограничивает своим
+	сроком только собственное ожидание.
+	"""
+	
+	def __init__(self):
+		"""Инициализация."""
+		self._flights: Dict[Hashable, _Flight] = {}
+		
+		# Статистика
+		self._calls = 0
+		self._shared = 0
+	
+	async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+		"""Выполнить запрос или присоединиться к уже выполняющемуся.
+		
+		Args:
+			key: Ключ запроса (метод и канонические параметры)
+			fn: Функция выполнения запроса
+		
+		Returns:
+			Результат запроса
+		"""
+		flight = self._flights.get(key)
+		if flight is None:
+			# Задача выполняется в копии контекста без срока выполнения вызывающего
+			context = contextvars.copy_context()
+			context.run(current_deadline.set, None)
+			flight = _Flight(context.run(asyncio.ensure_future, fn()))
+			self._flights[key] = flight
+			flight.task.add_done_callback(lambda _: self._forget(key, flight))
+			self._calls += 1
+		else:
+			self._shared += 1
+			logger.debug("Запрос присоединён к выполняющемуся такому же запросу")
+		
+		flight.waiters += 1
+		try:
+			timeout = remaining()
+			if timeout is None:
+				return await asyncio.shield(flight.task)
+			try:
+				return await asyncio.wait_for(asyncio.shield(flight.task), max(timeout, 0))
+			except asyncio.TimeoutError:
+				if flight.task.done():
+					raise
+				raise DeadlineExceeded("Истёк срок ожидания объединённого запроса к 1С") from None
+		finally:
+			flight.waiters -= 1
+			if flight.waiters == 0 and not flight.task.done():
+				# Все ожидающие отменены - результат больше не нужен
+				self._forget(key, flight)
+				flight.task.cancel()
+	
+	def _forget(self, key: Hashable, flight: _Flight):
+		"""Убрать запрос из выполняющихся."""
+		if self._flights.get(key) is flight:
+			del self._flights[key]
+	
+	def stats(self) -> Dict[str, Any]:
+		"""Получить статистику объединения запросов."""
+		return {
+			"in_flight": len(self._flights),
+			"calls": self._calls,
+			"shared": self._shared
+		}
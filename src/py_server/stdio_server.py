@@ -32,4 +32,6 @@ async def run_stdio_server(config: Config):
 			)
 	except Exception as e:
 		logger.error(f"Ошибка в stdio сервере: {e}")
-		raise 
\ No newline at end of file
+		raise
+	finally:
+		await mcp_proxy.close() 
\ No newline at end of file
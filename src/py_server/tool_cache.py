@@ -0,0 +1,87 @@
+"""Кеш результатов вызова только читающих инструментов 1С."""
+
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from mcp import types
+
+from . import json_codec
+
+
+logger = logging.getLogger(__name__)
+
+
+def canonical_arguments(arguments: Optional[Dict[str, Any]]) -> bytes:
+	"""Привести аргументы вызова к каноническому JSON (порядок ключей не важен)."""
+	return json_codec.dumps(arguments or {}, sort_keys=True)
+
+
+class ToolResultCache:
+	"""LRU-кеш результатов вызова инструментов, общий для всех клиентов пула.
+	
+	Кешируются только инструменты, объявленные в 1С как только читающие и имеющие
+	время кеширования (_meta.cacheTtl). Ключ включает пользователя 1С, поэтому
+	результаты, зависящие от прав, не передаются другим пользователям.
+	"""
+	
+	def __init__(self, max_entries: int):
+		"""Инициализация кеша.
+		
+		Args:
+			max_entries: Максимальное число закешированных результатов
+		"""
+		self.max_entries = max_entries
+		self._entries: "OrderedDict[Hashable, Tuple[types.CallToolResult, float]]" = OrderedDict()
+		
+		# Статистика
+		self._hits = 0
+		self._misses = 0
+		self._evictions = 0
+	
+	def get(self, key: Hashable) -> Optional[types.CallToolResult]:
+		"""Получить результат вызова, если он ещё не устарел.
+		
+		Args:
+			key: Ключ вызова (пользователь, инструмент, канонические аргументы)
+		
+		Returns:
+			Результат вызова или None
+		"""
+		item = self._entries.get(key)
+		if item is None:
+			self._misses += 1
+			return None
+		result, expires_at = item
+		if time.monotonic() >= expires_at:
+			del self._entries[key]
+			self._misses += 1
+			return None
+		self._entries.move_to_end(key)
+		self._hits += 1
+		return result
+	
+	def put(self, key: Hashable, result: types.CallToolResult, ttl: float):
+		"""Сохранить результат вызова.
+		
+		Args:
+			key: Ключ вызова
+			result: Результат вызова инструмента
+			ttl: Время жизни результата в секундах
+		"""
+		self._entries[key] = (result, time.monotonic() + ttl)
+		self._entries.move_to_end(key)
+		while len(self._entries) > self.max_entries:
+			self._entries.popitem(last=False)
+			self._evictions += 1
+	
+	def stats(self) -> Dict[str, Any]:
+		"""Получить статистику кеша."""
+		return {
+			"entries": len(self._entries),
+			"max_entries": self.max_entries,
+			"hits": self._hits,
+			"misses": self._misses,
+			"evictions": self._evictions
+		}
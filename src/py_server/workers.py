@@ -0,0 +1,313 @@
+"""Многопроцессный режим HTTP-сервера: воркеры на общем порту и привязка сессий к воркеру."""
+
+import asyncio
+import logging
+import os
+import re
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+from typing import Any, Dict, List, Optional
+
+import anyio
+import httpx
+from starlette.types import ASGIApp, Message, Scope, Receive, Send
+
+from .config import Config
+
+
+logger = logging.getLogger(__name__)
+
+# Переменные окружения, которыми супервизор передаёт воркеру его номер и каталог сокетов воркеров
+WORKER_INDEX_ENV = "MCP_WORKER_INDEX"
+WORKER_SOCKETS_ENV = "MCP_WORKER_SOCKETS"
+
+# Заголовок идентификатора сессии Streamable HTTP
+SESSION_HEADER = b"mcp-session-id"
+
+# Идентификатор сессии с номером воркера-владельца: w<номер>.<идентификатор сессии MCP>
+OWNED_SESSION_ID = re.compile(rb"w(\d+)\.(.+)")
+
+# Путь отправки сообщений SSE-потока воркера: /sse/messages/w<номер>/
+OWNED_MESSAGES_PATH = re.compile(r"/messages/w(\d+)/")
+
+# Заголовки соединения, которые не передаются между воркерами
+HOP_BY_HOP_HEADERS = (b"connection", b"keep-alive", b"transfer-encoding", b"upgrade")
+
+# Задержка перед перезапуском завершившегося воркера в секундах
+RESTART_DELAY = 1.0
+
+# Время на штатную остановку воркера в секундах, после него процесс завершается принудительно
+SHUTDOWN_TIMEOUT = 10.0
+
+
+def supported() -> bool:
+	"""Доступен ли многопроцессный режим (SO_REUSEPORT и Unix-сокеты, Linux/BSD)."""
+	return hasattr(socket, "SO_REUSEPORT") and hasattr(socket, "AF_UNIX")
+
+
+def current_worker() -> Optional[int]:
+	"""Номер текущего воркера или None, если процесс запущен не супервизором."""
+	value = os.environ.get(WORKER_INDEX_ENV)
+	return int(value) if value else None
+
+
+def sockets_dir() -> str:
+	"""Каталог сокетов воркеров (задаётся супервизором)."""
+	return os.environ[WORKER_SOCKETS_ENV]
+
+
+def worker_socket_path(socket_dir: str, index: int) -> str:
+	"""Путь к Unix-сокету воркера, на который пересылаются запросы его сессий."""
+	return os.path.join(socket_dir, f"worker-{index}.sock")
+
+
+def messages_path(worker: Optional[int]) -> str:
+	"""Путь отправки сообщений SSE (внутри приложения /sse) для воркера."""
+	return "/messages/" if worker is None else f"/messages/w{worker}/"
+
+
+def listen_sockets(host: str, port: int, socket_dir: str, index: int) -> List[socket.socket]:
+	"""Сокеты воркера: общий TCP-порт (SO_REUSEPORT) и собственный Unix-сокет.
+	
+	Args:
+		host: Хост HTTP-сервера
+		port: Порт HTTP-сервера
+		socket_dir: Каталог сокетов воркеров
+		index: Номер воркера
+	
+	Returns:
+		Список сокетов для uvicorn
+	"""
+	# Каждый воркер открывает порт сам, ядро распределяет новые соединения между ними
+	family = socket.AF_INET6 if ":" in host else socket.AF_INET
+	tcp = socket.socket(family, socket.SOCK_STREAM)
+	tcp.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+	tcp.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+	tcp.bind((host, port))
+	
+	path = worker_socket_path(socket_dir, index)
+	if os.path.exists(path):
+		# Сокет предыдущего процесса этого воркера (после перезапуска)
+		os.unlink(path)
+	unix = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+	unix.bind(path)
+	return [tcp, unix]
+
+
+class SessionAffinityMiddleware:
+	"""Привязка MCP-сессий к воркеру, в котором они созданы.
+	
+	Состояние сессии (SSE-поток, сессия Streamable HTTP) хранится в памяти воркера,
+	а ядро распределяет соединения по воркерам без учёта сессий. Поэтому номер
+	воркера-владельца добавляется к идентификатору сессии Streamable HTTP
+	(заголовок Mcp-Session-Id) и к пути отправки сообщений SSE. Запрос чужой сессии
+	пересылается воркеру-владельцу через его Unix-сокет, запрос своей сессии
+	обрабатывается на месте с исходным идентификатором.
+	"""
+	
+	def __init__(self, app: ASGIApp, worker: int, workers: int, socket_dir: str):
+		"""Инициализация.
+		
+		Args:
+			app: ASGI-приложение
+			worker: Номер текущего воркера
+			workers: Число воркеров
+			socket_dir: Каталог сокетов воркеров
+		"""
+		self.app = app
+		self.worker = worker
+		self.workers = workers
+		self.socket_dir = socket_dir
+		self._session_prefix = f"w{worker}.".encode("ascii")
+		self._clients: Dict[int, httpx.AsyncClient] = {}
+		
+		# Статистика
+		self._local = 0
+		self._forwarded = 0
+		self._errors = 0
+	
+	async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+		"""Обработать запрос: на месте или в воркере-владельце сессии."""
+		if scope["type"] != "http":
+			await self.app(scope, receive, send)
+			return
+		
+		owner: Optional[int] = None
+		headers = None
+		for i, (name, value) in enumerate(scope["headers"]):
+			if name == SESSION_HEADER:
+				match = OWNED_SESSION_ID.fullmatch(value)
+				if match:
+					owner = int(match.group(1))
+					headers = list(scope["headers"])
+					headers[i] = (name, match.group(2))
+				break
+		if owner is None:
+			match = OWNED_MESSAGES_PATH.search(scope["path"])
+			if match:
+				owner = int(match.group(1))
+		
+		if owner is not None and owner != self.worker and owner < self.workers:
+			self._forwarded += 1
+			await self._forward(owner, scope, receive, send)
+			return
+		
+		self._local += 1
+		if headers is not None:
+			scope = dict(scope, headers=headers)
+		
+		async def tag_session(message: Message):
+			if message["type"] == "http.response.start":
+				message = dict(message, headers=[
+					(name, self._session_prefix + value if name == SESSION_HEADER else value)
+					for name, value in message.get("headers", [])
+				])
+			await send(message)
+		
+		await self.app(scope, receive, tag_session)
+	
+	def _client(self, owner: int) -> httpx.AsyncClient:
+		"""HTTP-клиент Unix-сокета воркера-владельца."""
+		client = self._clients.get(owner)
+		if client is None:
+			client = httpx.AsyncClient(
+				transport=httpx.AsyncHTTPTransport(uds=worker_socket_path(self.socket_dir, owner)),
+				timeout=httpx.Timeout(None)
+			)
+			self._clients[owner] = client
+		return client
+	
+	async def _forward(self, owner: int, scope: Scope, receive: Receive, send: Send):
+		"""Переслать запрос воркеру-владельцу и передать клиенту его ответ потоком."""
+		# Запросы MCP невелики: тело читается целиком, чтобы GET и DELETE не уходили с chunked-телом
+		body = bytearray()
+		while True:
+			message = await receive()
+			if message["type"] == "http.disconnect":
+				return
+			body += message.get("body", b"")
+			if not message.get("more_body", False):
+				break
+		
+		path = scope.get("raw_path") or scope["path"].encode("utf-8")
+		url = "http://worker" + path.decode("latin-1")
+		if scope.get("query_string"):
+			url += "?" + scope["query_string"].decode("latin-1")
+		client = self._client(owner)
+		request = client.build_request(
+			scope["method"],
+			url,
+			content=bytes(body),
+			headers=[(name, value) for name, value in scope["headers"] if name not in HOP_BY_HOP_HEADERS]
+		)
+		
+		with anyio.CancelScope() as cancel_scope:
+			# Клиент отключился - прерываем запрос (и поток SSE) к воркеру-владельцу
+			watcher = asyncio.ensure_future(self._watch_disconnect(receive, cancel_scope))
+			try:
+				try:
+					response = await client.send(request, stream=True)
+				except httpx.HTTPError as e:
+					self._errors += 1
+					logger.error(f"Ошибка пересылки запроса воркеру {owner}: {e}")
+					await send({"type": "http.response.start", "status": 502, "headers": [(b"content-type", b"text/plain; charset=utf-8")]})
+					await send({"type": "http.response.body", "body": f"Воркер {owner} недоступен".encode("utf-8")})
+					return
+				
+				try:
+					await send({
+						"type": "http.response.start",
+						"status": response.status_code,
+						"headers": [
+							(name, value) for name, value in response.headers.raw
+							if name.lower() not in HOP_BY_HOP_HEADERS
+						]
+					})
+					async for chunk in response.aiter_raw():
+						await send({"type": "http.response.body", "body": chunk, "more_body": True})
+					await send({"type": "http.response.body", "body": b"", "more_body": False})
+				finally:
+					await response.aclose()
+			finally:
+				watcher.cancel()
+	
+	@staticmethod
+	async def _watch_disconnect(receive: Receive, cancel_scope: anyio.CancelScope):
+		"""Прервать пересылку, если клиент отключился."""
+		while True:
+			message = await receive()
+			if message["type"] == "http.disconnect":
+				cancel_scope.cancel()
+				return
+	
+	async def close(self):
+		"""Закрыть HTTP-клиенты других воркеров."""
+		for client in self._clients.values():
+			await client.aclose()
+		self._clients.clear()
+	
+	def stats(self) -> Dict[str, Any]:
+		"""Получить статистику привязки сессий."""
+		return {
+			"worker": self.worker,
+			"workers": self.workers,
+			"local": self._local,
+			"forwarded": self._forwarded,
+			"errors": self._errors
+		}
+
+
+async def run_workers(config: Config):
+	"""Запустить HTTP-сервер в config.http_workers процессах и перезапускать завершившиеся.
+	
+	Воркер - отдельный процесс в режиме http с тем же окружением; номер воркера
+	и каталог сокетов передаются в переменных окружения. SIGINT и SIGTERM останавливают
+	все воркеры.
+	
+	Args:
+		config: Конфигурация сервера
+	"""
+	socket_dir = tempfile.mkdtemp(prefix="mcp-workers-")
+	stopping = asyncio.Event()
+	loop = asyncio.get_running_loop()
+	for sig in (signal.SIGINT, signal.SIGTERM):
+		loop.add_signal_handler(sig, stopping.set)
+	
+	async def supervise(index: int):
+		env = dict(os.environ, **{WORKER_INDEX_ENV: str(index), WORKER_SOCKETS_ENV: socket_dir})
+		while not stopping.is_set():
+			# Аргументы командной строки и .env уже перенесены в окружение, воркеру нужен только режим
+			process = await asyncio.create_subprocess_exec(sys.executable, "-m", __package__, "http", env=env)
+			logger.info(f"Воркер {index} запущен (pid {process.pid})")
+			exited = asyncio.ensure_future(process.wait())
+			stopped = asyncio.ensure_future(stopping.wait())
+			await asyncio.wait({exited, stopped}, return_when=asyncio.FIRST_COMPLETED)
+			stopped.cancel()
+			
+			if stopping.is_set():
+				if process.returncode is None:
+					process.terminate()
+					done, _ = await asyncio.wait({exited}, timeout=SHUTDOWN_TIMEOUT)
+					if not done:
+						logger.warning(f"Воркер {index} не остановился за {SHUTDOWN_TIMEOUT:g} с, процесс завершается принудительно")
+						process.kill()
+						await exited
+				logger.info(f"Воркер {index} остановлен")
+				return
+			
+			logger.warning(f"Воркер {index} завершился с кодом {process.returncode}, перезапуск через {RESTART_DELAY:g} с")
+			try:
+				await asyncio.wait_for(stopping.wait(), RESTART_DELAY)
+			except asyncio.TimeoutError:
+				pass
+	
+	logger.info(f"Запуск {config.http_workers} воркеров HTTP-сервера на {config.host}:{config.port}")
+	try:
+		await asyncio.gather(*(supervise(index) for index in range(config.http_workers)))
+	finally:
+		for sig in (signal.SIGINT, signal.SIGTERM):
+			loop.remove_signal_handler(sig)
+		shutil.rmtree(socket_dir, ignore_errors=True)